@@ -0,0 +1,463 @@
+#!/usr/bin/env python3
+"""
+Non-interactive rule generation across many repositories.
+
+Takes repository paths (arguments and/or --repos-file, one per line) and a
+policy file deciding which detected keys are accepted and which rule is used
+for each. The rule catalog is fetched once, repositories are scanned in a
+pool of worker processes, and each repo's rules are written as soon as its
+scan completes. Every rule is downloaded and converted once for all repos.
+
+  --mode catalog           (default) scan_for_languages_and_tech + the
+                           awesome-cursor-rules-mdc catalog; writes
+                           <repo>/.windsurf/rules/<key>.md per accepted key
+  --mode cursor-directory  scan_for_keys_canonical + cursor.directory; writes
+                           <repo>/.windsurfrules (.cursorrules with --iscursor)
+
+With --workspaces every monorepo workspace is scanned from the repository
+root; in catalog mode, keys found only in sub-workspaces get one rule per
+workspace (.windsurf/rules/<workspace>--<key>.md) triggered by its globs.
+
+Policy file (YAML or JSON):
+
+  accept: ['*']              # keys to add; '*' accepts every detected key
+  reject: [html]             # never added, even with '*'
+  catalog_rules:             # catalog mode: catalog rule to use for a key
+    node.js: nodejs
+  cursor_directory_rules:    # cursor-directory mode: 'first' (default), 'all', or the
+    python: 2                # 1-based position among the page's .txt links, then code blocks
+
+Ends with an aggregate report (per-repo timings, keys, written files), also
+written as JSON with --report.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import yaml
+
+import generate_windsurfrules
+import generate_windsurfrules_from_cursor_rules_list as catalog_gen
+from content_sniffer import DEFAULT_SNIFF_WORKERS
+from file_classifier import DEFAULT_MAX_FILE_BYTES, format_skips
+from file_source import add_file_source_arguments, open_file_source
+from github_catalog import DEFAULT_REF, read_catalog_file
+from http_cache import DEFAULT_MAX_BYTES, HttpCache, make_cached_fetch
+from rule_catalog import add_catalog_arguments, catalog_from_args
+from rule_fetcher import DEFAULT_FETCH_WORKERS, fetch_many, make_session
+from rule_frontmatter import convert_rule
+from rules_writer import StreamingRulesWriter, write_text_atomic
+from scan_budget import add_budget_arguments, budget_from_args
+from workspaces import (ROOT, scan_workspace_keys, scan_workspace_tech, scoped_rule, scoped_rule_name,
+                        workspace_rule_targets)
+
+MODES = ('catalog', 'cursor-directory')
+POLICY_FIELDS = ('accept', 'reject', 'catalog_rules', 'cursor_directory_rules')
+DEFAULT_JOBS = os.cpu_count() or 1
+
+
+class RulePolicy:
+    def __init__(self, accept=None, reject=None, catalog_rules=None, cursor_directory_rules=None):
+        accept = [accept] if isinstance(accept, str) else list(accept or [])
+        self.accept_all = '*' in accept
+        self.accept = {str(k).lower() for k in accept if k != '*'}
+        self.reject = {str(k).lower() for k in reject or []}
+        self.catalog_rules = {str(k).lower(): str(v) for k, v in (catalog_rules or {}).items()}
+        self.cursor_directory_rules = {}
+        for key, choice in (cursor_directory_rules or {}).items():
+            if choice not in ('first', 'all') and not (isinstance(choice, int) and choice >= 1):
+                raise ValueError(f"Invalid rule choice for {key!r}: {choice!r} (use 'first', 'all' or a position >= 1)")
+            self.cursor_directory_rules[str(key).lower()] = choice
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = yaml.safe_load(f) or {}
+        if not isinstance(data, dict):
+            raise ValueError(f"Policy file {path} must contain a mapping")
+        unknown = set(data) - set(POLICY_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown policy fields in {path}: {', '.join(sorted(unknown))}")
+        return cls(**data)
+
+    def accepts(self, key):
+        k = key.lower()
+        return k not in self.reject and (self.accept_all or k in self.accept)
+
+    def catalog_rule(self, key):
+        return self.catalog_rules.get(key.lower())
+
+    def rule_choice(self, key):
+        return self.cursor_directory_rules.get(key.lower(), 'first')
+
+
+def read_repo_list(paths, repos_file=None):
+    repos = list(paths)
+    if repos_file:
+        with open(repos_file, 'r', encoding='utf-8') as f:
+            repos.extend(line.strip() for line in f if line.strip() and not line.lstrip().startswith('#'))
+    # Keep the given order, drop duplicates
+    seen = set()
+    unique = []
+    for repo in repos:
+        repo = os.path.abspath(repo)
+        if repo not in seen:
+            seen.add(repo)
+            unique.append(repo)
+    return unique
+
+
+def scan_repo(repo, mode, exclude=None, sniff_workers=None, max_file_bytes=DEFAULT_MAX_FILE_BYTES,
+              workspaces=False, budget=None, targets=None, use_git_index=False):
+    """
+    Runs in a worker process: detect the repo's keys and time the scan. With
+    a ScanBudget the scan stops once every key in targets is found (catalog
+    mode) or every detectable targets key is (cursor-directory mode). With
+    use_git_index only the files tracked in the repo's git index are scanned.
+    """
+    start = time.perf_counter()
+    result = {'repo': repo, 'codebase_dir': None, 'keys': [], 'workspaces': None, 'skipped': {}, 'budget': None,
+              'error': None}
+    skipped = Counter()
+    try:
+        if not os.path.isdir(repo):
+            raise FileNotFoundError(f"not a directory: {repo}")
+        if workspaces:
+            # Every workspace of a monorepo, from the repository root
+            codebase_dir = repo
+            if mode == 'catalog':
+                workspace_keys = scan_workspace_tech(repo, exclude=exclude, sniff_workers=sniff_workers,
+                                                     max_file_bytes=max_file_bytes, skipped=skipped)
+            else:
+                workspace_keys = scan_workspace_keys(repo, generate_windsurfrules.KEYS, exclude=exclude)
+            result['workspaces'] = {name: sorted(ws_keys) for name, ws_keys in workspace_keys.items()}
+            keys = set().union(*workspace_keys.values())
+        elif mode == 'catalog':
+            codebase_dir = catalog_gen.find_codebase_dir(repo)
+            keys = catalog_gen.scan_for_languages_and_tech(codebase_dir, sniff_workers=sniff_workers, exclude=exclude,
+                                                           max_file_bytes=max_file_bytes, skipped=skipped,
+                                                           budget=budget, targets=targets,
+                                                           source=open_file_source(codebase_dir, use_git_index))
+        else:
+            codebase_dir = generate_windsurfrules.find_codebase_dir(repo)
+            keys = generate_windsurfrules.scan_for_keys_canonical(
+                codebase_dir, targets if targets is not None else generate_windsurfrules.KEYS, exclude=exclude,
+                budget=budget, source=open_file_source(codebase_dir, use_git_index))
+        if budget is not None and not workspaces:
+            result['budget'] = budget.report()
+        result['codebase_dir'] = codebase_dir
+        result['keys'] = sorted(keys)
+        result['skipped'] = dict(skipped)
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+    result['scan_s'] = time.perf_counter() - start
+    return result
+
+
+class CatalogRules:
+    """Converted catalog rules per key, each downloaded and converted once for the whole batch."""
+
+    def __init__(self, available_rules_map, policy, session, fetch, bulk=False, workers=DEFAULT_FETCH_WORKERS):
+        self.available_rules_map = available_rules_map
+        self.policy = policy
+        self.session = session
+        self.fetch = fetch
+        self.bulk = bulk
+        self.workers = workers
+        self.converted = {}
+        self.failed = set()
+
+    def rule_info(self, key):
+        name = self.policy.catalog_rule(key)
+        if name is not None:
+            return self.available_rules_map.get(name)
+        return catalog_gen.find_rule_for_tech(self.available_rules_map, key)
+
+    def prefetch(self, keys):
+        """Download and convert the rules for keys that are not known yet, concurrently."""
+        missing = {}
+        for key in keys:
+            info = self.rule_info(key)
+            if info is not None and info['name'] not in self.converted and info['name'] not in self.failed:
+                missing[info['name']] = info
+        if not missing:
+            return
+        if self.bulk:
+            results = ((info, read_catalog_file(info), None) for info in missing.values())
+        else:
+            results = fetch_many(self.session, list(missing.values()), lambda info: info['download_url'],
+                                 workers=self.workers, fetch=self.fetch)
+        for info, text, error in results:
+            if error is not None:
+                print(f"Error fetching {info['name']}: {error}")
+                self.failed.add(info['name'])
+                continue
+            try:
+                self.converted[info['name']] = convert_rule(text)
+            except Exception as e:
+                print(f"Error converting {info['name']}: {e}")
+                self.failed.add(info['name'])
+
+    def rule_for(self, key):
+        info = self.rule_info(key)
+        return self.converted.get(info['name']) if info is not None else None
+
+
+class CursorDirectoryRules:
+    """cursor.directory rules per key, chosen by the policy instead of prompts and fetched once."""
+
+    def __init__(self, policy, session, fetch):
+        self.policy = policy
+        self.session = session
+        self.fetch = fetch
+        self.rules = {}
+
+    def _candidates(self, key):
+        rule_links, rule_blocks = generate_windsurfrules.list_rule_sources(key, self.session, self.fetch)
+        for rule_url in rule_links:
+            try:
+                yield self.fetch(self.session, rule_url, timeout=10).strip()
+            except Exception as e:
+                print(f"Failed to fetch rule file for {key}: {e}")
+        yield from rule_blocks
+
+    def rules_for(self, key):
+        if key in self.rules:
+            return self.rules[key]
+        choice = self.policy.rule_choice(key)
+        rules = []
+        try:
+            for position, rule in enumerate(self._candidates(key), 1):
+                if choice == 'all' or choice == 'first' or choice == position:
+                    rules.append(rule)
+                    if choice != 'all':
+                        break
+        except Exception as e:
+            print(f"Failed to fetch rule for {key}: {e}")
+        self.rules[key] = rules
+        return rules
+
+
+def write_catalog_rules(repo, keys, rules, workspace_keys=None):
+    """
+    Write <repo>/.windsurf/rules/<key>.md for each key with a rule; returns
+    (written, unchanged) paths. With workspace_keys ({workspace: keys}), keys
+    not found in the repository root get one glob-scoped rule per workspace.
+    """
+    target_dir = os.path.join(repo, '.windsurf', 'rules')
+    targets = workspace_rule_targets(workspace_keys) if workspace_keys else {}
+    written, unchanged = [], []
+    for key in keys:
+        text = rules.rule_for(key)
+        if text is None:
+            continue
+        os.makedirs(target_dir, exist_ok=True)
+        for workspace in targets.get(key, [ROOT]):
+            scoped_text = scoped_rule(text, workspace)
+            path = os.path.join(target_dir, scoped_rule_name(key, workspace))
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    if f.read() == scoped_text:
+                        unchanged.append(path)
+                        continue
+            except OSError:
+                pass
+            write_text_atomic(path, scoped_text)
+            written.append(path)
+    return written, unchanged
+
+
+def write_cursor_directory_rules(repo, keys, rules, iscursor=False):
+    """Stream the chosen rules into <repo>/.windsurfrules; returns (written, unchanged) paths."""
+    path = os.path.join(repo, '.cursorrules' if iscursor else '.windsurfrules')
+    with StreamingRulesWriter(path) as writer:
+        for key in keys:
+            for rule_content in rules.rules_for(key):
+                writer.add(f"# {key}\n{rule_content}")
+        if not writer.count:
+            return [], []
+        return ([path], []) if writer.commit() else ([], [path])
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def summarize(records, wall_s):
+    scan_times = [r['scan_s'] for r in records]
+    key_counts = Counter(key for r in records for key in r['accepted'])
+    skipped = Counter()
+    for r in records:
+        skipped.update(r.get('skipped', {}))
+    summary = {
+        'repos': len(records),
+        'ok': sum(1 for r in records if r['status'] == 'ok'),
+        'no_rules': sum(1 for r in records if r['status'] == 'no-rules'),
+        'errors': sum(1 for r in records if r['status'] == 'error'),
+        'files_written': sum(len(r['written']) for r in records),
+        'files_unchanged': sum(len(r['unchanged']) for r in records),
+        'wall_s': wall_s,
+        'repos_per_s': len(records) / wall_s if wall_s > 0 else None,
+        'accepted_keys': dict(key_counts.most_common()),
+        'files_skipped': dict(skipped),
+        # Budgeted scans only: why each scan ended ('complete' when the whole tree was seen)
+        'scan_stops': dict(Counter(r['budget']['stop_reason'] or 'complete' for r in records if r.get('budget'))),
+    }
+    if scan_times:
+        summary.update({
+            'scan_s_total': sum(scan_times),
+            'scan_s_median': statistics.median(scan_times),
+            'scan_s_p95': _percentile(scan_times, 0.95),
+            'scan_s_max': max(scan_times),
+        })
+    return summary
+
+
+def print_report(records, summary, slowest=10):
+    print("\n--- Batch Summary ---")
+    print(f"Repositories: {summary['repos']} ({summary['ok']} ok, {summary['no_rules']} without rules, "
+          f"{summary['errors']} failed) in {summary['wall_s']:.1f}s")
+    print(f"Files: {summary['files_written']} written, {summary['files_unchanged']} unchanged")
+    if 'scan_s_median' in summary:
+        print(f"Scan time per repo: median {summary['scan_s_median']:.2f}s, p95 {summary['scan_s_p95']:.2f}s, "
+              f"max {summary['scan_s_max']:.2f}s")
+    if summary['files_skipped']:
+        print(f"Matched by name only (not read): {format_skips(summary['files_skipped'])} files")
+    if summary['scan_stops']:
+        print("Budgeted scans: " + ', '.join(f"{reason} {n}" for reason, n in sorted(summary['scan_stops'].items())))
+    if summary['accepted_keys']:
+        print("Accepted keys: " + ', '.join(f"{k} ({n})" for k, n in summary['accepted_keys'].items()))
+    print("Slowest repositories:")
+    for r in sorted(records, key=lambda r: r['scan_s'] + r['write_s'], reverse=True)[:slowest]:
+        print(f"  {r['scan_s']:7.2f}s scan {r['write_s']:6.2f}s write  {r['repo']}")
+    for r in records:
+        if r['status'] == 'error':
+            print(f"Error: {r['repo']}: {r['error']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate rules for many repositories without prompts.")
+    parser.add_argument('repos', nargs='*', help='Repository paths')
+    parser.add_argument('--repos-file', help='File with one repository path per line (# comments allowed)')
+    parser.add_argument('--policy', required=True, help='YAML/JSON policy of accepted keys and rule choices')
+    parser.add_argument('--mode', choices=MODES, default='catalog',
+                        help='catalog: .windsurf/rules from awesome-cursor-rules-mdc; '
+                             'cursor-directory: .windsurfrules from cursor.directory (default: catalog)')
+    parser.add_argument('--jobs', type=int, default=DEFAULT_JOBS,
+                        help=f'Worker processes scanning repositories (default: {DEFAULT_JOBS})')
+    parser.add_argument('--sniff-workers', type=int, default=None,
+                        help='Snippet reader threads per worker process (default: spread across --jobs)')
+    parser.add_argument('--exclude', action='append', default=[], metavar='GLOB',
+                        help='Gitignore-style pattern to skip while scanning (repeatable)')
+    parser.add_argument('--max-file-mb', type=float, default=DEFAULT_MAX_FILE_BYTES / (1024 * 1024),
+                        help='catalog mode: only match larger files by name instead of reading them')
+    parser.add_argument('--workspaces', action='store_true',
+                        help='Scan every monorepo workspace; catalog mode scopes workspace rules with glob triggers')
+    parser.add_argument('--iscursor', action='store_true', help='cursor-directory mode: write .cursorrules instead')
+    parser.add_argument('--offline', action='store_true', help='Serve rules only from the local HTTP cache')
+    parser.add_argument('--http-cache-max-mb', type=float, default=DEFAULT_MAX_BYTES / (1024 * 1024),
+                        help='Size cap of the local HTTP cache; least recently used entries are evicted '
+                             f'(default: {DEFAULT_MAX_BYTES // (1024 * 1024)})')
+    parser.add_argument('--bulk', action='store_true', help='catalog mode: sync the catalog via git tree + tarball')
+    parser.add_argument('--ref', default=DEFAULT_REF, help=f'Catalog branch or tag for --bulk (default: {DEFAULT_REF})')
+    parser.add_argument('--report', metavar='JSON', help='Write the per-repo and aggregate report here')
+    add_catalog_arguments(parser)
+    add_budget_arguments(parser)
+    add_file_source_arguments(parser)
+    args = parser.parse_args(argv)
+
+    try:
+        policy = RulePolicy.load(args.policy)
+    except (OSError, ValueError, yaml.YAMLError) as e:
+        print(f"Error loading policy: {e}")
+        return 2
+    repos = read_repo_list(args.repos, args.repos_file)
+    if not repos:
+        print("Error: no repositories given.")
+        return 2
+
+    token = os.environ.get('GITHUB_TOKEN')
+    if args.mode == 'catalog' and not token and not args.offline:
+        print("Error: GITHUB_TOKEN environment variable not set.")
+        return 2
+    session = make_session(token if args.mode == 'catalog' else None)
+    fetch = make_cached_fetch(HttpCache(max_bytes=int(args.http_cache_max_mb * 1024 * 1024)), offline=args.offline)
+
+    if args.mode == 'catalog':
+        # The catalog listing is fetched once for every repository
+        print("Fetching list of available rules from GitHub...")
+        catalog_store, catalog_max_age = catalog_from_args(args)
+        with catalog_store:
+            available_rules_map = catalog_gen.fetch_rules_catalog(token, session=session, fetch=fetch,
+                                                                  bulk=args.bulk, ref=args.ref, offline=args.offline,
+                                                                  store=catalog_store, max_age=catalog_max_age)
+        if available_rules_map is None:
+            return 1
+        print(f"Found {len(available_rules_map)} rules available in the GitHub repository.")
+        rules = CatalogRules(available_rules_map, policy, session, fetch, bulk=args.bulk)
+    else:
+        rules = CursorDirectoryRules(policy, session, fetch)
+
+    # Budgeted scans only need to settle the keys the policy can accept
+    budget = None if args.workspaces else budget_from_args(args)
+    targets = None
+    if budget is not None:
+        if args.mode == 'catalog':
+            targets = {tech for tech in catalog_gen.detectable_rule_tech(available_rules_map) if policy.accepts(tech)}
+        else:
+            targets = [key for key in generate_windsurfrules.KEYS if policy.accepts(key)]
+
+    jobs = max(1, min(args.jobs, len(repos)))
+    sniff_workers = args.sniff_workers or max(1, DEFAULT_SNIFF_WORKERS // jobs)
+    print(f"Scanning {len(repos)} repositories with {jobs} worker processes...")
+    records = []
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(scan_repo, repo, args.mode, exclude=args.exclude, sniff_workers=sniff_workers,
+                               max_file_bytes=int(args.max_file_mb * 1024 * 1024), workspaces=args.workspaces,
+                               budget=budget, targets=targets, use_git_index=not args.no_git_index)
+                   for repo in repos]
+        # Outputs are written in this process while the remaining repos are still being scanned
+        for future in as_completed(futures):
+            result = future.result()
+            record = dict(result, accepted=[], written=[], unchanged=[], write_s=0.0)
+            if result['error'] is None:
+                write_start = time.perf_counter()
+                record['accepted'] = [key for key in result['keys'] if policy.accepts(key)]
+                try:
+                    if args.mode == 'catalog':
+                        rules.prefetch(record['accepted'])
+                        record['written'], record['unchanged'] = write_catalog_rules(
+                            result['repo'], record['accepted'], rules, workspace_keys=result['workspaces'])
+                    else:
+                        record['written'], record['unchanged'] = write_cursor_directory_rules(
+                            result['repo'], record['accepted'], rules, iscursor=args.iscursor)
+                except Exception as e:
+                    record['error'] = f"{type(e).__name__}: {e}"
+                record['write_s'] = time.perf_counter() - write_start
+            if record['error'] is not None:
+                record['status'] = 'error'
+            elif record['written'] or record['unchanged']:
+                record['status'] = 'ok'
+            else:
+                record['status'] = 'no-rules'
+            records.append(record)
+            print(f"[{len(records)}/{len(repos)}] {record['repo']}: {record['status']} "
+                  f"({len(record['written'])} written, {record['scan_s']:.2f}s scan)")
+    summary = summarize(records, time.perf_counter() - start)
+    print_report(records, summary)
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump({'summary': summary, 'repos': records}, f, indent=2, sort_keys=True)
+        print(f"Report written to {args.report}")
+    return 1 if summary['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
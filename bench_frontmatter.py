@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark rule conversion: the fast frontmatter path vs. the PyYAML path.
+
+Runs over the mirrored awesome-cursor-rules-mdc catalog (populate it with
+`fetch_and_convert_cursor_rules_to_windsurf.py --bulk`) or any directory of
+.mdc files given on the command line.
+"""
+import argparse
+import os
+import sys
+import time
+
+import yaml
+
+import rule_frontmatter
+from github_catalog import DEFAULT_REF, default_mirror_dir
+from rule_frontmatter import convert_frontmatter_for_windsurf, convert_rule, update_references
+
+
+def convert_rule_yaml(text):
+    # Conversion as it was done before the fast path: line lists, preprocess, safe_load, safe_dump
+    fm, content = rule_frontmatter._parse_frontmatter_yaml(text)
+    new_fm = convert_frontmatter_for_windsurf(fm)
+    return '---\n' + yaml.safe_dump(new_fm, sort_keys=False).strip() + '\n---\n' + update_references(content)
+
+
+def load_rules(rules_dir):
+    texts = []
+    for name in sorted(os.listdir(rules_dir)):
+        if name.endswith('.mdc'):
+            with open(os.path.join(rules_dir, name), 'r', encoding='utf-8') as f:
+                texts.append((name, f.read()))
+    return texts
+
+
+def time_conversion(convert, texts, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _, text in texts:
+            try:
+                convert(text)
+            except yaml.YAMLError:
+                pass
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark frontmatter conversion on the rule catalog.")
+    parser.add_argument('rules_dir', nargs='?',
+                        default=default_mirror_dir('sanjeed5', 'awesome-cursor-rules-mdc', DEFAULT_REF),
+                        help='Directory of .mdc files (default: the --bulk catalog mirror)')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per implementation; the best is reported')
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.rules_dir):
+        print(f"Error: {args.rules_dir} not found; run the fetcher with --bulk first or pass a directory.")
+        sys.exit(1)
+    texts = load_rules(args.rules_dir)
+    if not texts:
+        print(f"Error: no .mdc files in {args.rules_dir}")
+        sys.exit(1)
+
+    fallbacks = 0
+    for _, text in texts:
+        parts = rule_frontmatter._split(text)
+        if parts is None:
+            continue
+        try:
+            rule_frontmatter._parse_fast(parts[0])
+        except rule_frontmatter._Unsupported:
+            fallbacks += 1
+
+    yaml_time = time_conversion(convert_rule_yaml, texts, args.repeat)
+    fast_time = time_conversion(convert_rule, texts, args.repeat)
+    print(f"Rules:          {len(texts)} ({fallbacks} needed the YAML fallback)")
+    print(f"PyYAML path:    {yaml_time * 1000:.1f} ms ({yaml_time / len(texts) * 1e6:.0f} us/rule)")
+    print(f"Fast path:      {fast_time * 1000:.1f} ms ({fast_time / len(texts) * 1e6:.0f} us/rule)")
+    print(f"Speedup:        {yaml_time / fast_time:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Benchmark the codebase scanners on seeded synthetic repositories.
+
+generate_synthetic_repo() builds a reproducible tree of the requested shape
+(file count, depth, language mix, vendored node_modules, large binaries).
+Each scanner then runs in a fresh process, so its peak RSS is its own:
+
+    scan_codebase, find_codebase_dir     (generate_windsurfrules.py)
+    scan_for_keys_canonical              (generate_windsurfrules.py)
+    scan_for_languages_and_tech          (generate_windsurfrules_from_cursor_rules_list.py)
+
+Wall time (best of --repeat runs), files/sec and peak RSS are written to a
+JSON file; pass --compare with an earlier result file to see regressions.
+Generated repos are reused while their shape is unchanged (see SHAPE_FILE).
+"""
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+SHAPE_FILE = '.bench_shape.json'
+TARGETS = ['scan_codebase', 'find_codebase_dir', 'scan_for_keys_canonical', 'scan_for_languages_and_tech']
+# find_codebase_dir only probes the root and its children, so files/sec means nothing for it
+WALKING_TARGETS = {'scan_codebase', 'scan_for_keys_canonical', 'scan_for_languages_and_tech'}
+# A slowdown is flagged when it is both relatively and absolutely significant
+REGRESSION_RATIO = 1.10
+REGRESSION_MIN_SECONDS = 0.005
+DEFAULT_MIX = {'py': 4, 'ts': 3, 'tsx': 2, 'js': 2, 'java': 2, 'go': 1, 'rs': 1, 'css': 1, 'html': 1, 'md': 1}
+PRESETS = {'1k': 1000, '10k': 10000, '100k': 100000, '1m': 1000000}
+
+# (header, repeated body line) per extension; headers carry the markers the detectors look for
+SOURCE_TEMPLATES = {
+    'py': ('#!/usr/bin/env python3\nimport os\nfrom flask import Flask\n\n', '    value = os.path.join("a", "b")  # noqa\n'),
+    'ts': ('import { z } from "zod";\nimport express from "express";\n\n', 'export const item = z.string().min(1);\n'),
+    'tsx': ('import React from "react";\n\n', 'export const View = () => <div className="row">{1}</div>;\n'),
+    'js': ('const next = require("next");\n\n', 'module.exports.handler = (req, res) => res.send(req.url);\n'),
+    'java': ('package com.example;\nimport org.springframework.boot.SpringApplication;\n\n',
+             '    private final String name = "value";\n'),
+    'go': ('package main\n\nimport "github.com/gin-gonic/gin"\n\n', 'func handler(c *gin.Context) { c.JSON(200, nil) }\n'),
+    'rs': ('use tokio::runtime::Runtime;\n\n', 'fn compute(x: u64) -> u64 { x * 2 }\n'),
+    'css': ('@tailwind base;\n\n', '.row { display: flex; margin: 0 auto; }\n'),
+    'html': ('<!DOCTYPE html>\n<html>\n', '  <div class="row"><span>text</span></div>\n'),
+    'md': ('# Notes\n\n', 'Some documentation text for the synthetic project.\n'),
+}
+ROOT_FILES = {
+    'package.json': json.dumps({'name': 'synthetic', 'dependencies': {'next': '^14.0.0', 'react': '^18.0.0',
+                                'zod': '^3.0.0'}, 'devDependencies': {'typescript': '^5.0.0'}}, indent=2) + '\n',
+    'requirements.txt': 'flask\nrequests\n',
+    'tsconfig.json': '{"compilerOptions": {"strict": true}}\n',
+    'go.mod': 'module example.com/synthetic\n\ngo 1.21\n',
+    '.gitignore': 'dist/\n*.log\n',
+}
+BINARY_EXTS = ['.png', '.zip', '.bin', '.so']
+
+
+def parse_mix(text):
+    """'py=3,ts=2' -> {'py': 3, 'ts': 2}"""
+    mix = {}
+    for part in text.split(','):
+        ext, _, weight = part.partition('=')
+        ext = ext.strip().lstrip('.')
+        if ext not in SOURCE_TEMPLATES:
+            raise argparse.ArgumentTypeError(f"Unknown extension in --mix: {ext} (known: {', '.join(sorted(SOURCE_TEMPLATES))})")
+        mix[ext] = float(weight or 1)
+    return mix
+
+
+def make_shape(files=1000, depth=4, files_per_dir=20, mix=None, node_modules=0, binaries=0, binary_size_mb=1.0,
+               min_lines=5, max_lines=200, seed=0):
+    return {
+        'files': files, 'depth': depth, 'files_per_dir': files_per_dir, 'mix': dict(mix or DEFAULT_MIX),
+        'node_modules': node_modules, 'binaries': binaries, 'binary_size_mb': binary_size_mb,
+        'min_lines': min_lines, 'max_lines': max_lines, 'seed': seed,
+    }
+
+
+def default_repo_dir(shape):
+    digest = hashlib.sha1(json.dumps(shape, sort_keys=True).encode('utf-8')).hexdigest()[:10]
+    return os.path.join(tempfile.gettempdir(), f"rulesmaker-bench-{shape['files']}f-{digest}")
+
+
+def _write(path, data):
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def generate_synthetic_repo(root, shape):
+    """Create the repository described by shape under root; returns the number of files written."""
+    rng = random.Random(shape['seed'])
+    os.makedirs(root, exist_ok=True)
+    count = 0
+    for name, text in ROOT_FILES.items():
+        _write(os.path.join(root, name), text.encode('utf-8'))
+        count += 1
+
+    # Directory tree: every new dir hangs off a random existing dir that is not at max depth
+    n_dirs = max(1, shape['files'] // max(1, shape['files_per_dir']))
+    dirs = [('src', 1)]
+    for i in range(1, n_dirs):
+        parents = [d for d in dirs[-64:] if d[1] < shape['depth']] or [('src', 1)]
+        parent, level = rng.choice(parents)
+        dirs.append((os.path.join(parent, rng.choice(['pkg', 'lib', 'core', 'api', 'util', 'test']) + str(i)),
+                     level + 1))
+    for rel_dir, _ in dirs:
+        os.makedirs(os.path.join(root, rel_dir), exist_ok=True)
+
+    exts = sorted(shape['mix'])
+    weights = [shape['mix'][e] for e in exts]
+    contents = {}
+    for i in range(shape['files']):
+        ext = rng.choices(exts, weights)[0]
+        n_lines = rng.randint(shape['min_lines'], shape['max_lines'])
+        key = (ext, n_lines)
+        if key not in contents:
+            header, body = SOURCE_TEMPLATES[ext]
+            contents[key] = (header + body * n_lines).encode('utf-8')
+        rel_dir = dirs[rng.randrange(len(dirs))][0]
+        _write(os.path.join(root, rel_dir, f"file{i}.{ext}"), contents[key])
+        count += 1
+
+    # Vendored dependencies: pruned by the walkers, but present on disk
+    for i in range(shape['node_modules']):
+        pkg_dir = os.path.join(root, 'node_modules', f"pkg{i // 10}")
+        os.makedirs(pkg_dir, exist_ok=True)
+        _write(os.path.join(pkg_dir, f"mod{i}.js"), SOURCE_TEMPLATES['js'][1].encode('utf-8') * 20)
+        count += 1
+
+    if shape['binaries']:
+        assets = os.path.join(root, 'assets')
+        os.makedirs(assets, exist_ok=True)
+        chunk = bytes(rng.getrandbits(8) for _ in range(1024 * 1024))
+        size = int(shape['binary_size_mb'] * 1024 * 1024)
+        for i in range(shape['binaries']):
+            with open(os.path.join(assets, f"blob{i}{BINARY_EXTS[i % len(BINARY_EXTS)]}"), 'wb') as f:
+                for offset in range(0, size, len(chunk)):
+                    f.write(chunk[:size - offset])
+            count += 1
+
+    with open(os.path.join(root, SHAPE_FILE), 'w', encoding='utf-8') as f:
+        json.dump({'shape': shape, 'file_count': count}, f, sort_keys=True)
+    return count
+
+
+def ensure_synthetic_repo(root, shape):
+    """Reuse root if it was generated with the same shape, otherwise (re)generate it."""
+    try:
+        with open(os.path.join(root, SHAPE_FILE), 'r', encoding='utf-8') as f:
+            stamp = json.load(f)
+        if stamp.get('shape') == json.loads(json.dumps(shape)):
+            return stamp['file_count']
+    except (OSError, ValueError):
+        pass
+    if os.path.exists(root) and os.listdir(root):
+        raise RuntimeError(f"{root} exists and was not generated with this shape; pick an empty directory")
+    return generate_synthetic_repo(root, shape)
+
+
+def peak_rss_bytes():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _run_target(target, repo_dir, repeat):
+    # Runs in a fresh process; scanner output is swallowed so timings aren't dominated by the terminal
+    import generate_windsurfrules
+    import generate_windsurfrules_from_cursor_rules_list
+    funcs = {
+        'scan_codebase': lambda: generate_windsurfrules.scan_codebase(repo_dir),
+        'find_codebase_dir': lambda: generate_windsurfrules.find_codebase_dir(repo_dir),
+        'scan_for_keys_canonical': lambda: generate_windsurfrules.scan_for_keys_canonical(
+            repo_dir, generate_windsurfrules.KEYS),
+        'scan_for_languages_and_tech': lambda: generate_windsurfrules_from_cursor_rules_list.scan_for_languages_and_tech(
+            repo_dir),
+    }
+    baseline_rss = peak_rss_bytes()
+    runs = []
+    result = None
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = funcs[target]()
+            runs.append(time.perf_counter() - start)
+    if isinstance(result, (set, list)):
+        summary = sorted(result)
+    elif isinstance(result, dict):
+        summary = dict(sorted(result.items()))
+    else:
+        summary = result
+    return {'runs': runs, 'baseline_rss_bytes': baseline_rss, 'peak_rss_bytes': peak_rss_bytes(), 'result': summary}
+
+
+def run_benchmarks(repo_dir, file_count, targets=None, repeat=3):
+    results = {}
+    context = multiprocessing.get_context('spawn')
+    for target in targets or TARGETS:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            measured = pool.submit(_run_target, target, os.path.abspath(repo_dir), repeat).result()
+        wall = min(measured['runs'])
+        measured['wall_s'] = wall
+        measured['files_per_s'] = file_count / wall if wall > 0 and target in WALKING_TARGETS else None
+        results[target] = measured
+    return results
+
+
+def compare(results, previous):
+    """Print wall time ratios against an earlier result file."""
+    for target, measured in results.items():
+        before = previous.get('results', {}).get(target)
+        if not before:
+            continue
+        ratio = measured['wall_s'] / before['wall_s'] if before['wall_s'] else float('inf')
+        slower = measured['wall_s'] - before['wall_s'] > REGRESSION_MIN_SECONDS
+        flag = '  REGRESSION' if ratio > REGRESSION_RATIO and slower else ''
+        print(f"  {target:30s} {before['wall_s']:.3f}s -> {measured['wall_s']:.3f}s ({ratio:.2f}x){flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the codebase scanners on a synthetic repository.")
+    parser.add_argument('--preset', choices=sorted(PRESETS), help='File count preset (overrides --files)')
+    parser.add_argument('--files', type=int, default=1000, help='Number of source files (default: 1000)')
+    parser.add_argument('--depth', type=int, default=4, help='Maximum directory depth (default: 4)')
+    parser.add_argument('--files-per-dir', type=int, default=20, help='Average files per directory (default: 20)')
+    parser.add_argument('--mix', type=parse_mix, default=None,
+                        help='Language mix as ext=weight pairs, e.g. py=3,ts=2 (default: a polyglot web stack)')
+    parser.add_argument('--node-modules', type=int, default=0, help='Files to vendor under node_modules/')
+    parser.add_argument('--binaries', type=int, default=0, help='Large binary files to add under assets/')
+    parser.add_argument('--binary-size-mb', type=float, default=1.0, help='Size of each binary file (default: 1)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed for the generator (default: 0)')
+    parser.add_argument('--repo-dir', default=None,
+                        help='Where to generate/reuse the synthetic repo (default: a per-shape dir in the temp dir)')
+    parser.add_argument('--target', action='append', choices=TARGETS, help='Benchmark only these functions')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per function; the best is reported (default: 3)')
+    parser.add_argument('--output', default='bench_results.json', help='JSON results file (default: bench_results.json)')
+    parser.add_argument('--compare', default=None, metavar='JSON', help='Earlier results file to compare against')
+    args = parser.parse_args()
+
+    files = PRESETS[args.preset] if args.preset else args.files
+    shape = make_shape(files=files, depth=args.depth, files_per_dir=args.files_per_dir, mix=args.mix,
+                       node_modules=args.node_modules, binaries=args.binaries,
+                       binary_size_mb=args.binary_size_mb, seed=args.seed)
+    repo_dir = args.repo_dir or default_repo_dir(shape)
+    start = time.perf_counter()
+    file_count = ensure_synthetic_repo(repo_dir, shape)
+    print(f"Synthetic repo: {repo_dir} ({file_count} files, ready in {time.perf_counter() - start:.1f}s)")
+
+    results = run_benchmarks(repo_dir, file_count, targets=args.target, repeat=args.repeat)
+    for target, measured in results.items():
+        rss = measured['peak_rss_bytes']
+        rss_text = f"{rss / (1024 * 1024):.0f} MB peak RSS" if rss is not None else "peak RSS n/a"
+        rate = measured['files_per_s']
+        rate_text = f"{rate:,.0f} files/s" if rate is not None else "-"
+        print(f"  {target:30s} {measured['wall_s']:.3f}s  {rate_text:>16s}  {rss_text}")
+
+    report = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'shape': shape,
+        'file_count': file_count,
+        'repeat': args.repeat,
+        'results': results,
+    }
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+        if previous.get('shape') != report['shape']:
+            print("Warning: comparing against results for a different repository shape")
+        print(f"Compared with {args.compare}:")
+        compare(results, previous)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,262 @@
+"""
+Shared directory walker for the codebase scanners.
+
+walk_codebase() is a drop-in replacement for os.walk() that prunes the `dirs`
+list in place, so skipped trees (VCS metadata, node_modules, virtualenvs, and
+anything matched by .gitignore/.ignore files or user exclude globs) are never
+descended into or stat'ed.
+"""
+import os
+import re
+from collections import deque
+
+# Directory names that are never scanned (exact name match, not substring)
+DEFAULT_SKIP_DIRS = frozenset({'.git', '.hg', '.svn', 'node_modules', 'venv', '.venv', '__pycache__'})
+IGNORE_FILES = ('.gitignore', '.ignore')
+
+
+def _glob_to_regex(pattern):
+    i, n, out = 0, len(pattern), []
+    while i < n:
+        c = pattern[i]
+        if c == '*':
+            if pattern.startswith('**/', i):
+                out.append('(?:.*/)?')
+                i += 3
+                continue
+            if pattern.startswith('**', i):
+                out.append('.*')
+                i += 2
+                continue
+            out.append('[^/]*')
+        elif c == '?':
+            out.append('[^/]')
+        elif c == '[':
+            j = pattern.find(']', i + 1)
+            if j == -1:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1:j]
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                out.append('[' + body.replace('\\', '\\\\') + ']')
+                i = j
+        elif c == '\\' and i + 1 < n:
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return ''.join(out)
+
+
+class IgnoreRule:
+    """A single gitignore-style pattern, matched against '/'-separated relative paths."""
+
+    def __init__(self, pattern):
+        self.negate = pattern.startswith('!')
+        if self.negate:
+            pattern = pattern[1:]
+        elif pattern.startswith('\\!') or pattern.startswith('\\#'):
+            pattern = pattern[1:]
+        self.dir_only = pattern.endswith('/')
+        pattern = pattern.rstrip('/')
+        anchored = '/' in pattern
+        pattern = pattern.lstrip('/')
+        prefix = '' if anchored else '(?:.*/)?'
+        self.regex = re.compile(prefix + _glob_to_regex(pattern) + r'\Z')
+
+    def matches(self, rel_path, is_dir):
+        if self.dir_only and not is_dir:
+            return False
+        return self.regex.match(rel_path) is not None
+
+
+def parse_ignore_lines(lines):
+    rules = []
+    for line in lines:
+        line = line.rstrip('\n').rstrip('\r')
+        if not line.endswith('\\ '):
+            line = line.rstrip()
+        if not line or line.startswith('#'):
+            continue
+        rules.append(IgnoreRule(line))
+    return rules
+
+
+def load_ignore_file(path):
+    try:
+        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+            return parse_ignore_lines(f)
+    except OSError as e:
+        print(f"Warning: Could not read {path}: {e}")
+        return []
+
+
+def is_ignored(levels, rel_path, is_dir):
+    """
+    Evaluate rel_path against ignore levels, outermost first.
+
+    Each level is (prefix, rules) where prefix is the '/'-terminated directory
+    (relative to the walk root) that the rules are relative to. As in git, the
+    last matching rule wins and deeper files override their parents.
+    """
+    ignored = False
+    for prefix, rules in levels:
+        if prefix and not rel_path.startswith(prefix):
+            continue
+        sub_path = rel_path[len(prefix):]
+        for rule in rules:
+            if rule.matches(sub_path, is_dir):
+                ignored = not rule.negate
+    return ignored
+
+
+def walk_breadth_first(top, followlinks=False):
+    """
+    os.walk(top) in breadth-first order: all of a level's directories before
+    any of their subdirectories. Pruning `dirs` in place works as with os.walk.
+    """
+    pending = deque([top])
+    while pending:
+        root = pending.popleft()
+        dirs, files, links = [], [], set()
+        try:
+            with os.scandir(root) as entries:
+                for entry in entries:
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+                    if is_dir:
+                        dirs.append(entry.name)
+                        if entry.is_symlink():
+                            links.add(entry.name)
+                    else:
+                        files.append(entry.name)
+        except OSError:
+            continue
+        yield root, dirs, files
+        for d in dirs:
+            # Like os.walk, symlinked directories are listed but only entered with followlinks
+            if followlinks or d not in links:
+                pending.append(os.path.join(root, d))
+
+
+def walk_codebase(base_dir, exclude=None, skip_dirs=DEFAULT_SKIP_DIRS, use_ignore_files=True,
+                  follow_symlinks=False, on_prune=None, breadth_first=False):
+    """
+    Walk base_dir like os.walk(), yielding (root, dirs, files).
+
+    - skip_dirs: directory names that are always pruned.
+    - exclude: extra gitignore-style globs relative to base_dir (e.g. 'dist/', '*.min.js').
+    - use_ignore_files: apply .gitignore/.ignore files found at every level.
+    - follow_symlinks: descend into symlinked directories; visited (device, inode)
+      pairs are tracked so symlink loops are walked at most once.
+    - on_prune: optional callback receiving the name of every pruned directory,
+      for callers that still want to know a directory exists (e.g. node_modules).
+    - breadth_first: visit shallow directories first (root manifests and
+      top-level files before deep trees), for scans that may stop early.
+    """
+    base_levels = [('', parse_ignore_lines(exclude))] if exclude else []
+    levels_for = {}
+    visited = set()
+    if follow_symlinks:
+        try:
+            st = os.stat(base_dir)
+            visited.add((st.st_dev, st.st_ino))
+        except OSError:
+            pass
+    walk = walk_breadth_first if breadth_first else os.walk
+    for root, dirs, files in walk(base_dir, followlinks=follow_symlinks):
+        rel_root = os.path.relpath(root, base_dir)
+        rel_prefix = '' if rel_root == '.' else rel_root.replace(os.sep, '/') + '/'
+        levels = levels_for.pop(root, base_levels)
+        if use_ignore_files:
+            for ignore_name in IGNORE_FILES:
+                if ignore_name in files:
+                    rules = load_ignore_file(os.path.join(root, ignore_name))
+                    if rules:
+                        levels = levels + [(rel_prefix, rules)]
+        kept_dirs = []
+        for d in dirs:
+            if d in skip_dirs or (levels and is_ignored(levels, rel_prefix + d, True)):
+                if on_prune:
+                    on_prune(d)
+                continue
+            if follow_symlinks:
+                try:
+                    st = os.stat(os.path.join(root, d))
+                except OSError:
+                    continue
+                key = (st.st_dev, st.st_ino)
+                if key in visited:
+                    continue
+                visited.add(key)
+            kept_dirs.append(d)
+        dirs[:] = kept_dirs
+        for d in dirs:
+            levels_for[os.path.join(root, d)] = levels
+        if levels:
+            files = [f for f in files if not is_ignored(levels, rel_prefix + f, False)]
+        yield root, dirs, files
+
+
+def iter_codebase_files(base_dir, **walk_options):
+    """Yield the full path of every file walk_codebase() keeps."""
+    for root, _, files in walk_codebase(base_dir, **walk_options):
+        for fname in files:
+            yield os.path.join(root, fname)
+
+
+class PathFilter:
+    """
+    Answers "would walk_codebase() skip this path?" for single paths, e.g. ones
+    reported by a file watcher, using the same skip dirs, exclude globs and
+    per-level .gitignore/.ignore files. Levels are cached per directory; call
+    clear() after an ignore file changes.
+    """
+
+    def __init__(self, base_dir, exclude=None, skip_dirs=DEFAULT_SKIP_DIRS, use_ignore_files=True):
+        self.base_dir = os.path.abspath(base_dir)
+        self.exclude = exclude
+        self.skip_dirs = skip_dirs
+        self.use_ignore_files = use_ignore_files
+        self.clear()
+
+    def clear(self):
+        self._base_levels = [('', parse_ignore_lines(self.exclude))] if self.exclude else []
+        self._levels = {}
+
+    def _levels_for(self, rel_dir):
+        # Levels in effect for entries of rel_dir ('' or '/'-separated, no trailing slash)
+        levels = self._levels.get(rel_dir)
+        if levels is not None:
+            return levels
+        levels = self._levels_for(rel_dir.rpartition('/')[0]) if rel_dir else self._base_levels
+        if self.use_ignore_files:
+            dir_path = os.path.join(self.base_dir, *rel_dir.split('/')) if rel_dir else self.base_dir
+            for ignore_name in IGNORE_FILES:
+                ignore_path = os.path.join(dir_path, ignore_name)
+                if os.path.isfile(ignore_path):
+                    rules = load_ignore_file(ignore_path)
+                    if rules:
+                        levels = levels + [(rel_dir + '/' if rel_dir else '', rules)]
+        self._levels[rel_dir] = levels
+        return levels
+
+    def is_skipped(self, path, is_dir):
+        rel_path = os.path.relpath(os.path.abspath(path), self.base_dir).replace(os.sep, '/')
+        if rel_path == '.':
+            return False
+        if rel_path == '..' or rel_path.startswith('../'):
+            return True
+        parts = rel_path.split('/')
+        for i, name in enumerate(parts):
+            entry_is_dir = is_dir or i < len(parts) - 1
+            if entry_is_dir and name in self.skip_dirs:
+                return True
+            levels = self._levels_for('/'.join(parts[:i]))
+            if levels and is_ignored(levels, '/'.join(parts[:i + 1]), entry_is_dir):
+                return True
+        return False
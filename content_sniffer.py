@@ -0,0 +1,173 @@
+"""
+Concurrent head/tail sniffing of files.
+
+Opening a file and seeking to its tail is latency-bound on network and overlay
+filesystems, so the paths produced by a walker thread are handed to a bounded
+pool of worker threads that return raw byte snippets. Decoding the snippets
+into lines (snippet_lines) reproduces what the old serial text-mode reader
+saw: the first HEAD_LINES lines and the last TAIL_LINES lines of the final
+TAIL_BYTES bytes. The head comes from a single HEAD_BYTES read, so a minified
+file's endless first line no longer pulls the whole file in.
+
+sniff_snippet() classifies the file first (see file_classifier) and returns no
+snippet for binaries and oversized files.
+"""
+import io
+import os
+import queue
+import threading
+
+from file_classifier import (BINARY, DEFAULT_MAX_FILE_BYTES, OVERSIZED, PROBE_BYTES, TEXT, UNREADABLE,
+                             is_binary_block, is_binary_name, is_oversized)
+
+HEAD_LINES = 5
+TAIL_LINES = 5
+TAIL_BYTES = 200
+HEAD_BYTES = PROBE_BYTES
+DEFAULT_SNIFF_WORKERS = min(32, (os.cpu_count() or 1) + 4)
+
+_DONE = object()
+
+
+class _Failed:
+    # An exception raised on the walker or a worker thread, re-raised by the consumer
+    __slots__ = ('error',)
+
+    def __init__(self, error):
+        self.error = error
+
+
+def _read_head_tail(f):
+    # (first block, head lines bytes, tail bytes); small files need a single read
+    block = f.read(HEAD_BYTES)
+    block_reader = io.BytesIO(block)
+    head = b''.join(block_reader.readline() for _ in range(HEAD_LINES))
+    if len(block) < HEAD_BYTES:
+        tail = block[-TAIL_BYTES:]
+    else:
+        size = f.seek(0, os.SEEK_END)
+        f.seek(max(size - TAIL_BYTES, 0))
+        tail = f.read()
+    return block, head, tail
+
+
+def read_snippet(path):
+    """Return (head_bytes, tail_bytes) for path, or None if it can't be read."""
+    try:
+        with open(path, 'rb') as f:
+            _, head, tail = _read_head_tail(f)
+        return head, tail
+    except Exception:
+        return None
+
+
+def sniff_snippet(path, max_bytes=DEFAULT_MAX_FILE_BYTES):
+    """
+    Return (kind, snippet): snippet is (head_bytes, tail_bytes) when kind is
+    TEXT, else None. Binary extensions are skipped without opening the file,
+    files over max_bytes after a stat, and other binaries by a NUL byte in the
+    first block.
+    """
+    if is_binary_name(path):
+        return BINARY, None
+    try:
+        with open(path, 'rb') as f:
+            if is_oversized(os.fstat(f.fileno()).st_size, max_bytes):
+                return OVERSIZED, None
+            block, head, tail = _read_head_tail(f)
+    except Exception:
+        return UNREADABLE, None
+    if is_binary_block(block):
+        return BINARY, None
+    return TEXT, (head, tail)
+
+
+def _decode_lines(data):
+    return io.TextIOWrapper(io.BytesIO(data), encoding='utf-8', errors='ignore')
+
+
+def snippet_lines(snippet):
+    """Decode a (head_bytes, tail_bytes) snippet into (head_lines, tail_lines)."""
+    head, tail = snippet
+    head_reader = _decode_lines(head)
+    lines = [head_reader.readline() for _ in range(HEAD_LINES)]
+    tail_lines = _decode_lines(tail).readlines()[-TAIL_LINES:] if tail else []
+    return lines, tail_lines
+
+
+def _put(q, item, stop):
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def sniff_paths(paths, workers=None, queue_size=None, reader=read_snippet):
+    """
+    Sniff every path from the iterable concurrently.
+
+    The iterable is consumed on a dedicated walker thread, so a lazy os.walk()
+    generator overlaps with the reads. Yields (path, snippet) pairs as they
+    complete (not in input order); snippet is None for unreadable files.
+    `reader` runs on the worker threads and may be swapped for one that
+    consults a cache before reading. An exception raised by the iterable or
+    by `reader` stops the sniffing and is re-raised here.
+    """
+    workers = workers or DEFAULT_SNIFF_WORKERS
+    if workers <= 1:
+        for path in paths:
+            yield path, reader(path)
+        return
+    queue_size = queue_size or workers * 4
+    path_queue = queue.Queue(maxsize=queue_size)
+    result_queue = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+
+    def walker():
+        try:
+            for path in paths:
+                if not _put(path_queue, path, stop):
+                    return
+        except Exception as e:
+            _put(result_queue, _Failed(e), stop)
+        finally:
+            for _ in range(workers):
+                _put(path_queue, _DONE, stop)
+
+    def worker():
+        try:
+            while not stop.is_set():
+                try:
+                    path = path_queue.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if path is _DONE:
+                    break
+                if not _put(result_queue, (path, reader(path)), stop):
+                    return
+        except Exception as e:
+            _put(result_queue, _Failed(e), stop)
+        finally:
+            _put(result_queue, _DONE, stop)
+
+    threads = [threading.Thread(target=walker, name='sniff-walker', daemon=True)]
+    threads += [threading.Thread(target=worker, name=f'sniff-{i}', daemon=True) for i in range(workers)]
+    for t in threads:
+        t.start()
+    try:
+        finished = 0
+        while finished < workers:
+            item = result_queue.get()
+            if item is _DONE:
+                finished += 1
+                continue
+            if isinstance(item, _Failed):
+                raise item.error
+            yield item
+    finally:
+        stop.set()
+        for t in threads:
+            t.join()
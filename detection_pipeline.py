@@ -0,0 +1,264 @@
+"""
+Streaming detection pipeline: the scanners' logic as composable generator stages.
+
+    source = open_file_source(base_dir)                 # git index or filesystem walk
+    entries = source_entries(source)                    # an Entry per file and directory
+    entries = classify(entries, source=source)          # binary/oversized from name and size
+    entries = sniff(entries)                            # head/tail snippets, on a thread pool
+    entries = detect_tech(entries)                      # langs | frameworks | tools per file
+    for progress in aggregate(entries, [TechSet(base_dir), KeySet(base_dir, KEYS)], every=500):
+        print(progress.files, progress.results)
+
+Every stage takes and yields Entry objects one at a time, so memory is bounded
+by the thread pools' queues whatever the size of the tree, and a consumer sees
+results while the walk is still going. The aggregators fold entries into what
+the scanners return:
+
+- LanguageStats  scan_codebase_stats() (needs measure())
+- KeySet         scan_for_keys_canonical()
+- TechSet        scan_for_languages_and_tech() (needs sniff() and detect_tech())
+
+Several aggregators can share one pass; scan_all() wires up all three.
+"""
+import os
+from collections import Counter, defaultdict
+
+import generate_windsurfrules
+import generate_windsurfrules_from_cursor_rules_list as catalog_gen
+from content_sniffer import sniff_paths, sniff_snippet, snippet_lines
+from detection_table import get_detection_table
+from file_classifier import (BINARY, DEFAULT_MAX_FILE_BYTES, OVERSIZED, SKIP_KINDS, TEXT, UNREADABLE,
+                             is_binary_name, is_oversized)
+from file_inventory import FileInventory
+from file_source import open_file_source
+from manifest_index import ManifestIndex, dependency_frameworks
+
+DEFAULT_PROGRESS_EVERY = 1000
+
+
+class Entry:
+    """A walked file or directory; stages fill in what they learn about it."""
+    __slots__ = ('path', 'name', 'is_dir', 'pruned', 'kind', 'snippet', 'lang', 'lines', 'size', 'tech')
+
+    def __init__(self, path, is_dir=False, pruned=False):
+        self.path = path
+        self.name = os.path.basename(path)
+        self.is_dir = is_dir
+        self.pruned = pruned  # a skipped directory, listed but not walked
+        self.kind = None      # TEXT, or one of SKIP_KINDS once known
+        self.snippet = None   # (head bytes, tail bytes) from sniff()
+        self.lang = None      # EXT_LANG_MAP language, from measure()
+        self.lines = None
+        self.size = None
+        self.tech = None      # set from detect_tech()
+
+    def __repr__(self):
+        return f"Entry({self.path!r}{', dir' if self.is_dir else ''})"
+
+
+class Progress:
+    """A snapshot from aggregate(): files seen so far and each aggregator's result at that point."""
+    __slots__ = ('files', 'path', 'results', 'done')
+
+    def __init__(self, files, path, results, done):
+        self.files = files
+        self.path = path  # the last file seen
+        self.results = results
+        self.done = done
+
+
+# --- Stages ---
+
+def source_entries(source, exclude=None, breadth_first=False):
+    """Entries for every directory (pruned ones too, marked) and file a FileSource lists."""
+    pruned = []
+    for root, dirs, files in source.walk(exclude=exclude, on_prune=pruned.append, breadth_first=breadth_first):
+        for d in pruned:
+            yield Entry(os.path.join(root, d), is_dir=True, pruned=True)
+        pruned.clear()
+        for d in dirs:
+            yield Entry(os.path.join(root, d), is_dir=True)
+        for fname in files:
+            yield Entry(os.path.join(root, fname))
+
+
+def classify(entries, max_file_bytes=DEFAULT_MAX_FILE_BYTES, source=None):
+    """
+    Mark files that will not be read: binary extensions, and with a source,
+    files over max_file_bytes by their fingerprint size (free with the git index).
+    """
+    for entry in entries:
+        if not entry.is_dir and entry.kind is None:
+            if is_binary_name(entry.name):
+                entry.kind = BINARY
+            elif source is not None and max_file_bytes is not None:
+                fingerprint = source.fingerprint(entry.path)
+                if fingerprint is None:
+                    entry.kind = UNREADABLE
+                elif is_oversized(fingerprint[0], max_file_bytes):
+                    entry.kind = OVERSIZED
+        yield entry
+
+
+def _on_workers(entries, read, workers):
+    # Runs read(entry) on a bounded thread pool; entries come back in completion order
+    for entry, _ in sniff_paths(entries, workers=workers, reader=read):
+        yield entry
+
+
+def measure(entries, max_file_bytes=DEFAULT_MAX_FILE_BYTES, workers=None):
+    """Line and byte counts of source files (EXT_LANG_MAP extensions), as scan_codebase_stats() takes them."""
+    def read(entry):
+        if entry.is_dir:
+            return entry
+        lang = generate_windsurfrules.EXT_LANG_MAP.get(os.path.splitext(entry.name)[1].lower())
+        if lang is None:
+            return entry
+        entry.lang = lang
+        if entry.kind in SKIP_KINDS:
+            return entry
+        try:
+            entry.kind, entry.lines, entry.size = generate_windsurfrules.count_lines(entry.path,
+                                                                                  max_bytes=max_file_bytes)
+        except Exception as e:
+            print(f"Warning: Could not read {entry.path}: {e}")
+            entry.kind = UNREADABLE
+        return entry
+    return _on_workers(entries, read, workers)
+
+
+def sniff(entries, max_file_bytes=DEFAULT_MAX_FILE_BYTES, workers=None):
+    """Head/tail snippets of text files; binaries, oversized and unreadable files get their kind instead."""
+    def read(entry):
+        if not entry.is_dir and entry.kind not in SKIP_KINDS:
+            entry.kind, entry.snippet = sniff_snippet(entry.path, max_file_bytes)
+        return entry
+    return _on_workers(entries, read, workers)
+
+
+def detect_tech(entries, table=None):
+    """Languages, frameworks and tools per file: by name, plus shebangs/modelines/markers in its snippet."""
+    table = table or get_detection_table()
+    matcher = table.matcher
+    for entry in entries:
+        if not entry.is_dir:
+            langs, frameworks, tools = catalog_gen.filename_tech(table, entry.name)
+            tech = langs | frameworks | tools
+            if entry.snippet is not None:
+                lines, tail_lines = snippet_lines(entry.snippet)
+                for part in matcher.match_snippet(lines, tail_lines):
+                    tech.update(part)
+            entry.tech = tech
+        yield entry
+
+
+# --- Aggregators: add(entry) for every entry, result() at any time ---
+
+class LanguageStats:
+    """Per-language {'lines', 'bytes', 'files'} like scan_codebase_stats(); skipped counts binaries/oversized."""
+
+    def __init__(self):
+        self.stats = defaultdict(lambda: {'lines': 0, 'bytes': 0, 'files': 0})
+        self.skipped = Counter()
+
+    def add(self, entry):
+        if entry.lang is None or entry.kind == UNREADABLE:
+            return
+        if entry.kind != TEXT:
+            self.skipped[entry.kind] += 1
+            return
+        stats = self.stats[entry.lang]
+        stats['lines'] += entry.lines
+        stats['bytes'] += entry.size
+        stats['files'] += 1
+
+    def result(self):
+        return {lang: dict(stats) for lang, stats in self.stats.items()}
+
+
+class KeySet:
+    """cursor.directory keys like scan_for_keys_canonical(), from the names of the files and dirs seen so far."""
+
+    def __init__(self, codebase_dir, keys, manifests=None):
+        self.codebase_dir = codebase_dir
+        self.keys = list(keys)
+        self.manifests = manifests if manifests is not None else ManifestIndex.load(codebase_dir)
+        self.inventory = FileInventory()
+        self.found = set()
+        self._dirty = True
+
+    def add(self, entry):
+        if entry.is_dir:
+            self.inventory.add_dir(entry.name)
+        else:
+            self.inventory.add_file(entry.name)
+        self._dirty = True
+
+    def result(self):
+        if self._dirty:
+            # Keys only appear as files do, so found keys are not checked again
+            pending = [k for k in self.keys if k not in self.found]
+            self.found |= generate_windsurfrules.detect_keys(self.codebase_dir, pending, self.inventory, self.manifests)
+            self._dirty = False
+        return set(self.found)
+
+
+class TechSet:
+    """Techs like scan_for_languages_and_tech(): root manifest dependencies plus every file's tech."""
+
+    def __init__(self, base_dir=None, manifests=None, table=None):
+        table = table or get_detection_table()
+        if manifests is None and base_dir is not None:
+            manifests = ManifestIndex.load(base_dir)
+        self.detected = dependency_frameworks(table.framework_detection, manifests) if manifests else set()
+        self.skipped = Counter()
+
+    def add(self, entry):
+        if entry.is_dir or entry.tech is None:
+            return
+        if entry.kind in SKIP_KINDS:
+            self.skipped[entry.kind] += 1
+        self.detected |= entry.tech
+
+    def result(self):
+        return set(self.detected)
+
+
+def aggregate(entries, aggregators, every=DEFAULT_PROGRESS_EVERY):
+    """
+    Feed every entry to each aggregator; yield a Progress every `every` files
+    (0 = only at the end) and a final one with done=True.
+    """
+    files = 0
+    last_path = None
+    for entry in entries:
+        for aggregator in aggregators:
+            aggregator.add(entry)
+        if not entry.is_dir:
+            files += 1
+            last_path = entry.path
+            if every and files % every == 0:
+                yield Progress(files, last_path, [a.result() for a in aggregators], False)
+    yield Progress(files, last_path, [a.result() for a in aggregators], True)
+
+
+def scan_all(base_dir, keys=None, source=None, exclude=None, max_file_bytes=DEFAULT_MAX_FILE_BYTES,
+             workers=None, every=DEFAULT_PROGRESS_EVERY):
+    """
+    One pass computing what scan_codebase_stats(), scan_for_keys_canonical()
+    and scan_for_languages_and_tech() return. Yields Progress snapshots whose
+    results are {'languages': ..., 'keys': ..., 'tech': ...}.
+    """
+    source = source or open_file_source(base_dir, use_git_index=False)
+    keys = generate_windsurfrules.KEYS if keys is None else keys
+    manifests = ManifestIndex.load(base_dir)
+    names = ('languages', 'keys', 'tech')
+    aggregators = [LanguageStats(), KeySet(base_dir, keys, manifests), TechSet(manifests=manifests)]
+    entries = source_entries(source, exclude=exclude)
+    entries = classify(entries, max_file_bytes, source=source)
+    entries = measure(entries, max_file_bytes, workers=workers)
+    entries = sniff(entries, max_file_bytes, workers=workers)
+    entries = detect_tech(entries)
+    for progress in aggregate(entries, aggregators, every=every):
+        progress.results = dict(zip(names, progress.results))
+        yield progress
@@ -0,0 +1,175 @@
+"""
+Compiled lookup tables for the codeMaps detection JSON.
+
+The three codeMaps/*.json files are folded into direct indexes:
+
+- ext_to_lang:    '.py' -> 'python'
+- filename_index: 'pom.xml' -> (langs, frameworks, tools)
+
+The compiled table is cached next to the JSON (codeMaps/.detection_table.json)
+and reused while the source files are unchanged: a matching mtime/size stamp is
+trusted as-is, otherwise the content hash decides whether to rebuild. Loading
+is lazy, via get_detection_table().
+"""
+import hashlib
+import json
+import os
+
+from marker_matcher import MarkerMatcher
+
+CODEMAPS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'codeMaps')
+SOURCE_FILES = ('language_detection.json', 'framework_detection.json', 'tool_detection.json')
+CACHE_FILE = '.detection_table.json'
+TABLE_VERSION = 2
+
+# Legacy EXT_LANG_MAP from generate_windsurfrules.py, kept for backward compatibility
+LEGACY_EXT_MAP = {
+    '.py': 'python', '.js': 'javascript', '.jsx': 'javascript', '.ts': 'typescript', '.tsx': 'typescript',
+    '.java': 'java', '.rb': 'ruby', '.go': 'go', '.php': 'php', '.rs': 'rust', '.cpp': 'cpp', '.c': 'c',
+    '.cs': 'csharp', '.swift': 'swift', '.kt': 'kotlin', '.scala': 'scala', '.sh': 'shell',
+}
+
+
+class DetectionTable:
+    def __init__(self, language_detection, framework_detection, tool_detection, ext_to_lang, filename_index,
+                 fingerprint):
+        self.language_detection = language_detection
+        self.framework_detection = framework_detection
+        self.tool_detection = tool_detection
+        self.ext_to_lang = ext_to_lang
+        self.filename_index = filename_index
+        # Content hash of the source maps; versions facts cached by scan_cache
+        self.fingerprint = fingerprint
+        self._matcher = None
+
+    @property
+    def matcher(self):
+        if self._matcher is None:
+            self._matcher = MarkerMatcher(self.language_detection, self.framework_detection, self.tool_detection)
+        return self._matcher
+
+    def tech_names(self):
+        """Every language, framework and tool name the scanners can report."""
+        return (set(self.language_detection) | set(self.ext_to_lang.values()) | set(self.framework_detection)
+                | set(self.tool_detection))
+
+    def lookup_filename(self, fname):
+        """Return (langs, frameworks, tools) detected by a special file name, or None."""
+        return self.filename_index.get(fname)
+
+    def to_json(self):
+        return {
+            'language_detection': self.language_detection,
+            'framework_detection': self.framework_detection,
+            'tool_detection': self.tool_detection,
+            'ext_to_lang': self.ext_to_lang,
+            'filename_index': {name: [list(part) for part in hit] for name, hit in self.filename_index.items()},
+            'fingerprint': self.fingerprint,
+        }
+
+    @classmethod
+    def from_json(cls, data):
+        filename_index = {name: tuple(tuple(part) for part in hit) for name, hit in data['filename_index'].items()}
+        return cls(data['language_detection'], data['framework_detection'], data['tool_detection'],
+                   data['ext_to_lang'], filename_index, data['fingerprint'])
+
+
+def compile_detection_table(language_detection, framework_detection, tool_detection):
+    ext_to_lang = {ext: lang for lang, data in language_detection.items() for ext in data.get("extensions", [])}
+    ext_to_lang.update(LEGACY_EXT_MAP)
+    hits = {}
+
+    def add(fname, slot, name):
+        entry = hits.setdefault(fname, ([], [], []))
+        if name not in entry[slot]:
+            entry[slot].append(name)
+
+    for lang, data in language_detection.items():
+        for fname in data.get("filenames", []) + data.get("build_files", []):
+            add(fname, 0, lang)
+    for fw, data in framework_detection.items():
+        for fname in data.get("build_files", []):
+            add(fname, 1, fw)
+    for tool, data in tool_detection.items():
+        for fname in data.get("build_files", []) + data.get("filenames", []):
+            add(fname, 2, tool)
+    filename_index = {fname: tuple(tuple(part) for part in entry) for fname, entry in hits.items()}
+    fingerprint = hashlib.sha256(
+        json.dumps([language_detection, framework_detection, tool_detection], sort_keys=True).encode('utf-8')
+    ).hexdigest()
+    return DetectionTable(language_detection, framework_detection, tool_detection, ext_to_lang, filename_index,
+                          fingerprint)
+
+
+def _source_stamps(codemaps_dir):
+    stamps = {}
+    for name in SOURCE_FILES:
+        st = os.stat(os.path.join(codemaps_dir, name))
+        stamps[name] = [st.st_mtime_ns, st.st_size]
+    return stamps
+
+
+def _source_hash(codemaps_dir):
+    digest = hashlib.sha256()
+    for name in SOURCE_FILES:
+        with open(os.path.join(codemaps_dir, name), 'rb') as f:
+            digest.update(name.encode('utf-8') + b'\0' + f.read() + b'\0')
+    return digest.hexdigest()
+
+
+def _write_cache(cache_path, payload):
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        # Read-only checkout: the table still works, it's just rebuilt next time
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+
+def load_detection_table(codemaps_dir=CODEMAPS_DIR, use_cache=True):
+    """Load the compiled table for codemaps_dir, rebuilding the cache if the JSON changed."""
+    cache_path = os.path.join(codemaps_dir, CACHE_FILE)
+    stamps = _source_stamps(codemaps_dir)
+    cached = None
+    if use_cache:
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            if cached.get('version') != TABLE_VERSION:
+                cached = None
+        except (OSError, ValueError):
+            cached = None
+    if cached and cached.get('stamps') == stamps:
+        return DetectionTable.from_json(cached['table'])
+    source_hash = _source_hash(codemaps_dir)
+    if cached and cached.get('hash') == source_hash:
+        # Touched but unchanged (e.g. fresh checkout): refresh the stamps only
+        cached['stamps'] = stamps
+        if use_cache:
+            _write_cache(cache_path, cached)
+        return DetectionTable.from_json(cached['table'])
+    maps = []
+    for name in SOURCE_FILES:
+        with open(os.path.join(codemaps_dir, name), 'r', encoding='utf-8') as f:
+            maps.append(json.load(f))
+    table = compile_detection_table(*maps)
+    if use_cache:
+        _write_cache(cache_path, {'version': TABLE_VERSION, 'stamps': stamps, 'hash': source_hash,
+                                  'table': table.to_json()})
+    return table
+
+
+_DEFAULT_TABLE = None
+
+
+def get_detection_table():
+    """Lazily load and memoize the table for the bundled codeMaps directory."""
+    global _DEFAULT_TABLE
+    if _DEFAULT_TABLE is None:
+        _DEFAULT_TABLE = load_detection_table()
+    return _DEFAULT_TABLE
@@ -3,8 +3,17 @@
 Sync and convert Cursor rules from the awesome-cursor-rules-mdc GitHub repo to the latest Windsurf format (.md) for project-only scope.
 - Fetches all .mdc files from the GitHub repo sanjeed5/awesome-cursor-rules-mdc/rules-mdc
 - Converts frontmatter and references as per latest Windsurf requirements
+  (see rule_frontmatter.py; a hand-rolled fast path with a PyYAML fallback)
 - Outputs to .windsurf/rules/<rule>.md in the current working directory
 - Requires GITHUB_TOKEN environment variable for authentication
+- Downloads run concurrently over one pooled session (--workers, --timeout, --retries)
+  and each rule is converted and written as soon as it arrives
+- Responses are cached locally and revalidated with ETag/Last-Modified; --offline
+  syncs from the cache alone
+- Idempotent: a manifest of source blob SHA + converter version per output file
+  skips unchanged rules entirely, and only files it created are ever deleted
+- --bulk syncs a local mirror of the catalog from one git tree call plus a tarball
+  (cold start) or just the changed blobs, instead of one contents-API request per rule
 
 Requirements:
     - Python 3.8+
@@ -12,115 +21,123 @@ Requirements:
 """
 import os
 import sys
-import requests
-import yaml
-import re
+import json
+import argparse
 from pathlib import Path
 
+from github_catalog import DEFAULT_REF, read_catalog_file, sync_catalog
+from http_cache import DEFAULT_MAX_BYTES, HttpCache, make_cached_fetch
+from profiler import add_profile_arguments, finish_from_args, span, start_from_args
+from rule_frontmatter import convert_rule
+from sync_manifest import SyncManifest
+from rule_fetcher import DEFAULT_FETCH_WORKERS, DEFAULT_RETRIES, DEFAULT_TIMEOUT, fetch_many, fetch_text, make_session
+
 REPO_OWNER = "sanjeed5"
 REPO_NAME = "awesome-cursor-rules-mdc"
 RULES_PATH = "rules-mdc"
 TARGET_DIR = Path(".windsurf/rules")
 GITHUB_API = "https://api.github.com"
+# Bump whenever convert_rule() output changes, so every rule is re-converted on the next sync
+CONVERTER_VERSION = 2
 
-# Helper: preprocess frontmatter to quote unquoted glob patterns
-def preprocess_frontmatter(lines):
-    new_lines = []
-    for line in lines:
-        # Match: globs: *.rs or globs: [*.rs, *.foo] (unquoted)
-        m = re.match(r'^(\s*globs\s*:\s*)([^\[\"\
-][^\n]*)$', line)
-        if m:
-            prefix, value = m.groups()
-            # Quote value if not already quoted or a list
-            value = value.strip()
-            if not value.startswith('[') and not (value.startswith('"') or value.startswith("'")):
-                value = f'"{value}"'
-            new_lines.append(f'{prefix}{value}\n')
-        else:
-            new_lines.append(line)
-    return new_lines
-
-# Helper: parse YAML frontmatter from Markdown
-def parse_frontmatter_and_content(text):
-    lines = text.splitlines(keepends=True)
-    if not lines or not lines[0].strip().startswith('---'):
-        return { }, ''.join(lines)
-    fm_end = None
-    for i in range(1, len(lines)):
-        if lines[i].strip().startswith('---'):
-            fm_end = i
-            break
-    if fm_end is None:
-        return { }, ''.join(lines)
-    # Preprocess frontmatter for YAML compatibility
-    frontmatter_lines = preprocess_frontmatter(lines[1:fm_end])
-    frontmatter = yaml.safe_load(''.join(frontmatter_lines)) or { }
-    content = ''.join(lines[fm_end+1:])
-    return frontmatter, content
-
-# Helper: convert Cursor frontmatter to Windsurf frontmatter
-def convert_frontmatter(fm):
-    new_fm = {}
-    if fm.get('alwaysApply', False) is True or fm.get('alwaysApply', 'false') == 'true':
-        new_fm['trigger'] = 'always_on'
-        if 'globs' in fm:
-            new_fm['globs'] = fm['globs']
-    elif 'globs' in fm:
-        new_fm['trigger'] = 'glob'
-        new_fm['globs'] = fm['globs']
-    if 'description' in fm:
-        new_fm['description'] = fm['description']
-    return new_fm
-
-def update_references(content):
-    content = content.replace('Cursor', 'Windsurf')
-    return content
-
-def fetch_github_file_list(token, owner, repo, path):
+def fetch_github_file_list(token, owner, repo, path, session=None, timeout=DEFAULT_TIMEOUT, fetch=None):
     url = f"{GITHUB_API}/repos/{owner}/{repo}/contents/{path}"
-    headers = {"Authorization": f"token {token}"}
-    r = requests.get(url, headers=headers)
-    r.raise_for_status()
-    return r.json()
+    session = session or make_session(token)
+    fetch = fetch or fetch_text
+    return json.loads(fetch(session, url, timeout))
 
-def fetch_github_file_content(token, file_info):
-    url = file_info['download_url']
-    headers = {"Authorization": f"token {token}"}
-    r = requests.get(url, headers=headers)
-    r.raise_for_status()
-    return r.text
+def fetch_github_file_content(token, file_info, session=None, timeout=DEFAULT_TIMEOUT, fetch=None):
+    session = session or make_session(token)
+    fetch = fetch or fetch_text
+    return fetch(session, file_info['download_url'], timeout)
 
 def main():
+    parser = argparse.ArgumentParser(description="Sync Cursor rules from GitHub into .windsurf/rules.")
+    parser.add_argument('--workers', type=int, default=DEFAULT_FETCH_WORKERS,
+                        help=f'Maximum concurrent downloads (default: {DEFAULT_FETCH_WORKERS})')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT,
+                        help=f'Per-request timeout in seconds (default: {DEFAULT_TIMEOUT})')
+    parser.add_argument('--retries', type=int, default=DEFAULT_RETRIES,
+                        help=f'Retries for connection errors, 429 and 5xx responses (default: {DEFAULT_RETRIES})')
+    parser.add_argument('--offline', action='store_true', help='Serve rules only from the local HTTP cache')
+    parser.add_argument('--http-cache-max-mb', type=float, default=DEFAULT_MAX_BYTES / (1024 * 1024),
+                        help='Size cap of the local HTTP cache; least recently used entries are evicted '
+                             f'(default: {DEFAULT_MAX_BYTES // (1024 * 1024)})')
+    parser.add_argument('--bulk', action='store_true',
+                        help='Sync via the recursive git tree and a tarball instead of per-file contents API calls')
+    parser.add_argument('--ref', default=DEFAULT_REF, help=f'Catalog branch or tag for --bulk (default: {DEFAULT_REF})')
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    start_from_args(args)
+    try:
+        sync(args)
+    finally:
+        finish_from_args(args)
+
+def sync(args):
     token = os.environ.get('GITHUB_TOKEN')
-    if not token:
+    if not token and not args.offline:
         print("Error: GITHUB_TOKEN environment variable not set.")
         sys.exit(1)
 
     TARGET_DIR.mkdir(parents=True, exist_ok=True)
-    file_list = fetch_github_file_list(token, REPO_OWNER, REPO_NAME, RULES_PATH)
-    written_files = set()
+    session = make_session(token, pool_size=args.workers, retries=args.retries)
+    http_cache = HttpCache(max_bytes=int(args.http_cache_max_mb * 1024 * 1024))
+    fetch = make_cached_fetch(http_cache, offline=args.offline)
+    manifest = SyncManifest(TARGET_DIR, CONVERTER_VERSION)
 
-    for file_info in file_list:
-        if not file_info['name'].endswith('.mdc'):
-            continue
-        text = fetch_github_file_content(token, file_info)
-        fm, content = parse_frontmatter_and_content(text)
-        new_fm = convert_frontmatter(fm)
-        new_content = update_references(content)
-        out = '---\n' + yaml.safe_dump(new_fm, sort_keys=False).strip() + '\n---\n' + new_content
+    with span('catalog fetch') as sp:
+        if args.bulk:
+            catalog = sync_catalog(session, REPO_OWNER, REPO_NAME, RULES_PATH, ref=args.ref, fetch=fetch,
+                                   timeout=args.timeout, workers=args.workers, offline=args.offline)
+            mdc_files = list(catalog.values())
+        else:
+            file_list = fetch_github_file_list(token, REPO_OWNER, REPO_NAME, RULES_PATH, session=session,
+                                               timeout=args.timeout, fetch=fetch)
+            mdc_files = [file_info for file_info in file_list if file_info['name'].endswith('.mdc')]
+        sp.add(rules=len(mdc_files))
+
+    # Rules whose source blob SHA and converter version match the manifest are not even downloaded
+    live_out_names = set()
+    changed_files = []
+    for file_info in mdc_files:
         out_name = file_info['name'].replace('.mdc', '.md')
-        out_path = TARGET_DIR / out_name
-        with open(out_path, 'w', encoding='utf-8') as f:
-            f.write(out)
-        written_files.add(str(out_path.resolve()))
-        print(f"Converted: {file_info['name']} -> {out_path}")
+        live_out_names.add(out_name)
+        if manifest.is_current(out_name, file_info.get('sha')):
+            manifest.mark_unchanged()
+        else:
+            changed_files.append(file_info)
+
+    if args.bulk:
+        results = ((file_info, read_catalog_file(file_info), None) for file_info in changed_files)
+    else:
+        # Conversion and writing happen here while the remaining downloads are in flight
+        results = fetch_many(session, changed_files, lambda fi: fi['download_url'],
+                             workers=args.workers, timeout=args.timeout, fetch=fetch)
+    for file_info, text, error in results:
+        out_name = file_info['name'].replace('.mdc', '.md')
+        if error is not None:
+            # The previously synced copy and its manifest entry are kept
+            print(f"Error fetching {file_info['name']}: {error}")
+            manifest.mark_failed()
+            continue
+        try:
+            with span('convert', bytes=len(text)):
+                converted = convert_rule(text)
+        except Exception as e:
+            # A malformed upstream rule keeps its previous copy, like a failed download
+            print(f"Error converting {file_info['name']}: {e}")
+            manifest.mark_failed()
+            continue
+        with span('write', bytes=len(converted)):
+            manifest.write(out_name, file_info['name'], file_info.get('sha'), converted)
+        print(f"Converted: {file_info['name']} -> {TARGET_DIR / out_name}")
 
-    # Optionally, delete orphaned files in target dir
-    for f in TARGET_DIR.glob('*.md'):
-        if str(f.resolve()) not in written_files:
-            print(f"Deleting orphaned file: {f}")
-            f.unlink()
+    # Only files the manifest created are deleted when their source disappears upstream
+    for path in manifest.delete_missing(live_out_names):
+        print(f"Deleting orphaned file: {path}")
+    manifest.save()
+    print(f"Sync complete: {manifest.summary()}.")
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,53 @@
+"""
+Cheap classification of files before their contents are read.
+
+Scanners only care about source text, so a file is classified from what costs
+(almost) nothing: its extension, its stat size and a NUL-byte probe of the
+first PROBE_BYTES block, which they read anyway. Binaries and files over the
+size cap are skipped (and counted) instead of being decoded, so scan cost
+follows the amount of source rather than the size of the repository.
+"""
+import os
+
+TEXT = 'text'
+BINARY = 'binary'
+OVERSIZED = 'oversized'
+UNREADABLE = 'unreadable'
+SKIP_KINDS = (BINARY, OVERSIZED, UNREADABLE)
+
+PROBE_BYTES = 8192
+DEFAULT_MAX_FILE_BYTES = 8 * 1024 * 1024
+
+BINARY_EXTENSIONS = frozenset({
+    # images and fonts
+    '.png', '.jpg', '.jpeg', '.gif', '.bmp', '.ico', '.icns', '.webp', '.tif', '.tiff', '.psd', '.heic',
+    '.woff', '.woff2', '.ttf', '.otf', '.eot',
+    # archives and packages
+    '.zip', '.gz', '.tgz', '.bz2', '.xz', '.zst', '.7z', '.rar', '.tar', '.jar', '.war', '.ear', '.aar',
+    '.apk', '.ipa', '.whl', '.egg', '.deb', '.rpm', '.dmg', '.iso',
+    # compiled code
+    '.so', '.dll', '.dylib', '.exe', '.o', '.obj', '.a', '.lib', '.class', '.pyc', '.pyo', '.wasm', '.bin',
+    # media and documents
+    '.mp3', '.mp4', '.m4a', '.mov', '.avi', '.mkv', '.webm', '.wav', '.flac', '.ogg',
+    '.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx',
+    # data
+    '.sqlite', '.sqlite3', '.db', '.pkl', '.npy', '.npz', '.h5', '.onnx', '.pt', '.parquet', '.avro',
+})
+
+
+def is_binary_name(path):
+    return os.path.splitext(path)[1].lower() in BINARY_EXTENSIONS
+
+
+def is_binary_block(block):
+    """True if the first block of a file holds a NUL byte (text never does)."""
+    return b'\0' in block[:PROBE_BYTES]
+
+
+def is_oversized(size, max_bytes):
+    return max_bytes is not None and size > max_bytes
+
+
+def format_skips(skipped):
+    """'3 binary, 1 oversized' for a Counter of skip kinds, or '' when nothing was skipped."""
+    return ', '.join(f"{skipped[kind]} {kind}" for kind in SKIP_KINDS if skipped.get(kind))
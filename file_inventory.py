@@ -0,0 +1,97 @@
+"""
+One-pass inventory of a codebase walk.
+
+Built while walking the tree so detectors can answer "is there a file named X",
+"does any file end with .ext", "is there a directory called Y" and "does any
+file match this glob" with set/dict lookups instead of rescanning a file list.
+Names are reference counted, so a watcher can also remove files and dirs.
+"""
+import fnmatch
+import re
+from collections import defaultdict
+
+
+class FileInventory:
+    def __init__(self):
+        self.filenames = defaultdict(int)   # lowered file name -> number of files
+        self.ext_counts = defaultdict(int)  # lowered dotted suffix -> number of files
+        self.dirnames = defaultdict(int)    # lowered directory name -> number of dirs
+        self.file_count = 0
+        self._pattern_cache = {}
+
+    @staticmethod
+    def _suffixes(name):
+        # Every dotted suffix ('a.test.js' -> '.test.js', '.js') so that has_ext()
+        # keeps the old str.endswith() semantics for multi-dot extensions.
+        idx = name.find('.')
+        while idx != -1:
+            yield name[idx:]
+            idx = name.find('.', idx + 1)
+
+    def add_file(self, fname):
+        name = fname.lower()
+        if not self.filenames[name]:
+            self._pattern_cache.clear()
+        self.filenames[name] += 1
+        self.file_count += 1
+        for suffix in self._suffixes(name):
+            self.ext_counts[suffix] += 1
+
+    def remove_file(self, fname):
+        name = fname.lower()
+        if not self.filenames.get(name):
+            return
+        self.filenames[name] -= 1
+        if not self.filenames[name]:
+            del self.filenames[name]
+            self._pattern_cache.clear()
+        self.file_count -= 1
+        for suffix in self._suffixes(name):
+            self.ext_counts[suffix] -= 1
+            if not self.ext_counts[suffix]:
+                del self.ext_counts[suffix]
+
+    def add_dir(self, dirname):
+        self.dirnames[dirname.lower()] += 1
+
+    def remove_dir(self, dirname):
+        name = dirname.lower()
+        if self.dirnames.get(name):
+            self.dirnames[name] -= 1
+            if not self.dirnames[name]:
+                del self.dirnames[name]
+
+    def add_walk_entry(self, dirs, files):
+        for d in dirs:
+            self.add_dir(d)
+        for f in files:
+            self.add_file(f)
+
+    def has_file(self, filename):
+        return self.filenames.get(filename.lower(), 0) > 0
+
+    def has_ext(self, ext):
+        return self.ext_counts.get(ext.lower(), 0) > 0
+
+    def ext_count(self, ext):
+        return self.ext_counts.get(ext.lower(), 0)
+
+    def has_dir(self, dirname):
+        return self.dirnames.get(dirname.lower(), 0) > 0
+
+    def has_pattern(self, pattern):
+        pattern = pattern.lower()
+        hit = self._pattern_cache.get(pattern)
+        if hit is None:
+            match = re.compile(fnmatch.translate(pattern)).match
+            hit = any(match(name) for name in self.filenames)
+            self._pattern_cache[pattern] = hit
+        return hit
+
+
+def build_inventory(walk):
+    """Build a FileInventory from an os.walk()-style iterator."""
+    inventory = FileInventory()
+    for _, dirs, files in walk:
+        inventory.add_walk_entry(dirs, files)
+    return inventory
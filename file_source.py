@@ -0,0 +1,157 @@
+"""
+Where the scanners get their file list and per-file fingerprints from.
+
+- GitIndexSource: inside a git worktree, the tracked files listed in
+  .git/index, with the size/mtime/inode git cached for each. Nothing is
+  listed or stat'ed on disk, and untracked build outputs or dependencies
+  never count toward detection.
+- FilesystemSource: walk_codebase() and os.stat(), used outside git (or when
+  the index is missing, split or sparse).
+
+Both offer walk(), shaped like walk_codebase(), iter_files() and
+fingerprint(path). Index fingerprints are as fresh as the index: an edit is
+seen once it is staged (or `git status` refreshed the entry), so reruns
+with a scan cache may reuse results for files edited but not yet staged.
+"""
+import os
+from collections import deque
+
+from codebase_walker import DEFAULT_SKIP_DIRS, is_ignored, parse_ignore_lines, walk_codebase
+from git_index import read_git_index
+from scan_cache import file_fingerprint
+
+
+class FilesystemSource:
+    name = 'filesystem'
+
+    def __init__(self, base_dir):
+        self.base_dir = base_dir
+
+    def walk(self, exclude=None, on_prune=None, breadth_first=False):
+        return walk_codebase(self.base_dir, exclude=exclude, on_prune=on_prune, breadth_first=breadth_first)
+
+    def iter_files(self, exclude=None, breadth_first=False):
+        for root, _, files in self.walk(exclude=exclude, breadth_first=breadth_first):
+            for fname in files:
+                yield os.path.join(root, fname)
+
+    def fingerprint(self, path):
+        return file_fingerprint(path)
+
+
+class GitIndexSource(FilesystemSource):
+    """
+    The tracked files below base_dir. entries are parse_index() tuples with
+    paths relative to the worktree; prefix is base_dir's '/'-terminated path
+    in the worktree ('' at the top).
+    """
+    name = 'git index'
+
+    def __init__(self, base_dir, entries, prefix=''):
+        super().__init__(base_dir)
+        self.stats = {}  # '/'-separated path below base_dir -> (size, mtime_ns, inode)
+        self.tree = {'': ([], [])}  # dir path -> (subdir names, file names)
+        tree = self.tree
+        stats = self.stats
+        # The index is sorted by path, so a directory's files mostly arrive together
+        last_dir, node = '', tree['']
+        for path, size, mtime_ns, ino in entries:
+            if prefix:
+                if not path.startswith(prefix):
+                    continue
+                path = path[len(prefix):]
+            stats[path] = (size, mtime_ns, ino)
+            rel_dir, _, name = path.rpartition('/')
+            if rel_dir == last_dir:
+                node[1].append(name)
+                continue
+            last_dir = rel_dir
+            node = tree.get(rel_dir)
+            if node is None:
+                node = tree[rel_dir] = ([], [])
+                # Link the new directory into its parents, creating the missing ones
+                child = rel_dir
+                while True:
+                    parent, _, dname = child.rpartition('/')
+                    parent_node = tree.get(parent)
+                    if parent_node is not None:
+                        parent_node[0].append(dname)
+                        break
+                    tree[parent] = ([dname], [])
+                    child = parent
+            node[1].append(name)
+
+    def file_count(self):
+        return len(self.stats)
+
+    def walk(self, exclude=None, on_prune=None, breadth_first=False, skip_dirs=DEFAULT_SKIP_DIRS):
+        """
+        walk_codebase() over the tracked tree: skip_dirs and exclude globs
+        prune as usual, .gitignore files do not (tracked files are never
+        ignored by git either).
+        """
+        levels = [('', parse_ignore_lines(exclude))] if exclude else []
+        pending = deque([''])
+        next_dir = pending.popleft if breadth_first else pending.pop
+        while pending:
+            rel_dir = next_dir()
+            subdirs, files = self.tree[rel_dir]
+            rel_prefix = rel_dir + '/' if rel_dir else ''
+            dirs = []
+            for d in subdirs:
+                if d in skip_dirs or (levels and is_ignored(levels, rel_prefix + d, True)):
+                    if on_prune:
+                        on_prune(d)
+                    continue
+                dirs.append(d)
+            if levels:
+                files = [f for f in files if not is_ignored(levels, rel_prefix + f, False)]
+            else:
+                files = list(files)
+            root = os.path.join(self.base_dir, *rel_dir.split('/')) if rel_dir else self.base_dir
+            yield root, dirs, files
+            # Callers may prune dirs in place, as with os.walk()
+            children = [rel_prefix + d for d in dirs]
+            if not breadth_first:
+                children.reverse()
+            pending.extend(children)
+
+    def fingerprint(self, path):
+        """The index's (size, mtime_ns, inode) for a tracked path; untracked paths are stat'ed."""
+        base = self.base_dir.rstrip(os.sep) + os.sep
+        if path.startswith(base):
+            stat = self.stats.get(path[len(base):].replace(os.sep, '/'))
+            if stat is not None:
+                return stat
+        return file_fingerprint(path)
+
+
+def open_file_source(base_dir, use_git_index=True):
+    """
+    A GitIndexSource when base_dir is inside a git worktree whose index lists
+    files below it, else a FilesystemSource.
+    """
+    if use_git_index:
+        try:
+            found = read_git_index(base_dir)
+        except Exception as e:
+            print(f"Warning: Could not use the git index, walking the filesystem instead: {e}")
+            found = None
+        if found is not None:
+            worktree, entries = found
+            rel = os.path.relpath(os.path.abspath(base_dir), worktree).replace(os.sep, '/')
+            source = GitIndexSource(base_dir, entries, '' if rel == '.' else rel + '/')
+            # An untracked (or ignored) codebase dir inside a repository is walked instead
+            if source.file_count():
+                return source
+    return FilesystemSource(base_dir)
+
+
+def add_file_source_arguments(parser):
+    parser.add_argument('--no-git-index', action='store_true',
+                        help='Walk the filesystem even inside a git repository, instead of listing tracked files '
+                             'from .git/index (also counts untracked files)')
+
+
+def file_source_from_args(args, base_dir):
+    return open_file_source(base_dir, use_git_index=not args.no_git_index)
@@ -0,0 +1,215 @@
+"""
+File system watchers for watch mode.
+
+open_watcher() returns an inotify watcher on Linux (through ctypes, no extra
+dependency) and falls back to a polling watcher elsewhere, or when inotify is
+unavailable or out of watches. Both report changed paths only; callers lstat
+them to find out whether they were created, modified or deleted. Directories
+that walk_codebase() would prune (node_modules, ignored trees, ...) are not
+watched, but their creation/removal is still reported.
+
+debounced_batches() groups bursts of changes (a git checkout, a build) into a
+single batch once the tree has been quiet for a moment.
+"""
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import time
+
+from codebase_walker import IGNORE_FILES, PathFilter, walk_codebase
+
+DEFAULT_DEBOUNCE = 0.5
+DEFAULT_MAX_WAIT = 5.0
+DEFAULT_POLL_INTERVAL = 2.0
+# Sentinel batch: events were lost (inotify queue overflow) and the caller should rescan
+RESCAN = object()
+
+_IN_MODIFY = 0x2
+_IN_ATTRIB = 0x4
+_IN_CLOSE_WRITE = 0x8
+_IN_MOVED_FROM = 0x40
+_IN_MOVED_TO = 0x80
+_IN_CREATE = 0x100
+_IN_DELETE = 0x200
+_IN_DELETE_SELF = 0x400
+_IN_MOVE_SELF = 0x800
+_IN_Q_OVERFLOW = 0x4000
+_IN_IGNORED = 0x8000
+_IN_ONLYDIR = 0x1000000
+_IN_ISDIR = 0x40000000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_WATCH_MASK = (_IN_MODIFY | _IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+               | _IN_DELETE_SELF | _IN_MOVE_SELF | _IN_ONLYDIR)
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+class InotifyWatcher:
+    def __init__(self, base_dir, path_filter):
+        if not sys.platform.startswith('linux'):
+            raise OSError(errno.ENOSYS, "inotify is only available on Linux")
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._rm_watch = libc.inotify_rm_watch
+        self._rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        self.fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self.base_dir = os.path.abspath(base_dir)
+        self.path_filter = path_filter
+        self.paths = {}  # watch descriptor -> directory
+        try:
+            self.watch_tree(self.base_dir)
+        except OSError:
+            self.close()
+            raise
+
+    def _watch(self, path):
+        wd = self._add_watch(self.fd, os.fsencode(path), _WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            # The directory may vanish before it is watched; running out of watches is fatal
+            if err in (errno.ENOENT, errno.ENOTDIR):
+                return
+            raise OSError(err, f"inotify_add_watch({path}): {os.strerror(err)}")
+        self.paths[wd] = path
+
+    def watch_tree(self, root):
+        """Watch root and every directory below it that the walker keeps; returns the files found."""
+        found = []
+        for dirpath, dirs, files in os.walk(root):
+            dirs[:] = [d for d in dirs if not self.path_filter.is_skipped(os.path.join(dirpath, d), True)]
+            self._watch(dirpath)
+            found.extend(path for path in (os.path.join(dirpath, f) for f in files)
+                         if not self.path_filter.is_skipped(path, False))
+        return found
+
+    def read_changes(self, timeout):
+        """Wait up to timeout seconds; returns a set of changed paths, RESCAN, or an empty set."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            data = os.read(self.fd, 256 * 1024)
+        except BlockingIOError:
+            return set()
+        changed = set()
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _, name_len = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + name_len].rstrip(b'\0'))
+            offset += name_len
+            if mask & _IN_Q_OVERFLOW:
+                return RESCAN
+            directory = self.paths.get(wd)
+            if mask & _IN_IGNORED:
+                self.paths.pop(wd, None)
+                continue
+            if directory is None or mask & (_IN_DELETE_SELF | _IN_MOVE_SELF):
+                continue
+            path = os.path.join(directory, name) if name else directory
+            if name in IGNORE_FILES:
+                # Ignore rules changed: re-evaluate them and watch any newly included dirs
+                self.path_filter.clear()
+                self.watch_tree(self.base_dir)
+            if self.path_filter.is_skipped(path, bool(mask & _IN_ISDIR)):
+                # A pruned dir (e.g. node_modules) appearing or disappearing still matters to detectors
+                if mask & _IN_ISDIR and mask & (_IN_CREATE | _IN_DELETE | _IN_MOVED_FROM | _IN_MOVED_TO):
+                    changed.add(path)
+                continue
+            changed.add(path)
+            if mask & _IN_ISDIR and mask & (_IN_CREATE | _IN_MOVED_TO):
+                # Files created before the new directory's watch was added would be missed otherwise
+                changed.update(self.watch_tree(path))
+        return changed
+
+    def close(self):
+        if self.fd is not None and self.fd >= 0:
+            os.close(self.fd)
+        self.fd = None
+
+
+class PollingWatcher:
+    """Portable fallback: rewalks the tree every interval and diffs (mtime, size) snapshots."""
+
+    def __init__(self, base_dir, exclude=None, interval=DEFAULT_POLL_INTERVAL):
+        self.base_dir = os.path.abspath(base_dir)
+        self.exclude = exclude
+        self.interval = interval
+        self.snapshot = self._snapshot()
+        self._next_poll = time.monotonic() + interval
+
+    def _snapshot(self):
+        snapshot = {}
+        pending = []
+        for root, dirs, files in walk_codebase(self.base_dir, exclude=self.exclude, on_prune=pending.append):
+            for d in pending:
+                snapshot[os.path.join(root, d)] = 'dir'
+            pending.clear()
+            for d in dirs:
+                snapshot[os.path.join(root, d)] = 'dir'
+            for fname in files:
+                path = os.path.join(root, fname)
+                try:
+                    st = os.lstat(path)
+                except OSError:
+                    continue
+                snapshot[path] = (st.st_mtime_ns, st.st_size)
+        return snapshot
+
+    def read_changes(self, timeout):
+        wait = self._next_poll - time.monotonic()
+        if wait > timeout:
+            time.sleep(timeout)
+            return set()
+        if wait > 0:
+            time.sleep(wait)
+        self._next_poll = time.monotonic() + self.interval
+        snapshot = self._snapshot()
+        old = self.snapshot
+        self.snapshot = snapshot
+        return {path for path in old.keys() | snapshot.keys() if old.get(path) != snapshot.get(path)}
+
+    def close(self):
+        pass
+
+
+def open_watcher(base_dir, exclude=None, force_polling=False, poll_interval=DEFAULT_POLL_INTERVAL):
+    if not force_polling:
+        try:
+            return InotifyWatcher(base_dir, PathFilter(base_dir, exclude=exclude))
+        except (OSError, AttributeError) as e:
+            print(f"inotify unavailable ({e}); polling every {poll_interval:g}s instead")
+    return PollingWatcher(base_dir, exclude=exclude, interval=poll_interval)
+
+
+def debounced_batches(watcher, debounce=DEFAULT_DEBOUNCE, max_wait=DEFAULT_MAX_WAIT, should_stop=None):
+    """
+    Yield sets of changed paths (or RESCAN) once no new change arrived for
+    `debounce` seconds, or at the latest `max_wait` seconds after the first one.
+    """
+    while should_stop is None or not should_stop():
+        batch = watcher.read_changes(debounce)
+        if not batch:
+            continue
+        if batch is RESCAN:
+            yield RESCAN
+            continue
+        deadline = time.monotonic() + max_wait
+        rescan = False
+        while time.monotonic() < deadline:
+            more = watcher.read_changes(min(debounce, max(0.0, deadline - time.monotonic())))
+            if not more:
+                break
+            if more is RESCAN:
+                rescan = True
+            else:
+                batch |= more
+        yield RESCAN if rescan else batch
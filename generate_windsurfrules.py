@@ -1,7 +1,16 @@
 import os
-import shutil
 from collections import defaultdict
 
+from file_classifier import BINARY, DEFAULT_MAX_FILE_BYTES, OVERSIZED, PROBE_BYTES, TEXT, is_binary_block, is_oversized
+from file_inventory import FileInventory
+from file_source import FilesystemSource, add_file_source_arguments, file_source_from_args
+from http_cache import DEFAULT_MAX_BYTES
+from manifest_index import ManifestIndex
+from profiler import add_profile_arguments, finish_from_args, profiled_iter, span, start_from_args
+from rule_fetcher import DEFAULT_FETCH_WORKERS
+from rules_writer import StreamingRulesWriter
+from scan_budget import SETTLED, CheckSchedule, add_budget_arguments, budget_from_args
+
 # Mapping of file extensions to languages
 EXT_LANG_MAP = {
     '.py': 'python',
@@ -36,35 +45,131 @@ import argparse
 
 parser = argparse.ArgumentParser(description="Generate Windsurf or Cursor rules file.")
 parser.add_argument('--iscursor', action='store_true', help='If set, output to .cursorrules instead of .windsurfrules')
-args = parser.parse_args()
+parser.add_argument('--exclude', action='append', default=[], metavar='GLOB',
+                    help='Gitignore-style pattern to skip while scanning (repeatable), e.g. --exclude dist/')
+parser.add_argument('--offline', action='store_true', help='Serve cursor.directory rules only from the local HTTP cache')
+parser.add_argument('--workspaces', action='store_true',
+                    help='Detect keys in every monorepo workspace (npm/pnpm, Maven, Gradle, Cargo, go.work)')
+parser.add_argument('--http-cache-max-mb', type=float, default=DEFAULT_MAX_BYTES / (1024 * 1024),
+                    help='Size cap of the local HTTP cache; least recently used entries are evicted '
+                         f'(default: {DEFAULT_MAX_BYTES // (1024 * 1024)})')
+parser.add_argument('--prefetch-workers', type=int, default=DEFAULT_FETCH_WORKERS,
+                    help='Threads downloading rules for every matched key while you answer prompts '
+                         f'(default: {DEFAULT_FETCH_WORKERS}, 0 = download after each answer)')
+add_budget_arguments(parser)
+add_file_source_arguments(parser)
+add_profile_arguments(parser)
 
-if args.iscursor:
-    WINDSURF_RULES = os.path.join(PROJECT_ROOT, '.cursorrules')
-else:
-    WINDSURF_RULES = os.path.join(PROJECT_ROOT, '.windsurfrules')
+# Set from --iscursor in main(); arguments are parsed there so the scanners can be imported
+WINDSURF_RULES = os.path.join(PROJECT_ROOT, '.windsurfrules')
 
 
-def scan_codebase(base_dir):
-    lang_line_counts = defaultdict(int)
-    for root, _, files in os.walk(base_dir):
+LINE_COUNT_CHUNK = 1024 * 1024
+# Bump when the cached per-file facts of scan_codebase_stats() change meaning
+LINE_COUNT_VERSION = '3'
+LANG_WEIGHTS = ('lines', 'bytes', 'files')
+
+
+def count_lines(path, chunk_size=LINE_COUNT_CHUNK, max_bytes=None):
+    """
+    Return (kind, lines, bytes) for path. Newline bytes are counted in binary
+    chunks, so nothing is decoded and memory stays bounded by chunk_size; a
+    last line without a trailing newline counts too. Files over max_bytes are
+    not read (OVERSIZED), and a NUL byte in the first block stops at BINARY.
+    """
+    lines = size = 0
+    last_byte = 0x0a
+    with open(path, 'rb', buffering=0) as f:
+        file_size = os.fstat(f.fileno()).st_size
+        if is_oversized(file_size, max_bytes):
+            return OVERSIZED, 0, file_size
+        buf = bytearray(max(PROBE_BYTES, min(chunk_size, file_size)))
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            if not size and is_binary_block(bytes(buf[:min(n, PROBE_BYTES)])):
+                return BINARY, 0, file_size
+            lines += buf.count(b'\n', 0, n)
+            size += n
+            last_byte = buf[n - 1]
+    if last_byte != 0x0a:
+        lines += 1
+    return TEXT, lines, size
+
+
+def scan_codebase_stats(base_dir, exclude=None, cache=None, max_file_bytes=DEFAULT_MAX_FILE_BYTES, skipped=None,
+                        source=None):
+    """
+    Per-language {'lines', 'bytes', 'files'} totals for the source files under
+    base_dir. Binaries and files over max_file_bytes are left out; pass a
+    Counter as `skipped` to get their number per kind. Files are listed by
+    `source` (e.g. the git index, see file_source.py), by default a walk.
+    """
+    source = source or FilesystemSource(base_dir)
+    lang_stats = defaultdict(lambda: {'lines': 0, 'bytes': 0, 'files': 0})
+    # Optional fingerprint cache: line/byte counts are reused for unchanged files
+    version = f"{LINE_COUNT_VERSION}:{max_file_bytes}"
+    scope = cache.open_scope(f"lines:{os.path.abspath(base_dir)}", version) if cache else None
+    for root, _, files in profiled_iter('walk', source.walk(exclude=exclude)):
         for fname in files:
             ext = os.path.splitext(fname)[1].lower()
             lang = EXT_LANG_MAP.get(ext)
             if lang:
                 fpath = os.path.join(root, fname)
-                try:
-                    with open(fpath, 'r', encoding='utf-8', errors='ignore') as f:
-                        lines = f.readlines()
-                        lang_line_counts[lang] += len(lines)
-                except Exception as e:
-                    print(f"Warning: Could not read {fpath}: {e}")
+                counts = None
+                if scope is not None:
+                    fingerprint = source.fingerprint(fpath)
+                    counts = scope.get(fpath, fingerprint)
+                    if counts is not None:
+                        scope.keep(fpath)
+                if counts is None:
+                    try:
+                        with span('count lines') as sp:
+                            counts = count_lines(fpath, max_bytes=max_file_bytes)
+                            sp.add(files=1, bytes=counts[2])
+                    except Exception as e:
+                        print(f"Warning: Could not read {fpath}: {e}")
+                        continue
+                    if scope is not None:
+                        scope.put(fpath, fingerprint, list(counts))
+                kind, lines, size = counts
+                if kind != TEXT:
+                    if skipped is not None:
+                        skipped[kind] += 1
+                    continue
+                stats = lang_stats[lang]
+                stats['lines'] += lines
+                stats['bytes'] += size
+                stats['files'] += 1
+    if scope is not None:
+        scope.flush()
+    return dict(lang_stats)
+
+
+def scan_codebase(base_dir, exclude=None, cache=None, max_file_bytes=DEFAULT_MAX_FILE_BYTES, skipped=None,
+                  source=None):
+    lang_line_counts = defaultdict(int)
+    for lang, stats in scan_codebase_stats(base_dir, exclude=exclude, cache=cache, max_file_bytes=max_file_bytes,
+                                           skipped=skipped, source=source).items():
+        lang_line_counts[lang] = stats['lines']
     return lang_line_counts
 
 
-def get_dominant_language(lang_line_counts):
+def get_dominant_language(lang_line_counts, weight='lines'):
+    """
+    Language with the most lines. Also accepts scan_codebase_stats() output,
+    where weight picks 'lines', 'bytes' or 'files'.
+    """
     if not lang_line_counts:
         return None
-    return max(lang_line_counts.items(), key=lambda x: x[1])[0]
+    if weight not in LANG_WEIGHTS:
+        raise ValueError(f"Unknown weight {weight!r} (use one of {', '.join(LANG_WEIGHTS)})")
+
+    def score(item):
+        value = item[1]
+        return value[weight] if isinstance(value, dict) else value
+    return max(lang_line_counts.items(), key=score)[0]
 
 
 def fetch_ruleset(lang):
@@ -76,13 +181,6 @@ def fetch_ruleset(lang):
     return None
 
 
-def backup_existing_rules():
-    if os.path.isfile(WINDSURF_RULES):
-        backup_path = WINDSURF_RULES + '_OLD'
-        shutil.move(WINDSURF_RULES, backup_path)
-        print(f"Existing .windsurfrules backed up to {backup_path}")
-
-
 def find_codebase_dir(project_root):
     project_files = [
         'package.json', 'pom.xml', 'build.gradle', 'build.gradle.kts', 'requirements.txt',
@@ -108,264 +206,272 @@ def find_codebase_dir(project_root):
 
 
 def read_package_json(codebase_dir):
-    import json
-    pkg_json_path = os.path.join(codebase_dir, 'package.json')
-    if os.path.isfile(pkg_json_path):
-        with open(pkg_json_path, 'r', encoding='utf-8') as f:
-            try:
-                return json.load(f)
-            except Exception as e:
-                print(f"Could not parse package.json: {e}")
-    return {}
+    return ManifestIndex.load(codebase_dir, ['package.json']).document('package.json') or {}
+
+def build_key_inventory(codebase_dir, exclude=None, source=None):
+    # Pre-scan the codebase into an inventory of file names, extensions and dirs.
+    # Pruned dirs (node_modules, ignored trees) are still recorded by name.
+    inventory = FileInventory()
+    with span('walk') as sp:
+        walk = (source or FilesystemSource(codebase_dir)).walk(exclude=exclude, on_prune=inventory.add_dir)
+        for _, dirs, files in walk:
+            inventory.add_walk_entry(dirs, files)
+        sp.add(files=inventory.file_count)
+    return inventory
+
+def scan_for_keys_canonical(codebase_dir, keys, exclude=None, budget=None, source=None):
+    if budget is not None:
+        return scan_for_keys_budgeted(codebase_dir, keys, budget, exclude=exclude, source=source)
+    return detect_keys(codebase_dir, keys, build_key_inventory(codebase_dir, exclude=exclude, source=source))
+
+class _EveryFileInventory:
+    # A tree containing every possible file: keys detect_keys() rejects even here depend on manifests alone
+    def has_file(self, name):
+        return True
+    has_ext = has_dir = has_pattern = has_file
 
-def scan_for_keys_canonical(codebase_dir, keys):
+def scan_for_keys_budgeted(codebase_dir, keys, budget, exclude=None, source=None):
+    """
+    Breadth-first scan_for_keys_canonical() that stops once every key that can
+    still be detected is found, or the budget is spent. The outcome (stop
+    reason, decided and uncertain keys) is recorded on the budget.
+    """
+    budget.start()
+    manifests = ManifestIndex.load(codebase_dir)
+    budget.charge(bytes=manifests.bytes_read)
+    # Detectors only ever add keys as files appear, so these are the only keys a longer walk could add
+    open_keys = set(detect_keys(codebase_dir, keys, _EveryFileInventory(), manifests))
+    found = set()
+    inventory = FileInventory()
+    schedule = CheckSchedule()
+    stop_reason = SETTLED if not open_keys else budget.exhausted
+    walk = (source or FilesystemSource(codebase_dir)).walk(exclude=exclude, on_prune=inventory.add_dir,
+                                                          breadth_first=True)
+    with span('walk') as sp:
+        for _, dirs, files in walk if stop_reason is None else ():
+            inventory.add_walk_entry(dirs, files)
+            stop_reason = budget.charge(files=len(files))
+            if stop_reason is None and not schedule.due(inventory.file_count):
+                continue
+            pending = open_keys - found
+            found |= detect_keys(codebase_dir, [k for k in keys if k in pending], inventory, manifests)
+            if open_keys <= found:
+                stop_reason = stop_reason or SETTLED
+            if stop_reason is not None:
+                break
+        sp.add(files=inventory.file_count)
+    pending = open_keys - found
+    found |= detect_keys(codebase_dir, [k for k in keys if k in pending], inventory, manifests)
+    if stop_reason is None:
+        budget.finish(None, keys, ())
+    else:
+        budget.finish(stop_reason, found | (set(keys) - open_keys), open_keys - found)
+    return found
+
+def detect_keys(codebase_dir, keys, inventory, manifests=None):
+    # Only inventory lookups and one parse of the root build files, so a watcher can rerun this per change
     found_keys = set()
-    # Pre-scan the codebase for files, dirs, and package/dependency files
-    all_files = []
-    all_dirs = set()
-    for root, dirs, files in os.walk(codebase_dir):
-        for d in dirs:
-            all_dirs.add(d.lower())
-        for f in files:
-            all_files.append((root, f))
+    if manifests is None:
+        manifests = ManifestIndex.load(codebase_dir)
 
     # Helper: check if any file exists with a given name (case-insensitive)
     def file_exists(filename):
-        return any(f.lower() == filename.lower() for _, f in all_files)
+        return inventory.has_file(filename)
     # Helper: check if any file endswith ext
     def file_ext_exists(ext):
-        return any(f.lower().endswith(ext.lower()) for _, f in all_files)
+        return inventory.has_ext(ext)
     # Helper: check if any dir exists
     def dir_exists(dirname):
-        return dirname.lower() in all_dirs
+        return inventory.has_dir(dirname)
     # Helper: check if any file matches pattern
     def file_pattern_exists(pattern):
-        import fnmatch
-        return any(fnmatch.fnmatch(f.lower(), pattern.lower()) for _, f in all_files)
+        return inventory.has_pattern(pattern)
+    # Helper: check for a marker file that ignore files usually hide (.env), also directly in the root
+    def marker_exists(filename):
+        return file_exists(filename) or os.path.isfile(os.path.join(codebase_dir, filename))
     # Helper: check if a dependency exists in a package file
     def dep_in_package_json(dep):
-        pkg_json_path = os.path.join(codebase_dir, 'package.json')
-        if not os.path.isfile(pkg_json_path):
-            return False
-        import json
-        try:
-            with open(pkg_json_path, 'r', encoding='utf-8') as f:
-                pkg = json.load(f)
-            for section in ['dependencies', 'devDependencies', 'peerDependencies', 'optionalDependencies']:
-                deps = pkg.get(section, {})
-                if any(dep.lower() in d.lower() for d in deps):
-                    return True
-        except Exception:
-            pass
-        return False
+        return manifests.mentions(dep, ('package.json',))
 
 
     for key in keys:
-        k = key.lower()
-        # AL
-        if k == 'al':
-            if file_ext_exists('.al') or file_exists('app.json'):
-                found_keys.add(key)
-        # API
-        elif k == 'api':
-            if file_exists('openapi.yaml') or file_exists('swagger.yaml') or dir_exists('api') or file_pattern_exists('api*.*'):
-                found_keys.add(key)
-        # Java (enhanced detection for Maven and Gradle)
-        elif k == 'java':
-            import xml.etree.ElementTree as ET
-            java_detected = False
-            # Check for .java files or canonical build files
-            if file_ext_exists('.java') or file_exists('pom.xml') or file_exists('build.gradle') or file_exists('build.gradle.kts'):
-                java_detected = True
-            # Check Maven dependencies (pom.xml)
-            pom_path = os.path.join(codebase_dir, 'pom.xml')
-            if os.path.isfile(pom_path):
-                try:
-                    tree = ET.parse(pom_path)
-                    root = tree.getroot()
-                    ns = {'m': root.tag.split('}')[0].strip('{')} if '}' in root.tag else {}
-                    for dep in root.findall('.//m:dependency', ns) if ns else root.findall('.//dependency'):
-                        groupId = dep.find('m:groupId', ns).text if ns and dep.find('m:groupId', ns) is not None else (dep.find('groupId').text if dep.find('groupId') is not None else '')
-                        artifactId = dep.find('m:artifactId', ns).text if ns and dep.find('m:artifactId', ns) is not None else (dep.find('artifactId').text if dep.find('artifactId') is not None else '')
-                        for k2 in keys:
-                            if k2.lower() in groupId.lower() or k2.lower() in artifactId.lower():
-                                java_detected = True
-                                break
-                except Exception as e:
-                    print(f"Warning: Could not parse pom.xml for Java detection: {e}")
-            # Check Gradle dependencies (build.gradle, build.gradle.kts)
-            for gradle_file in ['build.gradle', 'build.gradle.kts']:
-                gradle_path = os.path.join(codebase_dir, gradle_file)
-                if os.path.isfile(gradle_path):
-                    try:
-                        with open(gradle_path, 'r', encoding='utf-8') as f:
-                            gradle_content = f.read().lower()
-                        for k2 in keys:
-                            if k2.lower() in gradle_content:
-                                java_detected = True
-                                break
-                    except Exception as e:
-                        print(f"Warning: Could not parse {gradle_file} for Java detection: {e}")
-            if java_detected:
-                found_keys.add(key)
-        # Accessibility
-        elif k == 'accessibility':
-            if file_exists('.accessibilityrc') or file_exists('axe.config.js'):
-                found_keys.add(key)
-        # Bloc
-        elif k == 'bloc':
-            if file_exists('pubspec.yaml'):
-                try:
-                    with open(os.path.join(codebase_dir, 'pubspec.yaml'), 'r', encoding='utf-8') as f:
-                        if any('bloc' in l.lower() for l in f):
-                            found_keys.add(key)
-                except Exception:
-                    pass
-        # CSS
-        elif k == 'css':
-            if file_ext_exists('.css') or file_exists('style.css') or dir_exists('styles') or dep_in_package_json('css'):
-                found_keys.add(key)
-        # Expo
-        elif k == 'expo':
-            if file_exists('app.json'):
-                try:
-                    with open(os.path.join(codebase_dir, 'app.json'), 'r', encoding='utf-8') as f:
-                        import json
-                        app = json.load(f)
-                        if 'expo' in app:
-                            found_keys.add(key)
-                except Exception:
-                    pass
-            elif dep_in_package_json('expo'):
-                found_keys.add(key)
-        # Function
-        elif k == 'function':
-            if dir_exists('functions') or file_pattern_exists('*.func.*'):
-                found_keys.add(key)
-        # Global
-        elif k == 'global':
-            if file_exists('globals.css') or file_exists('global.css') or dir_exists('global'):
-                found_keys.add(key)
-        # Go
-        elif k == 'go':
-            if file_exists('go.mod') or file_ext_exists('.go'):
-                found_keys.add(key)
-        # HTML
-        elif k == 'html':
-            if file_ext_exists('.html') or file_exists('index.html') or dir_exists('public'):
-                found_keys.add(key)
-        # IBC
-        elif k == 'ibc':
-            if file_exists('go.mod'):
-                try:
-                    with open(os.path.join(codebase_dir, 'go.mod'), 'r', encoding='utf-8') as f:
-                        if any('github.com/cosmos/ibc-go' in l for l in f):
-                            found_keys.add(key)
-                except Exception:
-                    pass
-
-        # JavaScript
-        elif k == 'javascript':
-            if file_ext_exists('.js') or dep_in_package_json('javascript'):
-                found_keys.add(key)
-        # Next.js
-        elif k == 'next.js':
-            if dep_in_package_json('next') or file_exists('next.config.js'):
-                found_keys.add(key)
-        # Node
-        elif k == 'node' or k == 'node.js':
-            if file_exists('package.json') or file_ext_exists('.js') or dir_exists('node_modules'):
-                found_keys.add(key)
-        # PHP
-        elif k == 'php':
-            if file_ext_exists('.php') or file_exists('composer.json'):
-                found_keys.add(key)
-        # Python
-        elif k == 'python':
-            if file_ext_exists('.py') or file_exists('requirements.txt') or file_exists('pyproject.toml') or file_exists('Pipfile') or file_exists('setup.py'):
-                found_keys.add(key)
-        # React
-        elif k == 'react':
-            if dep_in_package_json('react') or file_ext_exists('.jsx') or file_ext_exists('.tsx'):
-                found_keys.add(key)
-        # Ruby
-        elif k == 'ruby':
-            if file_ext_exists('.rb') or file_exists('Gemfile'):
-                found_keys.add(key)
-        # Rust
-        elif k == 'rust':
-            if file_exists('Cargo.toml') or file_ext_exists('.rs'):
-                found_keys.add(key)
-        # Security
-        elif k == 'security':
-            if file_exists('security.txt') or file_exists('.env') or file_exists('trivy.config') or file_exists('bandit.yaml'):
-                found_keys.add(key)
-        # Testing
-        elif k == 'testing':
-            if dir_exists('test') or dir_exists('tests') or file_pattern_exists('test_*.py') or file_pattern_exists('*.test.js') or file_exists('jest.config.js'):
-                found_keys.add(key)
-        # Transformer
-        elif k == 'transformer':
-            if dir_exists('transformers') or file_pattern_exists('transformer.*') or dep_in_package_json('transformer'):
-                found_keys.add(key)
-        # TypeScript
-        elif k == 'typescript':
-            if file_ext_exists('.ts') or file_ext_exists('.tsx') or dep_in_package_json('typescript') or file_exists('tsconfig.json'):
-                found_keys.add(key)
-        # Unity
-        elif k == 'unity':
-            if dir_exists('assets') or dir_exists('projectsettings') or file_ext_exists('.unity'):
-                found_keys.add(key)
-        # Zod
-        elif k == 'zod':
-            if dep_in_package_json('zod'):
-                found_keys.add(key)
-        # bootstrap
-        elif k == 'bootstrap':
-            if dep_in_package_json('bootstrap') or file_exists('bootstrap.css'):
-                found_keys.add(key)
-        # cpp
-        elif k == 'cpp':
-            if file_ext_exists('.cpp') or file_ext_exists('.hpp') or file_ext_exists('.cc') or file_ext_exists('.cxx') or file_exists('CMakeLists.txt'):
-                found_keys.add(key)
-        # ex
-        elif k == 'ex':
-            if file_ext_exists('.ex') or file_ext_exists('.exs'):
-                found_keys.add(key)
-        # fallback: generic extension, filename, or directory match
-        #else:
-            #if any(k in f.lower() for _, f in all_files) or any(k in d for d in all_dirs):
-                #found_keys.add(key)
+        with span(f'detect:{key}'):
+            k = key.lower()
+            # AL
+            if k == 'al':
+                if file_ext_exists('.al') or file_exists('app.json'):
+                    found_keys.add(key)
+            # API
+            elif k == 'api':
+                if file_exists('openapi.yaml') or file_exists('swagger.yaml') or dir_exists('api') or file_pattern_exists('api*.*'):
+                    found_keys.add(key)
+            # Java (enhanced detection for Maven and Gradle)
+            elif k == 'java':
+                # Any pom.xml/Gradle build counts; their dependencies are in the manifest index
+                java_detected = file_ext_exists('.java') or file_exists('pom.xml') or file_exists('build.gradle') or file_exists('build.gradle.kts')
+                if java_detected:
+                    found_keys.add(key)
+            # Accessibility
+            elif k == 'accessibility':
+                if file_exists('.accessibilityrc') or file_exists('axe.config.js'):
+                    found_keys.add(key)
+            # Bloc
+            elif k == 'bloc':
+                if manifests.mentions('bloc', ('pubspec.yaml',)):
+                    found_keys.add(key)
+            # CSS
+            elif k == 'css':
+                if file_ext_exists('.css') or file_exists('style.css') or dir_exists('styles') or dep_in_package_json('css'):
+                    found_keys.add(key)
+            # Expo
+            elif k == 'expo':
+                if manifests.has_manifest('app.json'):
+                    if manifests.has_dependency('expo', ('app.json',)):
+                        found_keys.add(key)
+                elif dep_in_package_json('expo'):
+                    found_keys.add(key)
+            # Function
+            elif k == 'function':
+                if dir_exists('functions') or file_pattern_exists('*.func.*'):
+                    found_keys.add(key)
+            # Global
+            elif k == 'global':
+                if file_exists('globals.css') or file_exists('global.css') or dir_exists('global'):
+                    found_keys.add(key)
+            # Go
+            elif k == 'go':
+                if file_exists('go.mod') or file_ext_exists('.go'):
+                    found_keys.add(key)
+            # HTML
+            elif k == 'html':
+                if file_ext_exists('.html') or file_exists('index.html') or dir_exists('public'):
+                    found_keys.add(key)
+            # IBC
+            elif k == 'ibc':
+                if manifests.mentions('github.com/cosmos/ibc-go', ('go.mod',)):
+                    found_keys.add(key)
+
+            # JavaScript
+            elif k == 'javascript':
+                if file_ext_exists('.js') or dep_in_package_json('javascript'):
+                    found_keys.add(key)
+            # Next.js
+            elif k == 'next.js':
+                if dep_in_package_json('next') or file_exists('next.config.js'):
+                    found_keys.add(key)
+            # Node
+            elif k == 'node' or k == 'node.js':
+                if file_exists('package.json') or file_ext_exists('.js') or dir_exists('node_modules'):
+                    found_keys.add(key)
+            # PHP
+            elif k == 'php':
+                if file_ext_exists('.php') or file_exists('composer.json'):
+                    found_keys.add(key)
+            # Python
+            elif k == 'python':
+                if file_ext_exists('.py') or file_exists('requirements.txt') or file_exists('pyproject.toml') or file_exists('Pipfile') or file_exists('setup.py'):
+                    found_keys.add(key)
+            # React
+            elif k == 'react':
+                if dep_in_package_json('react') or file_ext_exists('.jsx') or file_ext_exists('.tsx'):
+                    found_keys.add(key)
+            # Ruby
+            elif k == 'ruby':
+                if file_ext_exists('.rb') or file_exists('Gemfile'):
+                    found_keys.add(key)
+            # Rust
+            elif k == 'rust':
+                if file_exists('Cargo.toml') or file_ext_exists('.rs'):
+                    found_keys.add(key)
+            # Security
+            elif k == 'security':
+                if marker_exists('security.txt') or marker_exists('.env') or marker_exists('trivy.config') or marker_exists('bandit.yaml'):
+                    found_keys.add(key)
+            # Testing
+            elif k == 'testing':
+                if dir_exists('test') or dir_exists('tests') or file_pattern_exists('test_*.py') or file_pattern_exists('*.test.js') or file_exists('jest.config.js'):
+                    found_keys.add(key)
+            # Transformer
+            elif k == 'transformer':
+                if dir_exists('transformers') or file_pattern_exists('transformer.*') or dep_in_package_json('transformer'):
+                    found_keys.add(key)
+            # TypeScript
+            elif k == 'typescript':
+                if file_ext_exists('.ts') or file_ext_exists('.tsx') or dep_in_package_json('typescript') or file_exists('tsconfig.json'):
+                    found_keys.add(key)
+            # Unity
+            elif k == 'unity':
+                if dir_exists('assets') or dir_exists('projectsettings') or file_ext_exists('.unity'):
+                    found_keys.add(key)
+            # Zod
+            elif k == 'zod':
+                if dep_in_package_json('zod'):
+                    found_keys.add(key)
+            # bootstrap
+            elif k == 'bootstrap':
+                if dep_in_package_json('bootstrap') or file_exists('bootstrap.css'):
+                    found_keys.add(key)
+            # cpp
+            elif k == 'cpp':
+                if file_ext_exists('.cpp') or file_ext_exists('.hpp') or file_ext_exists('.cc') or file_ext_exists('.cxx') or file_exists('CMakeLists.txt'):
+                    found_keys.add(key)
+            # ex
+            elif k == 'ex':
+                if file_ext_exists('.ex') or file_ext_exists('.exs'):
+                    found_keys.add(key)
+            # fallback: generic extension, filename, or directory match
+            #else:
+                #if any(k in f.lower() for _, f in all_files) or any(k in d for d in all_dirs):
+                    #found_keys.add(key)
     return found_keys
 
-def fetch_rules_for_key_interactive(key):
-    import requests
+def rules_page_url(key):
+    return f"https://cursor.directory/rules/{key.lower()}"
+
+def list_rule_sources(key, session, fetch):
+    """Return (absolute .txt rule links, inline rule blocks) from key's cursor.directory page."""
     from bs4 import BeautifulSoup
-    url = f"https://cursor.directory/rules/{key.lower()}"
+    with span('fetch page', key=key) as sp:
+        html = fetch(session, rules_page_url(key), timeout=10)
+        sp.add(bytes=len(html))
+    soup = BeautifulSoup(html, 'html.parser')
+    # Gather all .txt links
+    rule_links = []
+    for a in soup.find_all('a', href=True):
+        if a['href'].lower().endswith('.txt'):
+            rule_links.append(f"https://cursor.directory{a['href']}" if a['href'].startswith('/') else a['href'])
+    rule_blocks = []
+    # Only gather <code class="text-sm block pr-3"> blocks
+    for code in soup.find_all('code', class_='text-sm block pr-3'):
+        if code.text.strip():
+            rule_blocks.append(code.text.strip())
+    return rule_links, rule_blocks
+
+def fetch_rules_for_key_interactive(key, session=None, fetch=None, prefetcher=None):
+    # With a RulePrefetcher the page and .txt rules are usually downloaded already
+    import requests
+    from rule_fetcher import fetch_text
+    session = session or requests.Session()
+    fetch = fetch or fetch_text
+    url = rules_page_url(key)
     print(f"Fetching rule(s) for {key} from {url}")
     accepted = []
     rejected = []
     try:
-        resp = requests.get(url, timeout=10)
-        resp.raise_for_status()
-        soup = BeautifulSoup(resp.text, 'html.parser')
-        # Gather all .txt links
-        rule_links = [a['href'] for a in soup.find_all('a', href=True) if a['href'].lower().endswith('.txt')]
-        rule_blocks = []
-        # Only gather <code class="text-sm block pr-3"> blocks
-        for code in soup.find_all('code', class_='text-sm block pr-3'):
-            if code.text.strip():
-                rule_blocks.append(code.text.strip())
+        if prefetcher is not None:
+            rule_links, rule_blocks = prefetcher.sources(key)
+        else:
+            rule_links, rule_blocks = list_rule_sources(key, session, fetch)
         # For .txt links, fetch content
         found = False
-        for link in rule_links:
-            rule_url = link
-            if rule_url.startswith('/'):
-                rule_url = f"https://cursor.directory{rule_url}"
+        for idx, rule_url in enumerate(rule_links):
             try:
-                rule_resp = requests.get(rule_url, timeout=10)
-                rule_resp.raise_for_status()
-                rule_content = rule_resp.text.strip()
+                if prefetcher is not None:
+                    rule_content = prefetcher.rule(key, rule_links, idx)
+                else:
+                    with span('fetch rule', key=key) as sp:
+                        rule_content = fetch(session, rule_url, timeout=10).strip()
+                        sp.add(bytes=len(rule_content))
                 preview = rule_content[:400].replace('\n', ' ')
                 green_preview = f"\033[92m{preview}\033[0m"
                 resp_in = input(f"Add this rule for {key} from .txt link? Preview: {green_preview}... [y/N]: ").strip().lower()
@@ -396,50 +502,111 @@ def fetch_rules_for_key_interactive(key):
     return accepted, rejected
 
 def write_windsurfrules(all_rules):
-    with open(WINDSURF_RULES, 'w', encoding='utf-8') as f:
-        f.write('\n\n'.join(all_rules))
+    # Streams to a temp file and atomically replaces WINDSURF_RULES (backing it up to _OLD);
+    # returns False and leaves the file alone when the content is unchanged
+    with StreamingRulesWriter(WINDSURF_RULES) as writer:
+        for rule in all_rules:
+            writer.add(rule)
+        return writer.commit()
 
-def main():
-    codebase_dir = find_codebase_dir(PROJECT_ROOT)
-    if not codebase_dir:
-        print("No project codebase found.")
-        return
+def main(argv=None):
+    global WINDSURF_RULES
+    args = parser.parse_args(argv)
+    if args.iscursor:
+        WINDSURF_RULES = os.path.join(PROJECT_ROOT, '.cursorrules')
+    start_from_args(args)
+    try:
+        generate(args)
+    finally:
+        finish_from_args(args)
+
+def generate(args):
     keys = KEYS
-    found_keys = scan_for_keys_canonical(codebase_dir, keys)
+    key_workspaces = {}
+    if args.workspaces:
+        from workspaces import ROOT, scan_workspace_keys, workspace_rule_targets
+        with span('scan'):
+            workspace_keys = scan_workspace_keys(PROJECT_ROOT, keys, exclude=args.exclude)
+        for name, ws_keys in workspace_keys.items():
+            print(f"Workspace {name}: {sorted(ws_keys)}")
+        found_keys = set().union(*workspace_keys.values())
+        # .windsurfrules cannot be scoped, so sections name the workspaces a key was found in
+        key_workspaces = {key: names for key, names in workspace_rule_targets(workspace_keys).items() if names != [ROOT]}
+    else:
+        codebase_dir = find_codebase_dir(PROJECT_ROOT)
+        if not codebase_dir:
+            print("No project codebase found.")
+            return
+        budget = budget_from_args(args)
+        with span('scan'):
+            source = file_source_from_args(args, codebase_dir)
+            print(f"Listing files from the {source.name}.")
+            found_keys = scan_for_keys_canonical(codebase_dir, keys, exclude=args.exclude, budget=budget,
+                                                 source=source)
+        if budget is not None:
+            budget.print_report()
     if not found_keys:
         print("No matching frameworks/languages found in codebase or dependencies.")
         return
     print(f"Matched keys: {sorted(found_keys)}")
 
+    # One pooled session for every page/.txt download, revalidated against the local HTTP cache
+    from http_cache import HttpCache, make_cached_fetch
+    from rule_fetcher import make_session
+    session = make_session()
+    fetch = make_cached_fetch(HttpCache(max_bytes=int(args.http_cache_max_mb * 1024 * 1024)), offline=args.offline)
+    # Every matched key's page and first .txt rules download in the background while the prompts run
+    prefetcher = None
+    if args.prefetch_workers > 0:
+        from rule_prefetch import RulePrefetcher
+        prefetcher = RulePrefetcher(sorted(found_keys), session, fetch, list_rule_sources,
+                                    workers=args.prefetch_workers)
+    try:
+        prompt_keys(sorted(found_keys), session, fetch, prefetcher, key_workspaces)
+    finally:
+        if prefetcher is not None:
+            prefetcher.close()
+            prefetcher.print_report()
+
+def prompt_keys(keys, session, fetch, prefetcher, key_workspaces):
     accepted_keys = []
     rejected_keys = []
-    all_rules = []
     accepted_rules_summary = {}
     rejected_rules_summary = {}
-    for key in sorted(found_keys):
-        resp = input(f"Add rules for {key}? [y/N]: ").strip().lower()
-        if resp == 'y':
-            accepted, rejected = fetch_rules_for_key_interactive(key)
-            if accepted:
-                for rule_content in accepted:
-                    all_rules.append(f"# {key}\n{rule_content}")
-                accepted_keys.append(key)
-                accepted_rules_summary[key] = len(accepted)
+    # Accepted rules are streamed straight to a temp file next to the output
+    with StreamingRulesWriter(WINDSURF_RULES) as writer:
+        for key in keys:
+            resp = input(f"Add rules for {key}? [y/N]: ").strip().lower()
+            if resp == 'y':
+                accepted, rejected = fetch_rules_for_key_interactive(key, session=session, fetch=fetch,
+                                                                     prefetcher=prefetcher)
+                if accepted:
+                    header = f"# {key} ({', '.join(key_workspaces[key])})" if key in key_workspaces else f"# {key}"
+                    for rule_content in accepted:
+                        writer.add(f"{header}\n{rule_content}")
+                    accepted_keys.append(key)
+                    accepted_rules_summary[key] = len(accepted)
+                else:
+                    print(f"No rules accepted for {key}.")
+                    rejected_keys.append(key)
+                if rejected:
+                    rejected_rules_summary[key] = len(rejected)
             else:
-                print(f"No rules accepted for {key}.")
                 rejected_keys.append(key)
-            if rejected:
-                rejected_rules_summary[key] = len(rejected)
-        else:
-            rejected_keys.append(key)
-    if not all_rules:
-        print("No rules found for any accepted keys. No .windsurfrules written.")
-        print(f"Accepted: {accepted_keys}")
-        print(f"Rejected: {rejected_keys}")
-        return
-    backup_existing_rules()
-    write_windsurfrules(all_rules)
-    print(f".windsurfrules written for: {', '.join(accepted_keys)}.")
+            if prefetcher is not None:
+                # Rejected, or a rule was chosen: the key's queued downloads are not needed any more
+                prefetcher.cancel(key)
+        if not writer.count:
+            print("No rules found for any accepted keys. No .windsurfrules written.")
+            print(f"Accepted: {accepted_keys}")
+            print(f"Rejected: {rejected_keys}")
+            return
+        with span('write', rules=writer.count):
+            changed = writer.commit()
+    if changed:
+        print(f".windsurfrules written for: {', '.join(accepted_keys)}.")
+    else:
+        print(f".windsurfrules already up to date for: {', '.join(accepted_keys)}.")
     print(f"Accepted: {accepted_keys} (rules per key: {accepted_rules_summary})")
     print(f"Rejected: {rejected_keys} (rejected rules per key: {rejected_rules_summary})")
 
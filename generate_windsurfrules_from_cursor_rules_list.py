@@ -16,12 +16,26 @@ import os
 import sys
 import requests
 import yaml
-import re
 import shutil
 from pathlib import Path
-from collections import defaultdict
+from collections import Counter, defaultdict
 import argparse
 
+from content_sniffer import sniff_paths, sniff_snippet, snippet_lines, DEFAULT_SNIFF_WORKERS
+from detection_table import get_detection_table
+from file_classifier import DEFAULT_MAX_FILE_BYTES, TEXT, format_skips
+from file_source import FilesystemSource, add_file_source_arguments, file_source_from_args
+from profiler import add_profile_arguments, finish_from_args, profiled_iter, span, start_from_args
+from github_catalog import DEFAULT_REF, read_catalog_file, sync_catalog
+from http_cache import DEFAULT_MAX_BYTES, HttpCache, make_cached_fetch
+from manifest_index import ManifestIndex, dependency_frameworks
+from rule_catalog import RulesMap, add_catalog_arguments, catalog_from_args
+from rule_fetcher import fetch_text, make_session
+from rule_frontmatter import convert_frontmatter_for_windsurf, dump_frontmatter, parse_frontmatter_and_content, update_references
+from scan_budget import SETTLED, add_budget_arguments, budget_from_args
+from scan_cache import DEFAULT_CACHE_PATH, ScanCache
+from workspaces import ROOT, scan_workspace_tech, scoped_rule, scoped_rule_name, workspace_rule_targets
+
 # --- Constants from fetch_and_convert_cursor_rules_to_windsurf.py --- 
 REPO_OWNER = "sanjeed5"
 REPO_NAME = "awesome-cursor-rules-mdc"
@@ -33,85 +47,93 @@ import json
 
 PROJECT_ROOT = Path(os.path.dirname(os.path.abspath(__file__)))
 
-# Load detection maps from codeMaps directory
+# Detection maps live in the codeMaps directory; detection_table compiles and caches them
 CODEMAPS_DIR = PROJECT_ROOT / "codeMaps"
-with open(CODEMAPS_DIR / "language_detection.json") as f:
-    LANGUAGE_DETECTION = json.load(f)
-with open(CODEMAPS_DIR / "framework_detection.json") as f:
-    FRAMEWORK_DETECTION = json.load(f)
-with open(CODEMAPS_DIR / "tool_detection.json") as f:
-    TOOL_DETECTION = json.load(f)
 
 # --- Helper Functions (adapted from both scripts) ---
 
-def preprocess_frontmatter(lines):
-    new_lines = []
-    for line in lines:
-        m = re.match(r'^(\s*globs\s*:\s*)([^\[\"\n][^\n]*)$', line)
-        if m:
-            prefix, value = m.groups()
-            value = value.strip()
-            if not value.startswith('[') and not (value.startswith('"') or value.startswith("'")):
-                value = f'"{value}"'
-            new_lines.append(f'{prefix}{value}\n')
-        else:
-            new_lines.append(line)
-    return new_lines
-
-def parse_frontmatter_and_content(text):
-    lines = text.splitlines(keepends=True)
-    if not lines or not lines[0].strip().startswith('---'):
-        return { }, ''.join(lines)
-    fm_end = None
-    for i in range(1, len(lines)):
-        if lines[i].strip().startswith('---'):
-            fm_end = i
-            break
-    if fm_end is None:
-        return { }, ''.join(lines)
-    frontmatter_lines = preprocess_frontmatter(lines[1:fm_end])
-    frontmatter = yaml.safe_load(''.join(frontmatter_lines)) or { }
-    content = ''.join(lines[fm_end+1:])
-    return frontmatter, content
-
-def convert_frontmatter_for_windsurf(fm):
-    new_fm = {}
-    if fm.get('alwaysApply', False) is True or fm.get('alwaysApply', 'false') == 'true':
-        new_fm['trigger'] = 'always_on'
-        if 'globs' in fm:
-            new_fm['globs'] = fm['globs']
-    elif 'globs' in fm:
-        new_fm['trigger'] = 'glob'
-        new_fm['globs'] = fm['globs']
-    if 'description' in fm:
-        new_fm['description'] = fm['description']
-    return new_fm
-
-def update_references_in_content(content):
-    return content.replace('Cursor', 'Windsurf')
-
-def fetch_github_file_list(token, owner, repo, path):
+def fetch_github_file_list(token, owner, repo, path, session=None, fetch=None):
     url = f"{GITHUB_API}/repos/{owner}/{repo}/contents/{path}"
-    headers = {"Authorization": f"token {token}", "Accept": "application/vnd.github.v3+json"}
+    headers = {"Accept": "application/vnd.github.v3+json"}
+    session = session or make_session(token)
+    fetch = fetch or fetch_text
     try:
-        r = requests.get(url, headers=headers, timeout=10)
-        r.raise_for_status()
-        return {item['name'].replace('.mdc', ''): item for item in r.json() if item['type'] == 'file' and item['name'].endswith('.mdc')}
+        items = json.loads(fetch(session, url, timeout=10, headers=headers))
+        return {item['name'].replace('.mdc', ''): item for item in items if item['type'] == 'file' and item['name'].endswith('.mdc')}
     except requests.exceptions.RequestException as e:
         print(f"Error fetching file list from GitHub: {e}")
         return None
 
-def fetch_github_file_content(token, file_info):
+def fetch_github_file_content(token, file_info, session=None, fetch=None):
     url = file_info['download_url']
-    headers = {"Authorization": f"token {token}"}
+    session = session or make_session(token)
+    fetch = fetch or fetch_text
     try:
-        r = requests.get(url, headers=headers, timeout=10)
-        r.raise_for_status()
-        return r.text
+        with span('fetch rule') as sp:
+            text = fetch(session, url, timeout=10)
+            sp.add(bytes=len(text))
+        return text
     except requests.exceptions.RequestException as e:
         print(f"Error fetching file content for {file_info['name']}: {e}")
         return None
 
+def catalog_source(bulk=False, ref=DEFAULT_REF):
+    """Key of a catalog listing in the local RuleCatalog store."""
+    return f"{REPO_OWNER}/{REPO_NAME}/{RULES_PATH}@{ref}" + (":bulk" if bulk else "")
+
+def list_rules_catalog(token, session=None, fetch=None, bulk=False, ref=DEFAULT_REF, offline=False):
+    """{rule name: file info} as listed upstream, or None if it could not be fetched."""
+    if not bulk:
+        return fetch_github_file_list(token, REPO_OWNER, REPO_NAME, RULES_PATH, session=session, fetch=fetch)
+    try:
+        catalog = sync_catalog(session or make_session(token), REPO_OWNER, REPO_NAME, RULES_PATH, ref=ref,
+                               fetch=fetch, offline=offline)
+        return {name.replace('.mdc', ''): item for name, item in catalog.items()}
+    except requests.exceptions.RequestException as e:
+        print(f"Error syncing rule catalog from GitHub: {e}")
+        return None
+
+def fetch_rules_catalog(token, session=None, fetch=None, bulk=False, ref=DEFAULT_REF, offline=False,
+                        store=None, max_age=None):
+    """
+    Return a RulesMap ({rule name: file info} with alias lookups) for the
+    catalog, or None if it could not be fetched. With a RuleCatalog store, a
+    listing younger than max_age seconds (or any stored listing when offline)
+    is served locally; otherwise the new listing is synced into the store.
+    """
+    source = catalog_source(bulk, ref)
+    if store is not None and (offline or store.is_fresh(source, max_age)):
+        stored = store.rules_map(source)
+        if stored:
+            print(f"Using the local rule catalog ({len(stored)} rules).")
+            return stored
+    with span('catalog list'):
+        listing = list_rules_catalog(token, session=session, fetch=fetch, bulk=bulk, ref=ref, offline=offline)
+    if store is None:
+        return RulesMap(listing) if listing is not None else None
+    if listing is None:
+        # Upstream unreachable: an outdated local listing beats none
+        stored = store.rules_map(source)
+        return stored or None
+    with span('catalog store'):
+        counts = store.sync(source, listing)
+    print(f"Rule catalog: {counts['added']} added, {counts['updated']} updated, {counts['removed']} removed.")
+    return store.rules_map(source)
+
+def find_rule_for_tech(available_rules_map, tech_key):
+    # Try to find a direct match (e.g., 'python' for 'python.mdc')
+    # More sophisticated mapping might be needed if tech_key doesn't match filename stem
+    rule_file_info = available_rules_map.get(tech_key)
+    # Try common variations if direct match fails (e.g. Node.js -> nodejs)
+    if not rule_file_info:
+        rule_file_info = available_rules_map.get(tech_key.lower().replace('.',''))
+    if not rule_file_info:
+        rule_file_info = available_rules_map.get(tech_key.capitalize())
+    # Catalog maps also resolve aliases and near misses (e.g. 'spring-boot' -> 'springboot')
+    if not rule_file_info and isinstance(available_rules_map, RulesMap):
+        rule_file_info = available_rules_map.find(tech_key)
+    return rule_file_info
+
 # --- Codebase Scanning Logic (from original generate_windsurfrules.py) ---
 def find_codebase_dir(start_dir):
     # Simplified: Assumes script is run from project root or one level above.
@@ -125,181 +147,324 @@ def find_codebase_dir(start_dir):
              return potential_dir
     return start_dir # Default to current if no better found
 
-def scan_for_languages_and_tech(base_dir):
-    detected_langs = set()
-    detected_frameworks = set()
-    detected_tools = set()
-    known_extensions = set()
-    # Collect all extensions from language detection JSON
-    for lang, data in LANGUAGE_DETECTION.items():
-        known_extensions.update(data.get("extensions", []))
-    # Also add extensions from legacy EXT_LANG_MAP for backward compatibility
-    legacy_ext_map = {
-        '.py': 'python', '.js': 'javascript', '.jsx': 'javascript', '.ts': 'typescript', '.tsx': 'typescript',
-        '.java': 'java', '.rb': 'ruby', '.go': 'go', '.php': 'php', '.rs': 'rust', '.cpp': 'cpp', '.c': 'c',
-        '.cs': 'csharp', '.swift': 'swift', '.kt': 'kotlin', '.scala': 'scala', '.sh': 'shell',
-    }
-    known_extensions.update(legacy_ext_map.keys())
-    # Build reverse maps for quick lookup
-    ext_to_lang = {ext: lang for lang, data in LANGUAGE_DETECTION.items() for ext in data.get("extensions", [])}
-    ext_to_lang.update(legacy_ext_map)
-    # Prepare filename and build file lookup
-    special_filenames = set()
-    for lang, data in LANGUAGE_DETECTION.items():
-        special_filenames.update(data.get("filenames", []))
-        special_filenames.update(data.get("build_files", []))
-    for fw, data in FRAMEWORK_DETECTION.items():
-        special_filenames.update(data.get("build_files", []))
-    for tool, data in TOOL_DETECTION.items():
-        special_filenames.update(data.get("build_files", []))
-        special_filenames.update(data.get("filenames", []))
-    # Scan files
-    for root, _, files in os.walk(base_dir):
-        # Avoid scanning .git, node_modules, venv, __pycache__, etc.
-        if any(skip in root for skip in ['.git', 'node_modules', 'venv', '__pycache__']):
-            continue
-        for fname in files:
-            ext = os.path.splitext(fname)[1].lower()
-            if ext in known_extensions:
-                lang = ext_to_lang.get(ext)
-                if lang:
-                    detected_langs.add(lang)
-            # Check for special filenames/build files
-            if fname in special_filenames:
-                # Try to match to a language, framework, or tool
-                for lang, data in LANGUAGE_DETECTION.items():
-                    if fname in data.get("filenames", []) or fname in data.get("build_files", []):
-                        detected_langs.add(lang)
-                for fw, data in FRAMEWORK_DETECTION.items():
-                    if fname in data.get("build_files", []):
-                        detected_frameworks.add(fw)
-                for tool, data in TOOL_DETECTION.items():
-                    if fname in data.get("build_files", []) or fname in data.get("filenames", []):
-                        detected_tools.add(tool)
+def filename_tech(table, fname):
+    """(langs, frameworks, tools) implied by a file's extension and special filename alone."""
+    langs, frameworks, tools = set(), set(), set()
+    lang = table.ext_to_lang.get(os.path.splitext(fname)[1].lower())
+    if lang:
+        langs.add(lang)
+    # Check for special filenames/build files
+    special = table.lookup_filename(fname)
+    if special:
+        langs.update(special[0])
+        frameworks.update(special[1])
+        tools.update(special[2])
+    return langs, frameworks, tools
+
+def file_tech(table, file_path, snippet=None):
+    """(langs, frameworks, tools) for one file: its name plus its head/tail snippet, if any."""
+    langs, frameworks, tools = filename_tech(table, os.path.basename(file_path))
+    if snippet is not None:
+        snippet_langs, snippet_frameworks, snippet_tools = table.matcher.match_snippet(*snippet_lines(snippet))
+        langs.update(snippet_langs)
+        frameworks.update(snippet_frameworks)
+        tools.update(snippet_tools)
+    return langs, frameworks, tools
+
+def iter_file_tech(base_dir, paths=None, sniff_workers=None, exclude=None, cache=None,
+                   max_file_bytes=DEFAULT_MAX_FILE_BYTES, skipped=None, budget=None, breadth_first=False, source=None):
+    """
+    Yield (file path, set of langs | frameworks | tools) for every file under
+    base_dir listed by `source` (default: a filesystem walk), or for the given
+    paths iterator (e.g. a walk shared with other consumers). Binaries and files over max_file_bytes are only matched by
+    name and counted per kind in `skipped`. Files and bytes read are charged
+    to `budget`, and the scan ends once one of its limits is spent.
+    """
+    skipped = Counter() if skipped is None else skipped
+    # Compiled codeMaps indexes (extension/filename lookups and the marker matcher)
+    table = get_detection_table()
+    matcher = table.matcher
+    # Optional fingerprint cache: sniffed facts are reused for unchanged files
+    # (the size cap is part of the version: it decides which files are read at all)
+    version = f"{table.fingerprint}:{max_file_bytes}"
+    scope = cache.open_scope(f"sniff:{os.path.abspath(base_dir)}", version) if cache else None
+    source = source or FilesystemSource(base_dir)
+    if paths is None:
+        paths = profiled_iter('walk', source.iter_files(exclude=exclude, breadth_first=breadth_first))
+
+    def read(path):
+        # Runs on the sniffing workers: (kind, fingerprint, cached facts or None, snippet)
+        if scope is None:
+            kind, snippet = _sniff(path)
+            return kind, None, None, snippet
+        fingerprint = source.fingerprint(path)
+        facts = scope.get(path, fingerprint)
+        if facts is not None:
+            return TEXT, fingerprint, facts, None
+        kind, snippet = _sniff(path)
+        return kind, fingerprint, None, snippet
+
+    def _sniff(path):
+        with span('sniff') as sp:
+            kind, snippet = sniff_snippet(path, max_file_bytes)
+            sp.add(files=1, bytes=len(snippet[0]) + len(snippet[1]) if snippet else 0)
+        return kind, snippet
+
+    # Scan files: a walker thread feeds paths to a pool of sniffing workers.
+    # The walker prunes .git, node_modules, venv, __pycache__ and ignored trees.
+    complete = False
+    try:
+        for file_path, (kind, fingerprint, facts, snippet) in sniff_paths(paths, workers=sniff_workers, reader=read):
+            langs, frameworks, tools = filename_tech(table, os.path.basename(file_path))
+            tech = langs | frameworks | tools
             # Check for shebangs and modelines in scripts
-            try:
-                file_path = os.path.join(root, fname)
-                with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    lines = [f.readline() for _ in range(5)] # Read first 5 lines
-                    f.seek(0, os.SEEK_END)
-                    if f.tell() > 0:
-                        f.seek(max(f.tell() - 200, 0))
-                        tail_lines = f.readlines()[-5:]
-                    else:
-                        tail_lines = []
-                # Shebang detection
-                for line in lines:
-                    if line.startswith('#!'):
-                        for lang, data in LANGUAGE_DETECTION.items():
-                            if any(shebang in line for shebang in data.get("shebangs", [])):
-                                detected_langs.add(lang)
-                # Modeline detection
-                for line in lines + tail_lines:
-                    for lang, data in LANGUAGE_DETECTION.items():
-                        if any(modeline in line for modeline in data.get("modelines", [])):
-                            detected_langs.add(lang)
-                # Framework marker detection
-                for fw, data in FRAMEWORK_DETECTION.items():
-                    if any(marker in l for l in lines for marker in data.get("markers", [])):
-                        detected_frameworks.add(fw)
-                # Tool marker detection
-                for tool, data in TOOL_DETECTION.items():
-                    if any(marker in l for l in lines for marker in data.get("markers", [])):
-                        detected_tools.add(tool)
-            except Exception:
-                continue
-    # Also check for dependency markers in build files (e.g., spring-boot in pom.xml)
-    # This can be expanded for more robust detection.
-    return list(detected_langs | detected_frameworks | detected_tools)
+            if facts is not None:
+                scope.keep(file_path)
+            elif snippet is None:
+                # Binary, oversized or unreadable: matched by name only
+                skipped[kind] += 1
+            else:
+                lines, tail_lines = snippet_lines(snippet)
+                # Shebang, modeline and framework/tool marker detection in one pass
+                langs, frameworks, tools = matcher.match_snippet(lines, tail_lines)
+                facts = [sorted(langs), sorted(frameworks), sorted(tools)]
+                if scope is not None:
+                    scope.put(file_path, fingerprint, facts)
+            if facts is not None:
+                for part in facts:
+                    tech.update(part)
+            yield file_path, tech
+            read_bytes = len(snippet[0]) + len(snippet[1]) if snippet else 0
+            if budget is not None and budget.charge(files=1, bytes=read_bytes):
+                return
+        complete = True
+    finally:
+        if scope is not None:
+            # A scan that stopped early has not seen every file, so no cached row is pruned
+            scope.flush(prune=complete)
+
+def scan_for_languages_and_tech(base_dir, sniff_workers=None, exclude=None, cache=None,
+                                max_file_bytes=DEFAULT_MAX_FILE_BYTES, skipped=None, budget=None, targets=None,
+                                source=None):
+    """
+    Detected languages, frameworks and tools. Binaries and files over
+    max_file_bytes are only matched by name; pass a Counter as `skipped` to
+    get the number of files skipped per kind.
+
+    With a ScanBudget the tree is walked breadth first and the scan stops
+    once every name in `targets` (e.g. the techs that have a rule) is found
+    or a budget limit is spent; the outcome is recorded on the budget.
+
+    Files are listed by `source` (see file_source.py), by default a walk.
+    """
+    table = get_detection_table()
+    # Frameworks declared as dependencies in the root build files (e.g. spring-boot-starter-web in pom.xml)
+    manifests = ManifestIndex.load(base_dir)
+    detected = dependency_frameworks(table.framework_detection, manifests)
+    if budget is None:
+        for _, tech in iter_file_tech(base_dir, sniff_workers=sniff_workers, exclude=exclude, cache=cache,
+                                      max_file_bytes=max_file_bytes, skipped=skipped, source=source):
+            detected.update(tech)
+        return list(detected)
+
+    budget.start()
+    budget.charge(bytes=manifests.bytes_read)
+    wanted = {t.lower() for t in targets} if targets is not None else table.tech_names()
+    remaining = wanted - detected
+    stop_reason = SETTLED if targets is not None and not remaining else budget.exhausted
+    if stop_reason is None:
+        files = iter_file_tech(base_dir, sniff_workers=sniff_workers, exclude=exclude, cache=cache,
+                               max_file_bytes=max_file_bytes, skipped=skipped, budget=budget, breadth_first=True,
+                               source=source)
+        for _, tech in files:
+            detected.update(tech)
+            remaining -= tech
+            if targets is not None and not remaining:
+                stop_reason = SETTLED
+                break
+        # Stops the sniffing threads and flushes the scan cache
+        files.close()
+        stop_reason = stop_reason or budget.exhausted
+    if stop_reason is None:
+        budget.finish(None, wanted | detected, ())
+    else:
+        budget.finish(stop_reason, detected, remaining)
+    return list(detected)
+
+def detectable_rule_tech(available_rules_map):
+    """The techs a scan can report that have a rule in the catalog: finding all of them settles a budgeted scan."""
+    return {tech for tech in get_detection_table().tech_names() if find_rule_for_tech(available_rules_map, tech)}
 
 # Replace calls to scan_for_languages with scan_for_languages_and_tech in main()
 
 # --- Main Application Logic ---
 def main():
+    parser = argparse.ArgumentParser(description="Detect technologies in the codebase and add matching Windsurf rules.")
+    parser.add_argument('--sniff-workers', type=int, default=DEFAULT_SNIFF_WORKERS,
+                        help=f'Number of threads reading file head/tail snippets (default: {DEFAULT_SNIFF_WORKERS}, 1 = serial)')
+    parser.add_argument('--exclude', action='append', default=[], metavar='GLOB',
+                        help='Gitignore-style pattern to skip while scanning (repeatable), e.g. --exclude dist/')
+    parser.add_argument('--max-file-mb', type=float, default=DEFAULT_MAX_FILE_BYTES / (1024 * 1024),
+                        help='Only match larger files by name instead of reading them')
+    parser.add_argument('--workspaces', action='store_true',
+                        help='Scan every monorepo workspace and scope its rules to it with glob triggers')
+    parser.add_argument('--scan-cache', nargs='?', const=DEFAULT_CACHE_PATH, default=None, metavar='PATH',
+                        help=f'Reuse per-file detection results for unchanged files (default path: {DEFAULT_CACHE_PATH})')
+    parser.add_argument('--offline', action='store_true', help='Serve rules only from the local HTTP cache')
+    parser.add_argument('--http-cache-max-mb', type=float, default=DEFAULT_MAX_BYTES / (1024 * 1024),
+                        help='Size cap of the local HTTP cache; least recently used entries are evicted '
+                             f'(default: {DEFAULT_MAX_BYTES // (1024 * 1024)})')
+    parser.add_argument('--bulk', action='store_true',
+                        help='Sync the rule catalog via the recursive git tree and a tarball into a local mirror')
+    parser.add_argument('--ref', default=DEFAULT_REF, help=f'Catalog branch or tag for --bulk (default: {DEFAULT_REF})')
+    parser.add_argument('--search-rules', metavar='QUERY',
+                        help='List catalog rules matching QUERY in their name, description, globs or text, then exit')
+    add_catalog_arguments(parser)
+    add_budget_arguments(parser)
+    add_file_source_arguments(parser)
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    start_from_args(args)
+    try:
+        generate(args)
+    finally:
+        finish_from_args(args)
+
+def generate(args):
     github_token = os.environ.get('GITHUB_TOKEN')
-    if not github_token:
+    if not github_token and not args.offline:
         print("Error: GITHUB_TOKEN environment variable not set.")
         sys.exit(1)
 
-    print("Fetching list of available rules from GitHub...")
-    available_rules_map = fetch_github_file_list(github_token, REPO_OWNER, REPO_NAME, RULES_PATH)
-    if available_rules_map is None:
-        sys.exit(1)
-    print(f"Found {len(available_rules_map)} rules available in the GitHub repository.")
+    session = make_session(github_token)
+    http_cache = HttpCache(max_bytes=int(args.http_cache_max_mb * 1024 * 1024))
+    fetch = make_cached_fetch(http_cache, offline=args.offline)
+
+    catalog_store, catalog_max_age = catalog_from_args(args)
+    with catalog_store:
+        catalog_key = catalog_source(args.bulk, args.ref)
+        print("Fetching list of available rules from GitHub...")
+        with span('catalog fetch'):
+            available_rules_map = fetch_rules_catalog(github_token, session=session, fetch=fetch, bulk=args.bulk,
+                                                      ref=args.ref, offline=args.offline, store=catalog_store,
+                                                      max_age=catalog_max_age)
+        if available_rules_map is None:
+            sys.exit(1)
+        print(f"Found {len(available_rules_map)} rules available in the GitHub repository.")
+        if args.search_rules:
+            for name, description in catalog_store.search(catalog_key, args.search_rules):
+                print(f"  {name}: {description}" if description else f"  {name}")
+            return
 
-    codebase_dir_to_scan = find_codebase_dir(PROJECT_ROOT) 
-    print(f"Scanning codebase at: {codebase_dir_to_scan}")
+        codebase_dir_to_scan = PROJECT_ROOT if args.workspaces else find_codebase_dir(PROJECT_ROOT)
+        print(f"Scanning codebase at: {codebase_dir_to_scan}")
     
-    detected_tech = scan_for_languages_and_tech(codebase_dir_to_scan)
-    # Add more sophisticated framework detection here if needed, 
-    # then map to rule names (e.g. 'react' might map to 'React.mdc')
-    # For now, detected_tech contains language names like 'python', 'javascript', plus frameworks/tools
-
-    if not detected_tech:
-        print("No supported languages/frameworks/tools found in the codebase.")
-        return
-
-    print(f"\nDetected technologies in your project: {', '.join(sorted(detected_tech))}")
-
-    TARGET_DIR.mkdir(parents=True, exist_ok=True)
-    accepted_rules_count = 0
-    written_files_summary = []
-
-    for tech_key in sorted(detected_tech):
-        # Try to find a direct match (e.g., 'python' for 'python.mdc')
-        # More sophisticated mapping might be needed if tech_key doesn't match filename stem
-        rule_file_info = available_rules_map.get(tech_key) 
-        # Try common variations if direct match fails (e.g. Node.js -> nodejs)
-        if not rule_file_info:
-            rule_file_info = available_rules_map.get(tech_key.lower().replace('.',''))
-        if not rule_file_info:
-            rule_file_info = available_rules_map.get(tech_key.capitalize())
-        
-        if rule_file_info:
-            print(f"\n--- {tech_key.capitalize()} --- ")
-            resp = input(f"A rule for '{tech_key}' is available. Add it to .windsurf/rules/{tech_key}.md? [y/N]: ").strip().lower()
-            if resp == 'y':
-                print(f"Fetching and converting rule for {tech_key}...")
-                mdc_content = fetch_github_file_content(github_token, rule_file_info)
-                if mdc_content:
-                    fm, content = parse_frontmatter_and_content(mdc_content)
-                    new_fm = convert_frontmatter_for_windsurf(fm)
-                    new_content = update_references_in_content(content)
+        scan_cache = ScanCache(args.scan_cache) if args.scan_cache else None
+        skipped = Counter()
+        # Where each key's rule goes: ROOT (unscoped) or the workspaces it was found in
+        rule_targets = {}
+        try:
+            with span('scan'):
+                if args.workspaces:
+                    workspace_tech = scan_workspace_tech(codebase_dir_to_scan, exclude=args.exclude,
+                                                         sniff_workers=args.sniff_workers, cache=scan_cache,
+                                                         max_file_bytes=int(args.max_file_mb * 1024 * 1024),
+                                                         skipped=skipped)
+                    for name, tech in workspace_tech.items():
+                        print(f"Workspace {name}: {', '.join(sorted(tech)) or '-'}")
+                    detected_tech = set().union(*workspace_tech.values())
+                    rule_targets = workspace_rule_targets(workspace_tech)
+                else:
+                    # Budgeted scans stop once every tech with a catalog rule is found
+                    budget = budget_from_args(args)
+                    file_source = file_source_from_args(args, codebase_dir_to_scan)
+                    print(f"Listing files from the {file_source.name}.")
+                    detected_tech = scan_for_languages_and_tech(codebase_dir_to_scan, sniff_workers=args.sniff_workers,
+                                                                exclude=args.exclude, cache=scan_cache,
+                                                                max_file_bytes=int(args.max_file_mb * 1024 * 1024),
+                                                                skipped=skipped, budget=budget,
+                                                                targets=detectable_rule_tech(available_rules_map)
+                                                                if budget else None, source=file_source)
+                    if budget is not None:
+                        budget.print_report()
+        finally:
+            if scan_cache:
+                scan_cache.close()
+        if skipped:
+            print(f"Matched by name only (not read): {format_skips(skipped)} files")
+        # Add more sophisticated framework detection here if needed, 
+        # then map to rule names (e.g. 'react' might map to 'React.mdc')
+        # For now, detected_tech contains language names like 'python', 'javascript', plus frameworks/tools
+
+        if not detected_tech:
+            print("No supported languages/frameworks/tools found in the codebase.")
+            return
+
+        print(f"\nDetected technologies in your project: {', '.join(sorted(detected_tech))}")
+
+        TARGET_DIR.mkdir(parents=True, exist_ok=True)
+        accepted_rules_count = 0
+        written_files_summary = []
+
+        for tech_key in sorted(detected_tech):
+            rule_file_info = find_rule_for_tech(available_rules_map, tech_key)
+            if rule_file_info:
+                print(f"\n--- {tech_key.capitalize()} --- ")
+                rule_names = [scoped_rule_name(tech_key, name) for name in rule_targets.get(tech_key, [ROOT])]
+                resp = input(f"A rule for '{tech_key}' is available. Add it to {', '.join('.windsurf/rules/' + n for n in rule_names)}? [y/N]: ").strip().lower()
+                if resp == 'y':
+                    print(f"Fetching and converting rule for {tech_key}...")
+                    # Rule texts are kept in the local catalog until their SHA changes upstream
+                    rule_name = rule_file_info['name'].replace('.mdc', '')
+                    mdc_content = catalog_store.body(catalog_key, rule_name)
+                    if not mdc_content:
+                        mdc_content = read_catalog_file(rule_file_info) if args.bulk else fetch_github_file_content(github_token, rule_file_info, session=session, fetch=fetch)
+                        if mdc_content:
+                            catalog_store.set_body(catalog_key, rule_name, mdc_content)
+                    if mdc_content:
+                        with span('convert', bytes=len(mdc_content)):
+                            fm, content = parse_frontmatter_and_content(mdc_content)
+                            new_fm = convert_frontmatter_for_windsurf(fm)
+                            new_content = update_references(content)
                     
-                    # Preview (customize as needed)
-                    print("\n--- Rule Preview (Converted for Windsurf) ---")
-                    print(yaml.dump({'frontmatter': new_fm}, sort_keys=False, allow_unicode=True).strip())
-                    print("---------------------------------------------")
-                    # print(content[:300] + "..." if len(content) > 300 else content)
-                    # print("---------------------------------------------")
+                        # Preview (customize as needed)
+                        print("\n--- Rule Preview (Converted for Windsurf) ---")
+                        print(yaml.dump({'frontmatter': new_fm}, sort_keys=False, allow_unicode=True).strip())
+                        print("---------------------------------------------")
+                        # print(content[:300] + "..." if len(content) > 300 else content)
+                        # print("---------------------------------------------")
                     
-                    confirm_add = input("Add this rule? [y/N]: ").strip().lower()
-                    if confirm_add == 'y':
-                        windsurf_rule_content = '---\n' + yaml.safe_dump(new_fm, sort_keys=False).strip() + '\n---\n' + new_content
-                        output_path = TARGET_DIR / f"{tech_key}.md"
-                        try:
-                            with open(output_path, 'w', encoding='utf-8') as f:
-                                f.write(windsurf_rule_content)
-                            print(f"Successfully wrote rule to: {output_path}")
-                            written_files_summary.append(str(output_path))
-                            accepted_rules_count += 1
-                        except IOError as e:
-                            print(f"Error writing file {output_path}: {e}")
+                        confirm_add = input("Add this rule? [y/N]: ").strip().lower()
+                        if confirm_add == 'y':
+                            windsurf_rule_content = '---\n' + dump_frontmatter(new_fm) + '\n---\n' + new_content
+                            for workspace in rule_targets.get(tech_key, [ROOT]):
+                                # Workspace rules only trigger on files below their workspace
+                                scoped_content = scoped_rule(windsurf_rule_content, workspace)
+                                output_path = TARGET_DIR / scoped_rule_name(tech_key, workspace)
+                                try:
+                                    with span('write', bytes=len(scoped_content)), \
+                                            open(output_path, 'w', encoding='utf-8') as f:
+                                        f.write(scoped_content)
+                                    print(f"Successfully wrote rule to: {output_path}")
+                                    written_files_summary.append(str(output_path))
+                                    accepted_rules_count += 1
+                                except IOError as e:
+                                    print(f"Error writing file {output_path}: {e}")
+                        else:
+                            print(f"Skipped rule for {tech_key}.")
                     else:
-                        print(f"Skipped rule for {tech_key}.")
+                        print(f"Could not fetch content for {tech_key} rule.")
                 else:
-                    print(f"Could not fetch content for {tech_key} rule.")
-            else:
-                print(f"Skipped rule for {tech_key}.")
-        # If no rule exists in GitHub for this tech_key, skip output entirely (no redundant message)
-
-    print("\n--- Summary ---")
-    if accepted_rules_count > 0:
-        print(f"Successfully wrote {accepted_rules_count} rules to {TARGET_DIR}:")
-        for f_path in written_files_summary:
-            print(f"  - {f_path}")
-    else:
-        print("No rules were added.")
+                    print(f"Skipped rule for {tech_key}.")
+            # If no rule exists in GitHub for this tech_key, skip output entirely (no redundant message)
+
+        print("\n--- Summary ---")
+        if accepted_rules_count > 0:
+            print(f"Successfully wrote {accepted_rules_count} rules to {TARGET_DIR}:")
+            for f_path in written_files_summary:
+                print(f"  - {f_path}")
+        else:
+            print("No rules were added.")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,156 @@
+"""
+Reader for git's index file (.git/index), without spawning git.
+
+read_git_index() returns the tracked files of a worktree with the stat data
+git cached for them when they were last added or refreshed. Index versions
+2, 3 and 4 (path prefix compression) and SHA-1/SHA-256 repositories are
+supported. Only stage-0 (or, during a merge conflict, the first staged)
+regular files and symlinks are kept; submodules and skip-worktree entries
+are not on disk as files and are left out.
+
+Split and sparse indexes only list part of the tree in this file, so they
+raise UnsupportedIndex and callers fall back to walking the filesystem.
+
+https://git-scm.com/docs/index-format
+"""
+import os
+import re
+import struct
+
+_HEADER = struct.Struct('>4sII')
+_FLAGS = struct.Struct('>H')
+_EXTENDED = 0x4000
+_SKIP_WORKTREE = 0x4000
+_STAGE_SHIFT = 12
+# Object types in the high bits of the mode: regular file and symlink
+_FILE_TYPES = (0o100000 >> 12, 0o120000 >> 12)
+_UNSUPPORTED_EXTENSIONS = {b'link': 'split index', b'sdir': 'sparse index'}
+_OBJECT_FORMAT = re.compile(r'^\s*objectformat\s*=\s*(\S+)', re.MULTILINE | re.IGNORECASE)
+
+
+class UnsupportedIndex(Exception):
+    """The index exists but cannot be used as a complete file list."""
+
+
+def find_git_dir(path):
+    """(worktree root, git dir) for the repository containing path, or None outside git."""
+    path = os.path.abspath(path)
+    while True:
+        dot_git = os.path.join(path, '.git')
+        if os.path.isdir(dot_git):
+            return path, dot_git
+        if os.path.isfile(dot_git):
+            # Linked worktrees and submodules: ".git" is a file pointing at the real git dir
+            try:
+                with open(dot_git, 'r', encoding='utf-8') as f:
+                    line = f.readline().strip()
+            except OSError:
+                return None
+            if line.startswith('gitdir:'):
+                return path, os.path.normpath(os.path.join(path, line[len('gitdir:'):].strip()))
+            return None
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+
+
+def _common_dir(git_dir):
+    try:
+        with open(os.path.join(git_dir, 'commondir'), 'r', encoding='utf-8') as f:
+            return os.path.normpath(os.path.join(git_dir, f.read().strip()))
+    except OSError:
+        return git_dir
+
+
+def hash_size(git_dir):
+    """Object name length in bytes: 32 for SHA-256 repositories, else 20."""
+    try:
+        with open(os.path.join(_common_dir(git_dir), 'config'), 'r', encoding='utf-8') as f:
+            match = _OBJECT_FORMAT.search(f.read())
+    except OSError:
+        match = None
+    return 32 if match and match.group(1).lower() == 'sha256' else 20
+
+
+def _varint(data, pos):
+    # Offset encoding of index v4 (same as OFS_DELTA): 7 bits per byte, +1 per continuation
+    byte = data[pos]
+    value = byte & 0x7f
+    pos += 1
+    while byte & 0x80:
+        byte = data[pos]
+        value = ((value + 1) << 7) | (byte & 0x7f)
+        pos += 1
+    return value, pos
+
+
+def parse_index(data, hash_len=20):
+    """
+    Parse index bytes into a list of (path, size, mtime_ns, inode) with
+    '/'-separated str paths, in index (path) order.
+    """
+    signature, version, count = _HEADER.unpack_from(data, 0)
+    if signature != b'DIRC':
+        raise UnsupportedIndex('not a git index')
+    if version not in (2, 3, 4):
+        raise UnsupportedIndex(f'index version {version}')
+    entries = []
+    pos = 12
+    previous = b''
+    last_path = None
+    # Per entry: ctime s/ns, mtime s/ns, dev, ino, mode, uid, gid, size, object name, flags
+    entry = struct.Struct(f'>8x2I4x2I8xI{hash_len}xH')
+    unpack_from = entry.unpack_from
+    find = data.find
+    for _ in range(count):
+        mtime_s, mtime_ns, ino, mode, size, flags = unpack_from(data, pos)
+        path_at = pos + entry.size
+        extra = 0
+        if flags & _EXTENDED and version >= 3:
+            extra = _FLAGS.unpack_from(data, path_at)[0]
+            path_at += 2
+        if version == 4:
+            strip, path_at = _varint(data, path_at)
+            end = find(b'\0', path_at)
+            path = previous[:len(previous) - strip] + data[path_at:end]
+            previous = path
+            pos = end + 1
+        else:
+            end = find(b'\0', path_at)
+            path = data[path_at:end]
+            # Entries are NUL-padded to a multiple of 8 bytes
+            pos += (end - pos + 8) & ~7
+        if end < 0:
+            raise UnsupportedIndex('truncated index')
+        if (mode >> 12) not in _FILE_TYPES or extra & _SKIP_WORKTREE:
+            continue
+        # Conflicted paths appear once per stage; keep the first
+        if (flags >> _STAGE_SHIFT) & 3 and path == last_path:
+            continue
+        last_path = path
+        entries.append((path.decode('utf-8', 'surrogateescape'), size, mtime_s * 1000000000 + mtime_ns, ino))
+    # Extensions follow the entries, before the trailing checksum
+    while pos + 8 <= len(data) - hash_len:
+        signature = data[pos:pos + 4]
+        if signature in _UNSUPPORTED_EXTENSIONS:
+            raise UnsupportedIndex(_UNSUPPORTED_EXTENSIONS[signature])
+        pos += 8 + struct.unpack_from('>I', data, pos + 4)[0]
+    return entries
+
+
+def read_git_index(path):
+    """
+    (worktree root, entries) for the git worktree containing path; entries
+    as in parse_index(). Returns None outside git or without an index.
+    """
+    found = find_git_dir(path)
+    if found is None:
+        return None
+    worktree, git_dir = found
+    try:
+        with open(os.path.join(git_dir, 'index'), 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+    return worktree, parse_index(data, hash_size(git_dir))
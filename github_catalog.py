@@ -0,0 +1,163 @@
+"""
+Bulk sync of the awesome-cursor-rules-mdc catalog into a local mirror.
+
+The contents API lists at most 1000 entries per directory and every rule then
+costs its own download. sync_catalog() instead:
+
+1. fetches the recursive git tree of the ref in one call,
+2. compares each rule's blob SHA with the git blob SHA of the mirrored copy,
+3. on a cold start (or when many rules changed) streams a single tarball and
+   extracts the wanted .mdc members in memory, otherwise downloads just the
+   changed files concurrently,
+4. drops mirrored rules that are no longer in the tree.
+
+Catalog entries use the same keys as the contents API ('name', 'type',
+'download_url', 'sha') plus 'local_path', so existing callers keep working.
+"""
+import hashlib
+import json
+import os
+import tarfile
+
+from http_cache import CACHE_DIR
+from profiler import span
+from rule_fetcher import DEFAULT_FETCH_WORKERS, DEFAULT_TIMEOUT, fetch_many, fetch_text
+
+GITHUB_API = "https://api.github.com"
+RAW_BASE = "https://raw.githubusercontent.com"
+DEFAULT_REF = "main"
+# Above this many changed rules one tarball is cheaper than individual downloads
+TARBALL_THRESHOLD = 25
+
+
+def git_blob_sha(data):
+    """SHA-1 of data as git hashes a blob, comparable with tree entry SHAs."""
+    return hashlib.sha1(b'blob %d\0' % len(data) + data).hexdigest()
+
+
+def default_mirror_dir(owner, repo, ref=DEFAULT_REF):
+    return os.path.join(CACHE_DIR, 'catalog', owner, repo, ref)
+
+
+def fetch_catalog_tree(session, owner, repo, path, ref=DEFAULT_REF, api=GITHUB_API, raw_base=RAW_BASE,
+                       fetch=None, timeout=DEFAULT_TIMEOUT):
+    """Return {file name: entry} for every .mdc blob under path, from one recursive tree call."""
+    fetch = fetch or fetch_text
+    url = f"{api}/repos/{owner}/{repo}/git/trees/{ref}?recursive=1"
+    tree = json.loads(fetch(session, url, timeout))
+    if tree.get('truncated'):
+        print(f"Warning: git tree for {owner}/{repo}@{ref} was truncated by GitHub; some rules may be missing")
+    prefix = path.strip('/') + '/'
+    catalog = {}
+    for item in tree.get('tree', []):
+        item_path = item.get('path', '')
+        if item.get('type') != 'blob' or not item_path.startswith(prefix) or not item_path.endswith('.mdc'):
+            continue
+        name = item_path[len(prefix):]
+        if '/' in name:
+            continue
+        catalog[name] = {
+            'name': name,
+            'path': item_path,
+            'type': 'file',
+            'sha': item['sha'],
+            'size': item.get('size'),
+            'download_url': f"{raw_base}/{owner}/{repo}/{ref}/{item_path}",
+        }
+    return catalog
+
+
+def _fetch_bytes(session, url, timeout=DEFAULT_TIMEOUT):
+    # Raw bytes, so the mirrored file hashes to the same blob SHA as the tree entry
+    r = session.get(url, timeout=timeout)
+    r.raise_for_status()
+    return r.content
+
+
+def _write_atomic(path, data):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _local_shas(mirror_dir):
+    shas = {}
+    for name in os.listdir(mirror_dir):
+        if name.endswith('.mdc'):
+            with open(os.path.join(mirror_dir, name), 'rb') as f:
+                shas[name] = git_blob_sha(f.read())
+    return shas
+
+
+def _extract_tarball(session, url, prefix, wanted, mirror_dir, timeout):
+    """Stream a gzipped tarball and write the wanted members; returns the names written."""
+    written = set()
+    with session.get(url, stream=True, timeout=timeout) as r:
+        r.raise_for_status()
+        r.raw.decode_content = True
+        with tarfile.open(fileobj=r.raw, mode='r|gz') as tar:
+            for member in tar:
+                if not member.isfile():
+                    continue
+                # Members are rooted at '<owner>-<repo>-<sha>/'
+                rel_path = member.name.split('/', 1)[-1]
+                if not rel_path.startswith(prefix):
+                    continue
+                name = rel_path[len(prefix):]
+                if name not in wanted:
+                    continue
+                _write_atomic(os.path.join(mirror_dir, name), tar.extractfile(member).read())
+                written.add(name)
+    return written
+
+
+def sync_catalog(session, owner, repo, path, ref=DEFAULT_REF, mirror_dir=None, api=GITHUB_API, raw_base=RAW_BASE,
+                 fetch=None, timeout=DEFAULT_TIMEOUT, workers=DEFAULT_FETCH_WORKERS, offline=False):
+    """
+    Bring the local mirror of owner/repo:path@ref up to date and return its catalog.
+
+    Returns {file name: entry}; entry['local_path'] points at the mirrored .mdc.
+    Rules that could not be downloaded keep their previous mirrored copy, listed
+    under that copy's SHA, when there is one and are left out of the catalog
+    otherwise.
+    """
+    mirror_dir = mirror_dir or default_mirror_dir(owner, repo, ref)
+    os.makedirs(mirror_dir, exist_ok=True)
+    catalog = fetch_catalog_tree(session, owner, repo, path, ref=ref, api=api, raw_base=raw_base,
+                                 fetch=fetch, timeout=timeout)
+    local = _local_shas(mirror_dir)
+    changed = {name for name, entry in catalog.items() if local.get(name) != entry['sha']}
+    if changed and not offline:
+        if not local or len(changed) > TARBALL_THRESHOLD:
+            tarball_url = f"{api}/repos/{owner}/{repo}/tarball/{ref}"
+            print(f"Downloading {len(changed)} rules from {owner}/{repo}@{ref} as one tarball...")
+            changed -= _extract_tarball(session, tarball_url, path.strip('/') + '/', changed, mirror_dir, timeout)
+        else:
+            print(f"Downloading {len(changed)} changed rules from {owner}/{repo}@{ref}...")
+            for name, data, error in fetch_many(session, sorted(changed), lambda n: catalog[n]['download_url'],
+                                                workers=workers, timeout=timeout, fetch=_fetch_bytes):
+                if error is not None:
+                    print(f"Error fetching {name}: {error}")
+                    continue
+                _write_atomic(os.path.join(mirror_dir, name), data)
+                changed.discard(name)
+    for name in local:
+        if name not in catalog:
+            os.remove(os.path.join(mirror_dir, name))
+    for name in list(catalog):
+        if name in changed and name not in local:
+            del catalog[name]
+            continue
+        if name in changed:
+            # The kept copy is still the old blob, so a later sync sees it as changed again
+            catalog[name]['sha'] = local[name]
+        catalog[name]['local_path'] = os.path.join(mirror_dir, name)
+    return catalog
+
+
+def read_catalog_file(entry):
+    with span('read rule') as sp, open(entry['local_path'], 'r', encoding='utf-8') as f:
+        text = f.read()
+        sp.add(bytes=len(text))
+    return text
@@ -0,0 +1,109 @@
+"""
+Local HTTP response cache for rule sources (GitHub listings/raw files and
+cursor.directory pages).
+
+Responses are stored per URL with their ETag/Last-Modified validators in a
+SQLite file (by default under $XDG_CACHE_HOME/rulesmaker). Cached URLs are
+revalidated with If-None-Match/If-Modified-Since, so an unchanged resource
+costs a body-less 304 and doesn't count against the GitHub rate limit. In
+offline mode only the cache is consulted. The cache is capped in size and
+evicts the least recently used entries first.
+"""
+import os
+import sqlite3
+import threading
+import time
+
+import requests
+
+from rule_fetcher import DEFAULT_TIMEOUT
+
+CACHE_DIR = os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'), 'rulesmaker')
+DEFAULT_CACHE_PATH = os.path.join(CACHE_DIR, 'http_cache.sqlite')
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+class OfflineCacheMiss(requests.exceptions.RequestException):
+    """Raised in offline mode for a URL that has never been cached."""
+
+
+class HttpCache:
+    def __init__(self, db_path=DEFAULT_CACHE_PATH, max_bytes=DEFAULT_MAX_BYTES):
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        # Shared by the fetch_many() worker threads, serialized by the lock
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock:
+            self.conn.execute(
+                'CREATE TABLE IF NOT EXISTS responses ('
+                'url TEXT PRIMARY KEY, body TEXT, etag TEXT, last_modified TEXT, size INTEGER, last_used REAL)'
+            )
+            self.conn.execute('CREATE INDEX IF NOT EXISTS responses_lru ON responses (last_used)')
+            self.conn.commit()
+
+    def get(self, url):
+        """Return (body, etag, last_modified) for url and mark it recently used, or None."""
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT body, etag, last_modified FROM responses WHERE url = ?', (url,)).fetchone()
+            if row is not None:
+                self.conn.execute('UPDATE responses SET last_used = ? WHERE url = ?', (time.time(), url))
+                self.conn.commit()
+        return row
+
+    def put(self, url, body, etag=None, last_modified=None):
+        size = len(body.encode('utf-8'))
+        with self.lock:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO responses (url, body, etag, last_modified, size, last_used) '
+                'VALUES (?, ?, ?, ?, ?, ?)', (url, body, etag, last_modified, size, time.time()))
+            self._evict()
+            self.conn.commit()
+
+    def _evict(self):
+        total = self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self.conn.execute('SELECT url, size FROM responses ORDER BY last_used').fetchall()
+        for url, size in rows:
+            if total <= self.max_bytes:
+                break
+            self.conn.execute('DELETE FROM responses WHERE url = ?', (url,))
+            total -= size
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+def cached_fetch_text(session, url, timeout=DEFAULT_TIMEOUT, cache=None, offline=False, headers=None):
+    """GET url as text, revalidating against (or, offline, serving only from) the cache."""
+    cached = cache.get(url) if cache is not None else None
+    if offline:
+        if cached is None:
+            raise OfflineCacheMiss(f"{url} is not in the local cache (offline mode)")
+        return cached[0]
+    request_headers = dict(headers or {})
+    if cached is not None:
+        body, etag, last_modified = cached
+        if etag:
+            request_headers['If-None-Match'] = etag
+        if last_modified:
+            request_headers['If-Modified-Since'] = last_modified
+    r = session.get(url, headers=request_headers, timeout=timeout)
+    if r.status_code == 304 and cached is not None:
+        return cached[0]
+    r.raise_for_status()
+    if cache is not None:
+        cache.put(url, r.text, r.headers.get('ETag'), r.headers.get('Last-Modified'))
+    return r.text
+
+
+def make_cached_fetch(cache, offline=False):
+    """Adapt cached_fetch_text to the fetch(session, url, timeout) hook of rule_fetcher.fetch_many."""
+    def fetch(session, url, timeout=DEFAULT_TIMEOUT, headers=None):
+        return cached_fetch_text(session, url, timeout=timeout, cache=cache, offline=offline, headers=headers)
+    return fetch
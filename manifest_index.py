@@ -0,0 +1,278 @@
+"""
+Build manifests parsed once per scan into a normalized dependency index.
+
+ManifestIndex.load(directory) reads every supported manifest in a directory
+once and keeps, per manifest, the set of dependency names it declares
+(lowercased; Maven/Gradle coordinates as 'group:artifact') and the parsed
+document for JSON manifests. Detectors then ask the index instead of
+re-reading files:
+
+- has_dependency('django')   ecosystem-aware match ('spring-boot-starter'
+                             matches 'org.springframework.boot:spring-boot-starter-web')
+- mentions('bloc')           substring match over dependency names, the
+                             semantics of the old ad-hoc checks
+- document('app.json')       the parsed JSON
+
+dependency_frameworks() applies the `dependencies` lists of
+codeMaps/framework_detection.json to an index.
+"""
+import json
+import os
+import re
+import xml.etree.ElementTree as ET
+
+import yaml
+
+from profiler import span
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11: TOML manifests are skipped
+    tomllib = None
+
+PACKAGE_JSON_SECTIONS = ('dependencies', 'devDependencies', 'peerDependencies', 'optionalDependencies')
+_GRADLE_COORDINATE = re.compile(r'''["']([\w.\-]+):([\w.\-]+)(?::[^"'\s]*)?["']''')
+_GRADLE_MAP_NOTATION = re.compile(r'''group\s*[:=]\s*["']([\w.\-]+)["']\s*,\s*name\s*[:=]\s*["']([\w.\-]+)["']''')
+_GRADLE_PLUGIN = re.compile(r'''\bid\s*\(?\s*["']([\w.\-]+)["']''')
+_REQUIREMENT_NAME = re.compile(r'^\s*([A-Za-z0-9][A-Za-z0-9._\-]*)')
+_GEM = re.compile(r'''^\s*gem\s+["']([^"']+)["']''', re.MULTILINE)
+
+
+def _normalize(name):
+    return name.strip().lower()
+
+
+def _python_name(requirement):
+    # PEP 503 normalized project name of a requirement string ('Django>=4; python_version>"3"' -> 'django')
+    match = _REQUIREMENT_NAME.match(requirement)
+    return re.sub(r'[-_.]+', '-', match.group(1)).lower() if match else None
+
+
+def _parse_package_json(text):
+    document = json.loads(text)
+    deps = set()
+    for section in PACKAGE_JSON_SECTIONS:
+        deps.update(_normalize(name) for name in (document.get(section) or {}))
+    return deps, document
+
+
+def _parse_composer_json(text):
+    document = json.loads(text)
+    deps = set()
+    for section in ('require', 'require-dev'):
+        deps.update(_normalize(name) for name in (document.get(section) or {}))
+    return deps, document
+
+
+def _parse_app_json(text):
+    document = json.loads(text)
+    # An Expo app config is the one dependency app.json declares
+    deps = {'expo'} if isinstance(document, dict) and 'expo' in document else set()
+    return deps, document
+
+
+def _parse_pom_xml(text):
+    root = ET.fromstring(text)
+    deps = set()
+
+    def child_text(element, name):
+        for child in element:
+            if child.tag.rsplit('}', 1)[-1] == name and child.text:
+                return child.text.strip()
+        return ''
+    for element in root.iter():
+        if element.tag.rsplit('}', 1)[-1] in ('dependency', 'parent', 'plugin'):
+            group, artifact = child_text(element, 'groupId'), child_text(element, 'artifactId')
+            if artifact:
+                deps.add(_normalize(f"{group}:{artifact}"))
+    return deps, None
+
+
+def _parse_gradle(text):
+    deps = {_normalize(f"{g}:{a}") for g, a in _GRADLE_COORDINATE.findall(text)}
+    deps.update(_normalize(f"{g}:{a}") for g, a in _GRADLE_MAP_NOTATION.findall(text))
+    deps.update(_normalize(plugin) for plugin in _GRADLE_PLUGIN.findall(text))
+    return deps, None
+
+
+def _parse_pubspec_yaml(text):
+    document = yaml.safe_load(text) or {}
+    deps = set()
+    for section in ('dependencies', 'dev_dependencies'):
+        deps.update(_normalize(name) for name in (document.get(section) or {}))
+    return deps, None
+
+
+def _parse_go_mod(text):
+    deps = set()
+    in_block = False
+    for line in text.splitlines():
+        line = line.split('//', 1)[0].strip()
+        if not line:
+            continue
+        if in_block:
+            if line == ')':
+                in_block = False
+            else:
+                deps.add(_normalize(line.split()[0]))
+        elif line.startswith('require ('):
+            in_block = True
+        elif line.startswith(('require ', 'module ')):
+            # The module path counts too, so a repo can be recognized as e.g. ibc-go itself
+            deps.add(_normalize(line.split()[1]))
+    return deps, None
+
+
+def _parse_requirements_txt(text):
+    deps = set()
+    for line in text.splitlines():
+        line = line.split('#', 1)[0].strip()
+        if line and not line.startswith('-'):
+            name = _python_name(line)
+            if name:
+                deps.add(name)
+    return deps, None
+
+
+def _parse_pyproject_toml(text):
+    document = tomllib.loads(text)
+    project = document.get('project') or {}
+    requirements = list(project.get('dependencies') or [])
+    for extra in (project.get('optional-dependencies') or {}).values():
+        requirements.extend(extra)
+    deps = {name for name in map(_python_name, requirements) if name}
+    poetry = (document.get('tool') or {}).get('poetry') or {}
+    for section in ('dependencies', 'dev-dependencies'):
+        deps.update(_python_name(name) for name in (poetry.get(section) or {}) if name.lower() != 'python')
+    return deps, None
+
+
+def _parse_pipfile(text):
+    document = tomllib.loads(text)
+    deps = set()
+    for section in ('packages', 'dev-packages'):
+        deps.update(_python_name(name) for name in (document.get(section) or {}))
+    return deps, None
+
+
+def _parse_cargo_toml(text):
+    document = tomllib.loads(text)
+    deps = set()
+    for section in ('dependencies', 'dev-dependencies', 'build-dependencies'):
+        deps.update(_normalize(name) for name in (document.get(section) or {}))
+    return deps, None
+
+
+def _parse_gemfile(text):
+    return {_normalize(name) for name in _GEM.findall(text)}, None
+
+
+MANIFEST_PARSERS = {
+    'package.json': _parse_package_json,
+    'composer.json': _parse_composer_json,
+    'app.json': _parse_app_json,
+    'pom.xml': _parse_pom_xml,
+    'build.gradle': _parse_gradle,
+    'build.gradle.kts': _parse_gradle,
+    'pubspec.yaml': _parse_pubspec_yaml,
+    'go.mod': _parse_go_mod,
+    'requirements.txt': _parse_requirements_txt,
+    'Gemfile': _parse_gemfile,
+}
+if tomllib is not None:
+    MANIFEST_PARSERS.update({
+        'pyproject.toml': _parse_pyproject_toml,
+        'Pipfile': _parse_pipfile,
+        'Cargo.toml': _parse_cargo_toml,
+    })
+
+
+class ManifestIndex:
+    def __init__(self):
+        self.dependencies = {}  # manifest file name -> set of normalized dependency names
+        self.documents = {}     # manifest file name -> parsed JSON document
+        self.errors = {}        # manifest file name -> parse error message
+        self.bytes_read = 0
+        self._all = None
+        self._joined = {}
+
+    @classmethod
+    def load(cls, directory, names=None):
+        """Parse every supported manifest present in directory (not below it), once."""
+        index = cls()
+        for name in names or MANIFEST_PARSERS:
+            path = os.path.join(directory, name)
+            if not os.path.isfile(path):
+                continue
+            try:
+                with span(f'manifest:{name}') as sp, open(path, 'r', encoding='utf-8', errors='replace') as f:
+                    text = f.read()
+                    sp.add(bytes=len(text))
+                index.bytes_read += len(text)
+            except OSError as e:
+                index.errors[name] = str(e)
+                continue
+            index.add(name, text)
+        return index
+
+    def add(self, name, text):
+        """Parse one manifest's text; unparsable manifests are recorded in errors and declare nothing."""
+        try:
+            with span(f'parse:{name}'):
+                deps, document = MANIFEST_PARSERS[name](text)
+        except Exception as e:
+            print(f"Warning: Could not parse {name}: {e}")
+            self.errors[name] = str(e)
+            deps, document = set(), None
+        self.dependencies[name] = {dep for dep in deps if dep}
+        if document is not None:
+            self.documents[name] = document
+        self._all = None
+        self._joined.clear()
+
+    def has_manifest(self, name):
+        return name in self.dependencies
+
+    def document(self, name):
+        return self.documents.get(name)
+
+    def names(self, manifests=None):
+        """All dependency names declared by the given manifests (default: every manifest)."""
+        if manifests is None:
+            if self._all is None:
+                self._all = set().union(*self.dependencies.values())
+            return self._all
+        return set().union(*(self.dependencies.get(m, ()) for m in manifests))
+
+    def mentions(self, text, manifests=None):
+        """True if any dependency name contains text (case-insensitive)."""
+        key = None if manifests is None else tuple(manifests)
+        joined = self._joined.get(key)
+        if joined is None:
+            # One string per manifest set, so each check is a single substring search
+            joined = self._joined[key] = '\n'.join(sorted(self.names(manifests)))
+        return text.lower() in joined
+
+    def has_dependency(self, dep, manifests=None):
+        """
+        True if a manifest declares dep: exactly, as a Maven/Gradle artifact or
+        artifact family ('spring-boot-starter' -> 'spring-boot-starter-web'), or
+        as a segment of a group id ('quarkus' -> 'io.quarkus:quarkus-core').
+        """
+        dep = _normalize(dep)
+        for name in self.names(manifests):
+            if name == dep:
+                return True
+            group, _, artifact = name.rpartition(':')
+            if not group:
+                # Other ecosystems name packages exactly: flask-login is not flask
+                continue
+            if artifact == dep or artifact.startswith(dep + '-') or dep in group.split('.'):
+                return True
+        return False
+
+
+def dependency_frameworks(framework_detection, index):
+    """Frameworks from codeMaps/framework_detection.json whose `dependencies` a manifest declares."""
+    return {framework for framework, data in framework_detection.items()
+            if any(index.has_dependency(dep) for dep in data.get('dependencies', []))}
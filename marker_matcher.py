@@ -0,0 +1,98 @@
+"""
+Compiled multi-pattern matcher for shebang, modeline and marker strings.
+
+All strings from the codeMaps detection tables are compiled into one regex,
+so each sniffed snippet is scanned once regardless of how many languages,
+frameworks and tools the maps contain. The regex is a zero-width lookahead
+over a prefix trie of the strings (longest match preferred), which reports
+the longest pattern starting at every position; shorter patterns starting at
+the same position are prefixes of it and are expanded from a precomputed
+table. Together this yields every pattern that occurs as a substring, exactly
+like the old `pattern in line` loops.
+"""
+import re
+
+SHEBANG = 'shebang'
+MODELINE = 'modeline'
+FRAMEWORK = 'framework'
+TOOL = 'tool'
+
+
+def _trie_regex(patterns):
+    trie = {}
+    for p in patterns:
+        node = trie
+        for ch in p:
+            node = node.setdefault(ch, {})
+        node[''] = True
+
+    def emit(node):
+        branches = [re.escape(ch) + emit(child) for ch, child in sorted(node.items()) if ch != '']
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        # Greedy optional suffix: prefer the longest pattern at each position
+        return '(?:' + body + ')?' if '' in node else body
+
+    return emit(trie)
+
+
+class MarkerMatcher:
+    def __init__(self, language_detection, framework_detection, tool_detection):
+        targets = {}
+        for lang, data in language_detection.items():
+            for s in data.get("shebangs", []):
+                targets.setdefault(s, set()).add((SHEBANG, lang))
+            for s in data.get("modelines", []):
+                targets.setdefault(s, set()).add((MODELINE, lang))
+        for fw, data in framework_detection.items():
+            for s in data.get("markers", []):
+                targets.setdefault(s, set()).add((FRAMEWORK, fw))
+        for tool, data in tool_detection.items():
+            for s in data.get("markers", []):
+                targets.setdefault(s, set()).add((TOOL, tool))
+        patterns = [p for p in targets if p]
+        self._regex = re.compile('(?=(' + _trie_regex(patterns) + '))') if patterns else None
+        # Longest hit at a position -> what every pattern that is a prefix of it detects
+        self._shebang = {}
+        self._modeline = {}
+        self._head = {}
+        for p in patterns + ['']:
+            hit = [t for q in targets if p.startswith(q) for t in targets[q]]
+            self._shebang[p] = frozenset(name for kind, name in hit if kind == SHEBANG)
+            self._modeline[p] = frozenset(name for kind, name in hit if kind == MODELINE)
+            self._head[p] = (
+                self._modeline[p],
+                frozenset(name for kind, name in hit if kind == FRAMEWORK),
+                frozenset(name for kind, name in hit if kind == TOOL),
+            )
+
+    def _hits(self, text):
+        # An empty string is a substring of every line, so '' is always a hit
+        if self._regex is None:
+            return {''}
+        hits = set(self._regex.findall(text))
+        hits.add('')
+        return hits
+
+    def match_snippet(self, head_lines, tail_lines):
+        """
+        Return (langs, frameworks, tools) for a sniffed snippet.
+
+        Shebangs count only on head lines starting with '#!', modelines on head
+        and tail lines, framework/tool markers on head lines.
+        """
+        langs, frameworks, tools = set(), set(), set()
+        for hit in self._hits(''.join(head_lines)):
+            modeline_langs, hit_frameworks, hit_tools = self._head[hit]
+            langs |= modeline_langs
+            frameworks |= hit_frameworks
+            tools |= hit_tools
+        for line in head_lines:
+            if line.startswith('#!'):
+                for hit in self._hits(line):
+                    langs |= self._shebang[hit]
+        if tail_lines:
+            for hit in self._hits(''.join(tail_lines)):
+                langs |= self._modeline[hit]
+        return langs, frameworks, tools
@@ -0,0 +1,197 @@
+"""
+Opt-in span profiling for the scanners and rule syncs (--profile).
+
+Instrumented code wraps each phase in a named span and may attach counters:
+
+    with span('sniff') as s:
+        s.add(files=1, bytes=len(data))
+
+Until enable() is called, span() returns one shared no-op object, so a
+disabled span costs a global lookup and a call. Once enabled, every span is
+recorded with its thread, and the run can be exported as a JSON summary
+(count, total/min/max seconds and summed counters per span name) and as a
+Chrome trace-event file for chrome://tracing or https://ui.perfetto.dev.
+"""
+import json
+import os
+import threading
+import time
+
+_profiler = None
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def add(self, **counters):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    __slots__ = ('profiler', 'name', 'counters', 'start_ns')
+
+    def __init__(self, profiler, name, counters):
+        self.profiler = profiler
+        self.name = name
+        self.counters = counters
+        self.start_ns = None
+
+    def add(self, **counters):
+        for key, value in counters.items():
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def __enter__(self):
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is not None:
+            self.counters['error'] = exc_type.__name__
+        self.profiler.record(self.name, self.start_ns, time.perf_counter_ns(), self.counters)
+        return False
+
+
+class Profiler:
+    def __init__(self):
+        self.origin_ns = time.perf_counter_ns()
+        # (name, start_ns, end_ns, thread id, counters); list.append is atomic, so worker threads need no lock
+        self.events = []
+
+    def span(self, name, **counters):
+        return Span(self, name, counters)
+
+    def record(self, name, start_ns, end_ns, counters=None):
+        self.events.append((name, start_ns, end_ns, threading.get_ident(), counters or {}))
+
+    def summary(self):
+        """{name: {'count', 'total_s', 'min_s', 'max_s', <summed numeric counters>}}, slowest first."""
+        spans = {}
+        for name, start_ns, end_ns, _, counters in list(self.events):
+            seconds = (end_ns - start_ns) / 1e9
+            entry = spans.get(name)
+            if entry is None:
+                entry = spans[name] = {'count': 0, 'total_s': 0.0, 'min_s': seconds, 'max_s': seconds}
+            entry['count'] += 1
+            entry['total_s'] += seconds
+            entry['min_s'] = min(entry['min_s'], seconds)
+            entry['max_s'] = max(entry['max_s'], seconds)
+            for key, value in counters.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    entry[key] = entry.get(key, 0) + value
+        return dict(sorted(spans.items(), key=lambda item: item[1]['total_s'], reverse=True))
+
+    def chrome_trace(self):
+        pid = os.getpid()
+        events = []
+        for name, start_ns, end_ns, tid, counters in list(self.events):
+            events.append({'name': name, 'cat': name.split(':', 1)[0], 'ph': 'X', 'pid': pid, 'tid': tid,
+                           'ts': (start_ns - self.origin_ns) / 1000, 'dur': (end_ns - start_ns) / 1000,
+                           'args': counters})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def write_summary(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'wall_s': (time.perf_counter_ns() - self.origin_ns) / 1e9, 'spans': self.summary()},
+                      f, indent=2)
+
+    def write_chrome_trace(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.chrome_trace(), f)
+
+    def print_summary(self, limit=25):
+        print("\n--- Profile (slowest spans by total time) ---")
+        for name, entry in list(self.summary().items())[:limit]:
+            extra = ', '.join(f"{k}={v:g}" for k, v in entry.items() if k not in ('count', 'total_s', 'min_s', 'max_s'))
+            print(f"{entry['total_s']:9.3f}s  {entry['count']:7d}x  {name}" + (f"  ({extra})" if extra else ''))
+
+
+def enable():
+    global _profiler
+    _profiler = Profiler()
+    return _profiler
+
+
+def disable():
+    global _profiler
+    _profiler = None
+
+
+def get_profiler():
+    return _profiler
+
+
+def span(name, **counters):
+    profiler = _profiler
+    if profiler is None:
+        return _NULL_SPAN
+    return Span(profiler, name, counters)
+
+
+def profiled_iter(name, iterable, **counters):
+    """
+    Record one span covering an iterator's lifetime, with the number of items
+    and the time spent producing them (busy_s) as counters. Returns iterable
+    itself when profiling is off.
+    """
+    profiler = _profiler
+    if profiler is None:
+        return iterable
+    return _profiled_iter(profiler, name, iterable, counters)
+
+
+def _profiled_iter(profiler, name, iterable, counters):
+    start_ns = time.perf_counter_ns()
+    busy_ns = 0
+    items = 0
+    iterator = iter(iterable)
+    try:
+        while True:
+            t0 = time.perf_counter_ns()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                busy_ns += time.perf_counter_ns() - t0
+                break
+            busy_ns += time.perf_counter_ns() - t0
+            items += 1
+            yield item
+    finally:
+        profiler.record(name, start_ns, time.perf_counter_ns(), dict(counters, items=items, busy_s=busy_ns / 1e9))
+
+
+def add_profile_arguments(parser):
+    parser.add_argument('--profile', nargs='?', const='rulesmaker_profile.json', default=None, metavar='JSON',
+                        help='Time each phase; print a summary and write it as JSON (default: rulesmaker_profile.json)')
+    parser.add_argument('--profile-trace', metavar='JSON',
+                        help='Write the spans as a Chrome trace-event file (chrome://tracing, Perfetto)')
+
+
+def start_from_args(args):
+    """Enable profiling if --profile/--profile-trace was given; returns the profiler or None."""
+    if args.profile or args.profile_trace:
+        return enable()
+    return None
+
+
+def finish_from_args(args):
+    """Print and export the profile requested on the command line, then stop profiling."""
+    profiler = _profiler
+    if profiler is None:
+        return
+    disable()
+    profiler.print_summary()
+    if args.profile:
+        profiler.write_summary(args.profile)
+        print(f"Profile summary written to {args.profile}")
+    if args.profile_trace:
+        profiler.write_chrome_trace(args.profile_trace)
+        print(f"Chrome trace written to {args.profile_trace}")
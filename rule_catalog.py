@@ -0,0 +1,280 @@
+"""
+Local, searchable store of the rule catalog.
+
+RuleCatalog keeps the upstream listing of awesome-cursor-rules-mdc in a
+SQLite file (by default next to the HTTP cache), per listing source:
+
+- rules:   name, blob SHA, the listing entry, and, once known, the rule's
+           description, globs and body (from the bulk mirror, or stored when
+           a rule is fetched). sync() is incremental: rules whose SHA is
+           unchanged keep what was stored for them.
+- aliases: every name a detected tech key may use for a rule, indexed, so
+           'spring-boot' finds springboot and 'next.js' finds nextjs.
+- rules_fts: a full-text index over names, descriptions, globs and bodies
+           for search() (FTS5 when SQLite has it, LIKE otherwise).
+
+A listing younger than max_age is served from the store without listing
+the repository again. rules_map() returns a RulesMap: the usual {rule name:
+entry} dict that also resolves tech keys through the alias index in memory.
+"""
+import difflib
+import json
+import os
+import re
+import sqlite3
+import time
+
+from http_cache import CACHE_DIR
+from rule_frontmatter import parse_frontmatter_and_content
+
+DEFAULT_CATALOG_PATH = os.path.join(CACHE_DIR, 'rule_catalog.sqlite')
+DEFAULT_MAX_AGE = 24 * 3600
+# Detected keys whose rule goes by another name; applied only when the target rule exists
+KEY_ALIASES = {
+    'golang': 'go',
+    'node': 'nodejs',
+    'postgres': 'postgresql',
+    'k8s': 'kubernetes',
+    'shell': 'bash',
+    'make': 'makefile',
+    'tailwind': 'tailwindcss',
+    'vue': 'vuejs',
+}
+# Suffixes a rule name may carry that a detected key usually drops ('vuejs' -> 'vue')
+DROPPABLE_SUFFIXES = ('js', 'lang')
+FUZZY_CUTOFF = 0.9
+_NON_ALNUM = re.compile(r'[^a-z0-9]+')
+
+
+def _has_fts5():
+    try:
+        sqlite3.connect(':memory:').execute('CREATE VIRTUAL TABLE t USING fts5(x)')
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+HAS_FTS5 = _has_fts5()
+
+
+def normalize_key(key):
+    """'Spring-Boot' -> 'springboot', 'Next.js' -> 'nextjs', 'C++' -> 'cpp', 'C#' -> 'csharp'."""
+    key = key.lower().replace('++', 'pp').replace('#', 'sharp')
+    return _NON_ALNUM.sub('', key)
+
+
+def rule_aliases(names):
+    """{alias: rule name} for lookups; exact names win over normalized names, which win over derived ones."""
+    aliases = {}
+    ranked = []
+    for name in names:
+        norm = normalize_key(name)
+        ranked.append((0, name.lower(), name))
+        ranked.append((1, norm, name))
+        for suffix in DROPPABLE_SUFFIXES:
+            if norm.endswith(suffix) and len(norm) > len(suffix) + 1:
+                ranked.append((2, norm[:-len(suffix)], name))
+    by_norm = {norm: name for rank, norm, name in ranked if rank == 1}
+    for alias, target in KEY_ALIASES.items():
+        if target in by_norm:
+            ranked.append((3, alias, by_norm[target]))
+    # Sorted by rank (then name, for a stable winner), so the first claim of an alias sticks
+    for _, alias, name in sorted(ranked):
+        if alias:
+            aliases.setdefault(alias, name)
+    return aliases
+
+
+def lookup_alias(aliases, key, fuzzy=True):
+    """Rule name for a detected tech key: exact, normalized or derived alias, then a close fuzzy match."""
+    name = aliases.get(key.lower()) or aliases.get(normalize_key(key))
+    if name is None and fuzzy:
+        norm = normalize_key(key)
+        # Same first letter and a high ratio only: 'postgresql' ~ 'postgres', but not 'react' ~ 'preact'
+        candidates = [alias for alias in aliases if alias[:1] == norm[:1]]
+        match = difflib.get_close_matches(norm, candidates, n=1, cutoff=FUZZY_CUTOFF)
+        name = aliases[match[0]] if match else None
+    return name
+
+
+class RulesMap(dict):
+    """{rule name: entry} as listed upstream, plus alias lookups for detected tech keys."""
+
+    def __init__(self, entries=(), aliases=None):
+        super().__init__(entries)
+        self.aliases = rule_aliases(self) if aliases is None else aliases
+        self._found = {}
+
+    def find(self, key):
+        """The entry of the rule for key, or None; results (misses too) are remembered."""
+        if key not in self._found:
+            name = lookup_alias(self.aliases, key)
+            self._found[key] = self.get(name) if name is not None else None
+        return self._found[key]
+
+
+def _describe(body):
+    # (description, globs) from a rule's frontmatter
+    try:
+        fm, _ = parse_frontmatter_and_content(body)
+    except Exception:
+        return None, None
+    globs = fm.get('globs')
+    if isinstance(globs, list):
+        globs = ','.join(str(g) for g in globs)
+    description = fm.get('description')
+    return (str(description) if description is not None else None), (str(globs) if globs is not None else None)
+
+
+class RuleCatalog:
+    def __init__(self, db_path=DEFAULT_CATALOG_PATH):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS rules ('
+            'source TEXT NOT NULL, name TEXT NOT NULL, sha TEXT, entry TEXT, description TEXT, globs TEXT, body TEXT, '
+            'PRIMARY KEY (source, name))'
+        )
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS aliases ('
+            'source TEXT NOT NULL, alias TEXT NOT NULL, name TEXT NOT NULL, PRIMARY KEY (source, alias))'
+        )
+        self.conn.execute('CREATE TABLE IF NOT EXISTS listings (source TEXT PRIMARY KEY, listed_at REAL)')
+        if HAS_FTS5:
+            self.conn.execute(
+                'CREATE VIRTUAL TABLE IF NOT EXISTS rules_fts USING fts5('
+                'source UNINDEXED, name, description, globs, body)'
+            )
+        self.conn.commit()
+
+    def listed_at(self, source):
+        row = self.conn.execute('SELECT listed_at FROM listings WHERE source = ?', (source,)).fetchone()
+        return row[0] if row else None
+
+    def is_fresh(self, source, max_age=DEFAULT_MAX_AGE):
+        listed_at = self.listed_at(source)
+        return listed_at is not None and max_age is not None and time.time() - listed_at < max_age
+
+    def sync(self, source, listing):
+        """
+        Store a fresh upstream listing ({rule name: entry with 'sha'}) for source.
+        Returns counts of 'added', 'updated', 'unchanged' and 'removed' rules.
+        """
+        counts = {'added': 0, 'updated': 0, 'unchanged': 0, 'removed': 0}
+        stored = dict(self.conn.execute('SELECT name, sha FROM rules WHERE source = ?', (source,)))
+        with self.conn:
+            for name, entry in listing.items():
+                sha = entry.get('sha')
+                entry_json = json.dumps(entry, sort_keys=True)
+                if name in stored and stored[name] == sha and sha is not None:
+                    # Same content upstream: keep description/globs/body, refresh paths and URLs
+                    self.conn.execute('UPDATE rules SET entry = ? WHERE source = ? AND name = ?',
+                                      (entry_json, source, name))
+                    counts['unchanged'] += 1
+                    continue
+                counts['updated' if name in stored else 'added'] += 1
+                self.conn.execute(
+                    'INSERT OR REPLACE INTO rules (source, name, sha, entry, description, globs, body) '
+                    'VALUES (?, ?, ?, ?, NULL, NULL, NULL)', (source, name, sha, entry_json))
+                self._index(source, name, None, None, None)
+            for name in set(stored) - set(listing):
+                self.conn.execute('DELETE FROM rules WHERE source = ? AND name = ?', (source, name))
+                if HAS_FTS5:
+                    self.conn.execute('DELETE FROM rules_fts WHERE source = ? AND name = ?', (source, name))
+                counts['removed'] += 1
+            self.conn.execute('DELETE FROM aliases WHERE source = ?', (source,))
+            self.conn.executemany('INSERT INTO aliases (source, alias, name) VALUES (?, ?, ?)',
+                                  [(source, alias, name) for alias, name in rule_aliases(listing).items()])
+            self.conn.execute('INSERT OR REPLACE INTO listings (source, listed_at) VALUES (?, ?)',
+                              (source, time.time()))
+        # Mirrored rules (bulk sync) can be described right away
+        for name, entry in listing.items():
+            if entry.get('local_path'):
+                row = self.conn.execute('SELECT body FROM rules WHERE source = ? AND name = ?',
+                                        (source, name)).fetchone()
+                if row[0] is None:
+                    try:
+                        with open(entry['local_path'], 'r', encoding='utf-8') as f:
+                            self.set_body(source, name, f.read(), commit=False)
+                    except OSError as e:
+                        print(f"Warning: Could not read {entry['local_path']}: {e}")
+        self.conn.commit()
+        return counts
+
+    def _index(self, source, name, description, globs, body):
+        if HAS_FTS5:
+            self.conn.execute('DELETE FROM rules_fts WHERE source = ? AND name = ?', (source, name))
+            self.conn.execute('INSERT INTO rules_fts (source, name, description, globs, body) VALUES (?, ?, ?, ?, ?)',
+                              (source, name, description or '', globs or '', body or ''))
+
+    def set_body(self, source, name, body, commit=True):
+        """Store a rule's text (and its frontmatter description/globs) for the current SHA."""
+        description, globs = _describe(body)
+        cur = self.conn.execute('UPDATE rules SET description = ?, globs = ?, body = ? WHERE source = ? AND name = ?',
+                                (description, globs, body, source, name))
+        if cur.rowcount:
+            self._index(source, name, description, globs, body)
+        if commit:
+            self.conn.commit()
+
+    def body(self, source, name):
+        """The stored text of a rule, or None until it has been fetched since its SHA last changed."""
+        row = self.conn.execute('SELECT body FROM rules WHERE source = ? AND name = ?', (source, name)).fetchone()
+        return row[0] if row else None
+
+    def rules_map(self, source):
+        """RulesMap of the stored listing for source (empty if it was never listed)."""
+        entries = {name: json.loads(entry) for name, entry in
+                   self.conn.execute('SELECT name, entry FROM rules WHERE source = ?', (source,))}
+        aliases = dict(self.conn.execute('SELECT alias, name FROM aliases WHERE source = ?', (source,)))
+        return RulesMap(entries, aliases)
+
+    def lookup(self, source, key):
+        """Rule name for a detected tech key via the alias index, or None."""
+        for alias in (key.lower(), normalize_key(key)):
+            row = self.conn.execute('SELECT name FROM aliases WHERE source = ? AND alias = ?',
+                                    (source, alias)).fetchone()
+            if row:
+                return row[0]
+        return None
+
+    def search(self, source, query, limit=10):
+        """[(name, description)] of rules matching query in their name, description, globs or body."""
+        if HAS_FTS5:
+            # Every word as a quoted prefix term, so punctuation in the query is not FTS syntax
+            terms = ' '.join('"' + word.replace('"', '""') + '"*' for word in query.split())
+            if not terms:
+                return []
+            rows = self.conn.execute(
+                'SELECT name, description FROM rules_fts WHERE rules_fts MATCH ? AND source = ? '
+                'ORDER BY bm25(rules_fts, 0.0, 10.0, 5.0, 2.0, 1.0) LIMIT ?', (terms, source, limit))
+        else:
+            like = f"%{query}%"
+            rows = self.conn.execute(
+                'SELECT name, description FROM rules WHERE source = ? AND '
+                '(name LIKE ? OR description LIKE ? OR globs LIKE ? OR body LIKE ?) ORDER BY name LIMIT ?',
+                (source, like, like, like, like, limit))
+        return [(name, description or None) for name, description in rows]
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def add_catalog_arguments(parser):
+    parser.add_argument('--catalog-db', default=DEFAULT_CATALOG_PATH, metavar='PATH',
+                        help=f'Local rule catalog store (default: {DEFAULT_CATALOG_PATH})')
+    parser.add_argument('--catalog-max-age', type=float, default=DEFAULT_MAX_AGE / 3600, metavar='HOURS',
+                        help='Reuse the stored catalog listing for this long before listing upstream again '
+                             f'(default: {DEFAULT_MAX_AGE // 3600}; 0 = always list)')
+
+
+def catalog_from_args(args):
+    """(RuleCatalog, max age in seconds)."""
+    return RuleCatalog(args.catalog_db), args.catalog_max_age * 3600
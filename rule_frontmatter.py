@@ -0,0 +1,279 @@
+"""
+Frontmatter parsing, conversion and emitting shared by the rule fetchers.
+
+Cursor .mdc rules carry a tiny frontmatter schema (alwaysApply, globs,
+description). The fast path splits the document on a single buffer and parses
+flat `key: value` lines by hand; anything outside that subset (indentation,
+block scalars, escapes, values YAML would type as numbers/dates, ...) falls
+back to the original preprocess + yaml.safe_load path, so results are the
+same either way. dump_frontmatter() likewise emits plain/quoted scalars and
+block lists itself and only defers to yaml.safe_dump for other value types.
+"""
+import re
+
+import yaml
+
+
+# Line separators str.splitlines() honours besides '\n'; the fast path only splits on '\n'
+_OTHER_LINE_BREAKS = re.compile('[\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]')
+_GLOBS_LINE = re.compile(r'^(\s*globs\s*:[ \t]*)([^\s\[\"\'][^\n]*)$')
+_KEY_LINE = re.compile(r'([A-Za-z_][A-Za-z0-9_-]*)[ \t]*:(?:[ \t]+(.*?))?[ \t]*\Z')
+# Scalars YAML would resolve to something other than a string (bool, null, numbers, dates, ...)
+_SPECIAL_SCALAR = re.compile(r'''(?ix)
+    y|n|yes|no|true|false|on|off|null|~|=|<<
+  | [-+]?\.(?:inf|nan)
+  | [-+]?[0-9][0-9_]*(?:\.[0-9_]*)?(?:e[-+]?[0-9]+)?
+  | [-+]?\.[0-9_]+(?:e[-+]?[0-9]+)?
+  | 0x[0-9a-f_]+ | 0o?[0-7_]+ | 0b[01_]+
+  | [0-9]{4}-[0-9]{1,2}-[0-9]{1,2}.*
+  | [-+]?[0-9][0-9_]*(?::[0-5]?[0-9])+(?:\.[0-9_]*)?
+''')
+_INDICATORS = set('-?:,[]{}#&*!|>\'"%@`')
+_NON_PRINTABLE = re.compile('[^\x09\x0A\x0D\x20-\x7E\x85\xA0-\uD7FF\uE000-\uFFFD\U00010000-\U0010ffff]')
+_LINE_BREAKS = re.compile('[\n\r\x85\u2028\u2029]')
+_ESCAPES = {'\0': '\\0', '\x07': '\\a', '\b': '\\b', '\t': '\\t', '\n': '\\n', '\x0b': '\\v', '\x0c': '\\f',
+            '\r': '\\r', '\x1b': '\\e', '"': '\\"', '\\': '\\\\', '\x85': '\\N', '\xa0': '\\_',
+            '\u2028': '\\L', '\u2029': '\\P'}
+
+
+class _Unsupported(Exception):
+    """Input outside the fast-path subset; use PyYAML instead."""
+
+
+# --- Original line-based path (fallback) ---
+
+def preprocess_frontmatter(lines):
+    # Quote unquoted glob patterns (globs: *.rs) so YAML doesn't read '*' as an alias
+    new_lines = []
+    for line in lines:
+        m = _GLOBS_LINE.match(line)
+        if m:
+            prefix, value = m.groups()
+            value = value.strip()
+            if not value.startswith('[') and not (value.startswith('"') or value.startswith("'")):
+                value = f'"{value}"'
+            new_lines.append(f'{prefix}{value}\n')
+        else:
+            new_lines.append(line)
+    return new_lines
+
+
+def _parse_frontmatter_yaml(text):
+    lines = text.splitlines(keepends=True)
+    if not lines or not lines[0].strip().startswith('---'):
+        return {}, ''.join(lines)
+    fm_end = None
+    for i in range(1, len(lines)):
+        if lines[i].strip().startswith('---'):
+            fm_end = i
+            break
+    if fm_end is None:
+        return {}, ''.join(lines)
+    frontmatter_lines = preprocess_frontmatter(lines[1:fm_end])
+    frontmatter = yaml.safe_load(''.join(frontmatter_lines)) or {}
+    content = ''.join(lines[fm_end + 1:])
+    return frontmatter, content
+
+
+# --- Fast path ---
+
+def _is_plain(value):
+    return (
+        value != ''
+        and value[0] not in _INDICATORS
+        and value == value.strip()
+        and '\t' not in value
+        and ': ' not in value
+        and ' #' not in value
+        and not value.endswith(':')
+        and not _SPECIAL_SCALAR.fullmatch(value)
+        and not _NON_PRINTABLE.search(value)
+        and not _LINE_BREAKS.search(value)
+    )
+
+
+def _parse_quoted(value):
+    quote = value[0]
+    inner = value[1:-1]
+    if len(value) < 2 or value[-1] != quote or quote in inner or '\\' in inner or _NON_PRINTABLE.search(inner):
+        raise _Unsupported
+    return inner
+
+
+def _parse_item(value):
+    if value[:1] in ('"', "'"):
+        return _parse_quoted(value)
+    if _is_plain(value):
+        return value
+    raise _Unsupported
+
+
+def _parse_value(key, value):
+    if value is None or value == '':
+        return None
+    if key == 'globs' and value[0] not in '["\'':
+        # Same result as preprocess_frontmatter quoting it, unless quoting would change it
+        if '"' in value or '\\' in value or _NON_PRINTABLE.search(value):
+            raise _Unsupported
+        return value
+    first = value[0]
+    if first in ('"', "'"):
+        return _parse_quoted(value)
+    if first == '[':
+        inner = value[1:-1] if value.endswith(']') else None
+        if inner is None or any(c in inner for c in '[]{}'):
+            raise _Unsupported
+        if not inner.strip():
+            return []
+        items = [item.strip() for item in inner.split(',')]
+        if any(not item for item in items):
+            raise _Unsupported
+        return [_parse_item(item) for item in items]
+    if value in ('true', 'True', 'TRUE'):
+        return True
+    if value in ('false', 'False', 'FALSE'):
+        return False
+    if _is_plain(value):
+        return value
+    raise _Unsupported
+
+
+def _parse_fast(fm_text):
+    frontmatter = {}
+    pos, end = 0, len(fm_text)
+    while pos < end:
+        nl = fm_text.find('\n', pos)
+        line = fm_text[pos:nl if nl != -1 else end]
+        pos = nl + 1 if nl != -1 else end
+        stripped = line.strip()
+        if not stripped or stripped.startswith('#'):
+            continue
+        if line[0] in ' \t':
+            raise _Unsupported
+        m = _KEY_LINE.match(line)
+        if not m or _SPECIAL_SCALAR.fullmatch(m.group(1)):
+            raise _Unsupported
+        frontmatter[m.group(1)] = _parse_value(m.group(1), m.group(2))
+    return frontmatter
+
+
+def _split(text):
+    """Return (frontmatter text, content, end of the closing line), or None without a frontmatter block."""
+    nl = text.find('\n')
+    first_end = nl if nl != -1 else len(text)
+    if not text[:first_end].strip().startswith('---') or nl == -1:
+        return None
+    pos = nl + 1
+    while pos < len(text):
+        nl = text.find('\n', pos)
+        line_end = nl if nl != -1 else len(text)
+        if text[pos:line_end].strip().startswith('---'):
+            return text[first_end + 1:pos], text[line_end + 1:] if nl != -1 else '', line_end
+        pos = line_end + 1
+    return None
+
+
+def parse_frontmatter_and_content(text):
+    """Split a Markdown/MDC document into (frontmatter dict, content)."""
+    parts = _split(text)
+    if parts is None:
+        if _OTHER_LINE_BREAKS.search(text):
+            return _parse_frontmatter_yaml(text)
+        return {}, text
+    fm_text, content, fm_end = parts
+    # Only line breaks up to the closing --- can change where splitlines() puts the block
+    if _OTHER_LINE_BREAKS.search(text, 0, fm_end):
+        return _parse_frontmatter_yaml(text)
+    try:
+        return _parse_fast(fm_text), content
+    except _Unsupported:
+        return _parse_frontmatter_yaml(text)
+
+
+# --- Conversion ---
+
+def convert_frontmatter_for_windsurf(fm):
+    new_fm = {}
+    if fm.get('alwaysApply', False) is True or fm.get('alwaysApply', 'false') == 'true':
+        new_fm['trigger'] = 'always_on'
+        if 'globs' in fm:
+            new_fm['globs'] = fm['globs']
+    elif 'globs' in fm:
+        new_fm['trigger'] = 'glob'
+        new_fm['globs'] = fm['globs']
+    if 'description' in fm:
+        new_fm['description'] = fm['description']
+    return new_fm
+
+
+def update_references(content):
+    return content.replace('Cursor', 'Windsurf')
+
+
+# --- Emitting ---
+
+def _double_quoted(value):
+    out = []
+    for ch in value:
+        if ch in _ESCAPES:
+            out.append(_ESCAPES[ch])
+        elif _NON_PRINTABLE.match(ch):
+            code = ord(ch)
+            out.append('\\x%02X' % code if code <= 0xFF else '\\u%04X' % code if code <= 0xFFFF else '\\U%08X' % code)
+        else:
+            out.append(ch)
+    return '"' + ''.join(out) + '"'
+
+
+def _emit_scalar(value):
+    if value is True:
+        return 'true'
+    if value is False:
+        return 'false'
+    if value is None:
+        return 'null'
+    if not isinstance(value, str):
+        raise _Unsupported
+    if _is_plain(value):
+        return value
+    if value and not _NON_PRINTABLE.search(value) and not _LINE_BREAKS.search(value) and value == value.strip():
+        return "'" + value.replace("'", "''") + "'"
+    if value == '':
+        return "''"
+    return _double_quoted(value)
+
+
+def _dump_fast(fm):
+    lines = []
+    for key, value in fm.items():
+        if not isinstance(key, str) or not _is_plain(key) or not _KEY_LINE.match(key + ':'):
+            raise _Unsupported
+        if isinstance(value, list):
+            if not value:
+                lines.append(f'{key}: []')
+                continue
+            lines.append(f'{key}:')
+            for item in value:
+                if not isinstance(item, str):
+                    raise _Unsupported
+                lines.append(f'- {_emit_scalar(item)}')
+        else:
+            lines.append(f'{key}: {_emit_scalar(value)}')
+    return '\n'.join(lines)
+
+
+def dump_frontmatter(fm):
+    """Serialize a frontmatter dict to YAML (without the --- delimiters or a trailing newline)."""
+    if not fm:
+        return '{}'
+    try:
+        return _dump_fast(fm)
+    except _Unsupported:
+        return yaml.safe_dump(fm, sort_keys=False).strip()
+
+
+def convert_rule(text):
+    """Convert a Cursor .mdc document to a Windsurf rule document."""
+    fm, content = parse_frontmatter_and_content(text)
+    new_fm = convert_frontmatter_for_windsurf(fm)
+    return '---\n' + dump_frontmatter(new_fm) + '\n---\n' + update_references(content)
@@ -0,0 +1,142 @@
+"""
+Background prefetch of cursor.directory rules while the user answers prompts.
+
+RulePrefetcher starts downloading every matched key's rules page as soon as
+it is created. Each page is parsed on a worker, which then queues the first
+few .txt candidates (read_ahead). When a prompt needs a page or rule, it is
+usually already there. Asking for candidate i queues the next read_ahead
+ones, so declining a rule keeps the downloads ahead of the user.
+
+cancel(key) drops the queued downloads of a key the user rejected or is done
+with. Downloads already in flight finish, but their results go unused.
+
+report() separates download time the user never saw ('hidden_s') from time
+spent blocked on a download ('exposed_s'). It also counts cancelled and
+unused downloads.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from profiler import span
+from rule_fetcher import DEFAULT_FETCH_WORKERS, DEFAULT_TIMEOUT
+
+# .txt candidates per key downloaded ahead of the prompt that shows them
+PREFETCH_READ_AHEAD = 2
+
+
+class RulePrefetcher:
+    def __init__(self, keys, session, fetch, list_sources, workers=DEFAULT_FETCH_WORKERS,
+                 read_ahead=PREFETCH_READ_AHEAD, timeout=DEFAULT_TIMEOUT):
+        """list_sources(key, session, fetch) returns (.txt links, inline rule blocks) for a key's page."""
+        self.session = session
+        self.fetch = fetch
+        self.list_sources = list_sources
+        self.read_ahead = read_ahead
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.pool = ThreadPoolExecutor(max_workers=max(1, workers))
+        self.pages = {}  # key -> Future of ((links, blocks), seconds)
+        self.rules = {}  # (key, url) -> Future of (text, seconds)
+        self.cancelled_keys = set()
+        self.downloads = 0
+        self.download_s = 0.0  # network time of every finished download
+        self.used_s = 0.0      # network time of the downloads a caller consumed
+        self.exposed_s = 0.0   # time callers spent blocked on downloads
+        self.used = 0
+        self.cancelled = 0
+        for key in keys:
+            self.pages[key] = self.pool.submit(self._page, key)
+
+    def _timed(self, func, *args):
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        with self.lock:
+            self.downloads += 1
+            self.download_s += elapsed
+        return result, elapsed
+
+    def _page(self, key):
+        result = self._timed(self.list_sources, key, self.session, self.fetch)
+        self._queue_rules(key, result[0][0], 0)
+        return result
+
+    def _fetch_rule(self, url):
+        with span('fetch rule') as sp:
+            text = self.fetch(self.session, url, timeout=self.timeout).strip()
+            sp.add(bytes=len(text))
+        return text
+
+    def _queue_rules(self, key, links, start):
+        with self.lock:
+            if key in self.cancelled_keys:
+                return
+            for url in links[start:start + self.read_ahead]:
+                if (key, url) not in self.rules:
+                    self.rules[(key, url)] = self.pool.submit(self._timed, self._fetch_rule, url)
+
+    def _wait(self, future):
+        start = time.perf_counter()
+        try:
+            value, elapsed = future.result()
+        finally:
+            self.exposed_s += time.perf_counter() - start
+        self.used += 1
+        self.used_s += elapsed
+        return value
+
+    def sources(self, key):
+        """(.txt links, inline rule blocks) of key's page; raises the page's download error."""
+        with self.lock:
+            self.cancelled_keys.discard(key)
+            future = self.pages.get(key)
+            if future is None or future.cancelled():
+                future = self.pages[key] = self.pool.submit(self._page, key)
+        return self._wait(future)
+
+    def rule(self, key, links, index):
+        """Text of links[index] (stripped), queueing the candidates after it."""
+        self._queue_rules(key, links, index)
+        with self.lock:
+            future = self.rules.get((key, links[index]))
+            if future is None or future.cancelled():
+                future = self.rules[(key, links[index])] = self.pool.submit(self._timed, self._fetch_rule,
+                                                                            links[index])
+        return self._wait(future)
+
+    def cancel(self, key):
+        """Stop queued downloads for key; later sources()/rule() calls fetch again if needed."""
+        with self.lock:
+            self.cancelled_keys.add(key)
+            futures = [self.pages.get(key)] + [f for (k, _), f in self.rules.items() if k == key]
+        for future in futures:
+            if future is not None and not future.cancelled() and future.cancel():
+                self.cancelled += 1
+
+    def close(self):
+        for key in list(self.pages):
+            self.cancel(key)
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def report(self):
+        return {
+            'downloads': self.downloads,
+            'used': self.used,
+            'cancelled': self.cancelled,
+            'download_s': round(self.download_s, 3),
+            'hidden_s': round(max(0.0, self.used_s - self.exposed_s), 3),
+            'exposed_s': round(self.exposed_s, 3),
+            'unused_s': round(max(0.0, self.download_s - self.used_s), 3),
+        }
+
+    def print_report(self):
+        r = self.report()
+        print(f"Prefetch: {r['hidden_s']:.2f}s of downloads hidden behind prompts, {r['exposed_s']:.2f}s waited "
+              f"({r['used']} of {r['downloads']} downloads used, {r['cancelled']} cancelled before starting).")
@@ -0,0 +1,111 @@
+"""
+Streaming, atomic writer for .windsurfrules/.cursorrules.
+
+Each accepted rule is appended to a temp file next to the target as soon as
+it is accepted, so memory stays flat. commit() fsyncs the temp file and
+atomically renames it over the target, so the project always has a complete
+rules file even if the process dies mid-run. When the new content hashes the
+same as the existing file, nothing is touched: no backup, no rewrite, no
+mtime bump for editors watching the file.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+
+RULE_SEPARATOR = '\n\n'
+
+# mkstemp() creates 0600 files; published files get the usual umask-derived mode
+_umask = os.umask(0)
+os.umask(_umask)
+FILE_MODE = 0o666 & ~_umask
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _fsync_dir(path):
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def write_text_atomic(path, text):
+    """Write text to path via an fsynced temp file and an atomic rename."""
+    target_dir = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=target_dir, prefix=f".{os.path.basename(path)}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(text.encode('utf-8'))
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, FILE_MODE)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class StreamingRulesWriter:
+    def __init__(self, target_path, backup_suffix='_OLD'):
+        self.target_path = target_path
+        self.backup_suffix = backup_suffix
+        self.count = 0
+        self._digest = hashlib.sha256()
+        target_dir = os.path.dirname(os.path.abspath(target_path))
+        fd, self.tmp_path = tempfile.mkstemp(dir=target_dir, prefix=f".{os.path.basename(target_path)}.", suffix='.tmp')
+        self._file = os.fdopen(fd, 'wb')
+
+    def add(self, rule_text):
+        data = ((RULE_SEPARATOR if self.count else '') + rule_text).encode('utf-8')
+        self._file.write(data)
+        self._digest.update(data)
+        self.count += 1
+
+    def abort(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self.tmp_path and os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+        self.tmp_path = None
+
+    def commit(self):
+        """Publish the streamed rules; returns False if the target already had this content."""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        self._file = None
+        if os.path.isfile(self.target_path) and file_sha256(self.target_path) == self._digest.hexdigest():
+            self.abort()
+            return False
+        if os.path.isfile(self.target_path):
+            # Copy rather than move, so the target never disappears
+            backup_path = self.target_path + self.backup_suffix
+            shutil.copy2(self.target_path, backup_path)
+            print(f"Existing {os.path.basename(self.target_path)} backed up to {backup_path}")
+        os.chmod(self.tmp_path, FILE_MODE)
+        os.replace(self.tmp_path, self.target_path)
+        self.tmp_path = None
+        _fsync_dir(os.path.dirname(os.path.abspath(self.target_path)))
+        return True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        # Anything not committed (no rules, an error, Ctrl-C) is discarded
+        self.abort()
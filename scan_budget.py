@@ -0,0 +1,109 @@
+"""
+Budgeted scans that stop once detection is settled.
+
+A ScanBudget caps a scan by files walked, bytes read and wall time. Scanners
+given one walk breadth first, so root manifests and top-level files come
+first, and stop early when:
+
+- every key that could still be detected has been found ('settled'), or
+- a limit is spent ('files', 'bytes' or 'time').
+
+Afterwards the budget carries the outcome: stop_reason (None when the whole
+tree was scanned), the keys that are decided (found, or impossible given the
+root manifests) and the keys still uncertain because the scan stopped before
+it could rule them out.
+"""
+import time
+
+SETTLED = 'settled'
+# Settledness is re-checked after this many new files at first, then every 1/8 of the files seen so far
+CHECK_MIN_FILES = 256
+
+
+class ScanBudget:
+    def __init__(self, max_files=None, max_bytes=None, max_seconds=None):
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.start()
+
+    def start(self):
+        self.files = 0
+        self.bytes = 0
+        self.started = time.perf_counter()
+        self.exhausted = None
+        self.stop_reason = None
+        self.decided = set()
+        self.uncertain = set()
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def charge(self, files=0, bytes=0):
+        """Account for scanned files and bytes read; returns the name of a spent limit, or None."""
+        self.files += files
+        self.bytes += bytes
+        if self.exhausted is None:
+            if self.max_files is not None and self.files >= self.max_files:
+                self.exhausted = 'files'
+            elif self.max_bytes is not None and self.bytes >= self.max_bytes:
+                self.exhausted = 'bytes'
+            elif self.max_seconds is not None and self.elapsed() >= self.max_seconds:
+                self.exhausted = 'time'
+        return self.exhausted
+
+    def finish(self, stop_reason, decided, uncertain):
+        self.stop_reason = stop_reason
+        self.decided = set(decided)
+        self.uncertain = set(uncertain)
+
+    def report(self):
+        return {'stop_reason': self.stop_reason, 'files': self.files, 'bytes': self.bytes,
+                'seconds': round(self.elapsed(), 3), 'decided': sorted(self.decided),
+                'uncertain': sorted(self.uncertain)}
+
+    def print_report(self):
+        if self.stop_reason is None:
+            print(f"Scanned the whole tree ({self.files} files).")
+            return
+        if self.stop_reason == SETTLED:
+            why = 'every detectable key was found'
+        else:
+            why = f"the {self.stop_reason} budget was spent"
+        print(f"Stopped after {self.files} files, {self.bytes} bytes read, {self.elapsed():.2f}s: {why}.")
+        if self.uncertain:
+            print(f"Uncertain (not seen before stopping): {', '.join(sorted(self.uncertain))}")
+
+
+class CheckSchedule:
+    """When to re-run detection during a walk: geometrically spaced, so checks cost O(files) in total."""
+
+    def __init__(self, min_files=CHECK_MIN_FILES):
+        self.min_files = min_files
+        self.next_at = min_files
+
+    def due(self, files_seen):
+        if files_seen < self.next_at:
+            return False
+        self.next_at = files_seen + max(self.min_files, files_seen // 8)
+        return True
+
+
+def add_budget_arguments(parser):
+    parser.add_argument('--budgeted', action='store_true',
+                        help='Scan breadth first and stop as soon as every detectable key is found')
+    parser.add_argument('--max-scan-files', type=int, metavar='N',
+                        help='Stop scanning after N files (implies --budgeted)')
+    parser.add_argument('--max-scan-mb', type=float, metavar='MB',
+                        help='Stop scanning after reading MB of file contents (implies --budgeted)')
+    parser.add_argument('--max-scan-seconds', type=float, metavar='S',
+                        help='Stop scanning after S seconds (implies --budgeted)')
+
+
+def budget_from_args(args):
+    """A ScanBudget if --budgeted or any --max-scan-* limit was given, else None."""
+    if not (args.budgeted or args.max_scan_files is not None or args.max_scan_mb is not None
+            or args.max_scan_seconds is not None):
+        return None
+    max_bytes = int(args.max_scan_mb * 1024 * 1024) if args.max_scan_mb is not None else None
+    return ScanBudget(max_files=args.max_scan_files, max_bytes=max_bytes, max_seconds=args.max_scan_seconds)
@@ -0,0 +1,107 @@
+"""
+Persistent per-file fingerprint cache for incremental re-scans.
+
+Rows are (scope, path, size, mtime_ns, inode, facts) in a small SQLite file,
+by default .windsurf/scan_cache.sqlite. A scope groups the facts one scanner
+extracts per file (line counts, sniffed markers) together with a version
+string; when the version changes (e.g. the codeMaps were edited) the scope is
+dropped. A rerun only re-opens files whose (size, mtime_ns, inode) changed.
+"""
+import json
+import os
+import sqlite3
+
+DEFAULT_CACHE_PATH = os.path.join('.windsurf', 'scan_cache.sqlite')
+
+
+def file_fingerprint(path):
+    """Return (size, mtime_ns, inode) for path, or None if it can't be stat'ed."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns, st.st_ino
+
+
+class ScanCache:
+    def __init__(self, db_path=DEFAULT_CACHE_PATH):
+        self.db_path = db_path
+        parent = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(parent, exist_ok=True)
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS files ('
+            'scope TEXT NOT NULL, path TEXT NOT NULL, size INTEGER, mtime_ns INTEGER, inode INTEGER, '
+            'facts TEXT, PRIMARY KEY (scope, path))'
+        )
+        self.conn.execute('CREATE TABLE IF NOT EXISTS scopes (scope TEXT PRIMARY KEY, version TEXT)')
+        self.conn.commit()
+
+    def open_scope(self, scope, version=''):
+        """Load every cached row for scope into memory, dropping it if version changed."""
+        row = self.conn.execute('SELECT version FROM scopes WHERE scope = ?', (scope,)).fetchone()
+        if row is None or row[0] != version:
+            self.conn.execute('DELETE FROM files WHERE scope = ?', (scope,))
+            self.conn.execute('INSERT OR REPLACE INTO scopes (scope, version) VALUES (?, ?)', (scope, version))
+            self.conn.commit()
+        rows = self.conn.execute('SELECT path, size, mtime_ns, inode, facts FROM files WHERE scope = ?', (scope,))
+        entries = {path: ((size, mtime_ns, inode), facts) for path, size, mtime_ns, inode, facts in rows}
+        return ScopeCache(self, scope, entries)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ScopeCache:
+    """
+    In-memory view of one scope during a scan.
+
+    get() only reads a dict, so it is safe to call from sniffing worker threads;
+    put()/keep() and flush() are called from the scanning thread.
+    """
+
+    def __init__(self, cache, scope, entries):
+        self.cache = cache
+        self.scope = scope
+        self.entries = entries
+        self.seen = set()
+        self.updated = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path, fingerprint):
+        entry = self.entries.get(path)
+        if entry is None or fingerprint is None or entry[0] != fingerprint:
+            return None
+        return json.loads(entry[1])
+
+    def keep(self, path):
+        self.seen.add(path)
+        self.hits += 1
+
+    def put(self, path, fingerprint, facts):
+        self.seen.add(path)
+        self.misses += 1
+        if fingerprint is not None:
+            self.updated[path] = (fingerprint, json.dumps(facts))
+
+    def flush(self, prune=True):
+        """
+        Write changed rows and drop rows for files that no longer exist. Pass
+        prune=False after a scan that stopped early and did not see every file.
+        """
+        conn = self.cache.conn
+        conn.executemany(
+            'INSERT OR REPLACE INTO files (scope, path, size, mtime_ns, inode, facts) VALUES (?, ?, ?, ?, ?, ?)',
+            [(self.scope, path, fp[0], fp[1], fp[2], facts) for path, (fp, facts) in self.updated.items()],
+        )
+        gone = [(self.scope, path) for path in self.entries if path not in self.seen] if prune else []
+        conn.executemany('DELETE FROM files WHERE scope = ? AND path = ?', gone)
+        conn.commit()
+        self.updated = {}
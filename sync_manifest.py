@@ -0,0 +1,74 @@
+"""
+Manifest for idempotent .windsurf/rules syncs.
+
+For every output file the manifest records the upstream source name, its git
+blob SHA and the converter version that produced it. A sync skips download,
+conversion and writing for entries whose SHA and converter version are
+unchanged (and whose output still exists), and deletes only files the
+manifest says it created when their source disappears upstream.
+"""
+import json
+import os
+
+from rules_writer import write_text_atomic
+
+MANIFEST_NAME = '.sync_manifest.json'
+
+
+class SyncManifest:
+    def __init__(self, target_dir, converter_version):
+        self.target_dir = str(target_dir)
+        self.path = os.path.join(self.target_dir, MANIFEST_NAME)
+        self.converter_version = converter_version
+        self.entries = {}
+        self.counts = {'added': 0, 'updated': 0, 'unchanged': 0, 'deleted': 0, 'failed': 0}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f).get('files', {})
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def is_current(self, out_name, sha):
+        entry = self.entries.get(out_name)
+        return (
+            entry is not None
+            and sha is not None
+            and entry.get('sha') == sha
+            and entry.get('converter') == self.converter_version
+            and os.path.isfile(os.path.join(self.target_dir, out_name))
+        )
+
+    def write(self, out_name, source_name, sha, text):
+        """Atomically write a converted rule and record it."""
+        existed = out_name in self.entries and os.path.isfile(os.path.join(self.target_dir, out_name))
+        write_text_atomic(os.path.join(self.target_dir, out_name), text)
+        self.entries[out_name] = {'source': source_name, 'sha': sha, 'converter': self.converter_version}
+        self.counts['updated' if existed else 'added'] += 1
+
+    def mark_unchanged(self):
+        self.counts['unchanged'] += 1
+
+    def mark_failed(self):
+        self.counts['failed'] += 1
+
+    def delete_missing(self, live_out_names):
+        """Delete tracked outputs whose source is gone upstream; returns the deleted paths."""
+        deleted = []
+        for out_name in sorted(set(self.entries) - set(live_out_names)):
+            path = os.path.join(self.target_dir, out_name)
+            if os.path.isfile(path):
+                os.remove(path)
+                deleted.append(path)
+            del self.entries[out_name]
+            self.counts['deleted'] += 1
+        return deleted
+
+    def save(self):
+        write_text_atomic(self.path, json.dumps({'files': self.entries}, indent=1, sort_keys=True) + '\n')
+
+    def summary(self):
+        c = self.counts
+        text = f"{c['added']} added, {c['updated']} updated, {c['unchanged']} unchanged, {c['deleted']} deleted"
+        if c['failed']:
+            text += f", {c['failed']} failed"
+        return text
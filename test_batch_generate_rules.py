@@ -0,0 +1,122 @@
+import json
+import os
+
+import pytest
+
+import batch_generate_rules
+from batch_generate_rules import RulePolicy
+
+
+def _make_repo(root, files):
+    for rel_path, text in files.items():
+        path = os.path.join(root, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+    return str(root)
+
+
+def test_policy(tmp_path):
+    path = tmp_path / 'policy.yaml'
+    path.write_text("accept: ['*']\nreject: [HTML]\ncatalog_rules: {Node.js: nodejs}\n"
+                    "cursor_directory_rules: {python: 2, react: all}\n")
+    policy = RulePolicy.load(str(path))
+    assert policy.accepts('python') and policy.accepts('Rust') and not policy.accepts('html')
+    assert policy.catalog_rule('node.js') == 'nodejs' and policy.catalog_rule('python') is None
+    assert policy.rule_choice('Python') == 2 and policy.rule_choice('React') == 'all'
+    assert policy.rule_choice('go') == 'first'
+    assert not RulePolicy(accept=['python']).accepts('go')
+    with pytest.raises(ValueError):
+        RulePolicy(cursor_directory_rules={'python': 0})
+    path.write_text('{"accepts": ["python"]}')
+    with pytest.raises(ValueError):
+        RulePolicy.load(str(path))
+
+
+def test_scan_repo_reports_errors(tmp_path):
+    repo = _make_repo(tmp_path / 'r', {'package.json': '{}', 'src/app.py': 'import os\n'})
+    result = batch_generate_rules.scan_repo(repo, 'cursor-directory')
+    assert result['error'] is None and 'Python' in result['keys'] and result['scan_s'] >= 0
+    missing = batch_generate_rules.scan_repo(str(tmp_path / 'missing'), 'catalog')
+    assert missing['error'].startswith('FileNotFoundError')
+
+
+def test_batch_catalog_mode(tmp_path, monkeypatch):
+    mirror = tmp_path / 'mirror'
+    mirror.mkdir()
+    (mirror / 'python.mdc').write_text("---\ndescription: Py\nglobs: *.py\n---\nCursor python rules\n")
+    (mirror / 'django.mdc').write_text("---\ndescription: Dj\nalwaysApply: true\n---\nDjango rules\n")
+    catalog = {name: {'name': f'{name}.mdc', 'local_path': str(mirror / f'{name}.mdc')}
+               for name in ('python', 'django')}
+    calls = []
+
+    def fake_catalog(token, **kwargs):
+        calls.append(kwargs)
+        return catalog
+    monkeypatch.setattr(batch_generate_rules.catalog_gen, 'fetch_rules_catalog', fake_catalog)
+    real_cache = batch_generate_rules.HttpCache
+    monkeypatch.setattr(batch_generate_rules, 'HttpCache', lambda **kw: real_cache(str(tmp_path / 'http.sqlite'), **kw))
+    repos = [_make_repo(tmp_path / f'repo{i}', {'requirements.txt': 'django\n', f'pkg/m{i}.py': 'import os\n'})
+             for i in range(3)]
+    (tmp_path / 'repos.txt').write_text('\n'.join(repos[1:]) + '\n# comment\n')
+    (tmp_path / 'policy.json').write_text(json.dumps({'accept': ['python', 'ruby'], 'catalog_rules': {}}))
+    report = tmp_path / 'report.json'
+    argv = [repos[0], str(tmp_path / 'nope'), '--repos-file', str(tmp_path / 'repos.txt'), '--bulk', '--offline',
+            '--policy', str(tmp_path / 'policy.json'), '--jobs', '2', '--report', str(report),
+            '--catalog-db', str(tmp_path / 'catalog.sqlite')]
+    assert batch_generate_rules.main(argv) == 1
+    assert len(calls) == 1
+    for repo in repos:
+        out = os.path.join(repo, '.windsurf', 'rules', 'python.md')
+        assert open(out).read() == "---\ntrigger: glob\nglobs: '*.py'\ndescription: Py\n---\nWindsurf python rules\n"
+        assert not os.path.exists(os.path.join(repo, '.windsurf', 'rules', 'django.md'))
+    data = json.loads(report.read_text())
+    assert data['summary']['repos'] == 4 and data['summary']['ok'] == 3 and data['summary']['errors'] == 1
+    assert data['summary']['accepted_keys'] == {'python': 3}
+    # A second run leaves identical outputs alone
+    assert batch_generate_rules.main(argv) == 1
+    data = json.loads(report.read_text())
+    assert data['summary']['files_written'] == 0 and data['summary']['files_unchanged'] == 3
+
+
+def test_cursor_directory_rules_follow_policy(tmp_path):
+    pytest.importorskip('bs4')
+    page = ('<a href="/rules/python/one.txt">1</a><a href="https://x.test/two.txt">2</a>'
+            '<code class="text-sm block pr-3">inline rule</code>')
+    texts = {'https://cursor.directory/rules/python': page,
+             'https://cursor.directory/rules/python/one.txt': 'rule one\n',
+             'https://x.test/two.txt': 'rule two'}
+    fetched = []
+
+    def fetch(session, url, timeout=10):
+        fetched.append(url)
+        return texts[url]
+    policy = RulePolicy(accept=['*'], cursor_directory_rules={'Python': 3})
+    rules = batch_generate_rules.CursorDirectoryRules(policy, None, fetch)
+    assert rules.rules_for('Python') == ['inline rule']
+    assert rules.rules_for('Python') == ['inline rule']
+    assert fetched.count('https://cursor.directory/rules/python') == 1
+    rules = batch_generate_rules.CursorDirectoryRules(RulePolicy(accept=['*']), None, fetch)
+    repo = str(tmp_path)
+    written, unchanged = batch_generate_rules.write_cursor_directory_rules(repo, ['Python'], rules)
+    assert written == [os.path.join(repo, '.windsurfrules')]
+    assert open(written[0]).read() == '# Python\nrule one'
+    assert batch_generate_rules.write_cursor_directory_rules(repo, ['Python'], rules) == ([], written)
+
+
+def test_workspace_rules_are_scoped(tmp_path):
+    repo = _make_repo(tmp_path / 'mono', {
+        'go.work': 'use (\n  ./svc\n  ./web\n)\n', 'svc/go.mod': 'module svc\n', 'svc/main.go': 'package main\n',
+        'web/requirements.txt': 'flask\n', 'scripts/build.py': 'import os\n'})
+    result = batch_generate_rules.scan_repo(repo, 'catalog', workspaces=True)
+    assert result['error'] is None and 'go' in result['workspaces']['svc']
+    assert 'python' in result['workspaces']['.'] and 'python' in result['workspaces']['web']
+
+    class Rules:
+        def rule_for(self, key):
+            return f"---\ntrigger: glob\nglobs: '*.{key}'\n---\n{key} rules\n"
+    written, _ = batch_generate_rules.write_catalog_rules(repo, ['go', 'python'], Rules(),
+                                                          workspace_keys=result['workspaces'])
+    rules_dir = os.path.join(repo, '.windsurf', 'rules')
+    assert sorted(os.path.relpath(p, rules_dir) for p in written) == ['python.md', 'svc--go.md']
+    assert open(os.path.join(rules_dir, 'svc--go.md')).read() == "---\ntrigger: glob\nglobs: svc/**/*.go\n---\ngo rules\n"
@@ -0,0 +1,56 @@
+import os
+
+import bench_scan
+
+
+def _listing(root):
+    entries = []
+    for dirpath, _, files in os.walk(root):
+        for name in files:
+            path = os.path.join(dirpath, name)
+            with open(path, 'rb') as f:
+                entries.append((os.path.relpath(path, root), f.read()))
+    return sorted(entries)
+
+
+def test_generator_is_seeded(tmp_path):
+    shape = bench_scan.make_shape(files=120, depth=3, files_per_dir=10, node_modules=15, binaries=2,
+                                  binary_size_mb=0.01, seed=7)
+    count = bench_scan.generate_synthetic_repo(str(tmp_path / 'a'), shape)
+    bench_scan.generate_synthetic_repo(str(tmp_path / 'b'), shape)
+    listing = _listing(tmp_path / 'a')
+    assert listing == _listing(tmp_path / 'b')
+    # Sources + root manifests + vendored files + binaries (the shape stamp is not counted)
+    assert count == 120 + len(bench_scan.ROOT_FILES) + 15 + 2 == len(listing) - 1
+    names = [rel for rel, _ in listing]
+    assert any(rel.startswith('node_modules' + os.sep) for rel in names)
+    assert max(rel.count(os.sep) for rel in names if rel.startswith('src')) <= 3
+    other = bench_scan.generate_synthetic_repo(str(tmp_path / 'c'), dict(shape, seed=8))
+    assert other == count and _listing(tmp_path / 'c') != listing
+
+
+def test_ensure_reuses_matching_shape(tmp_path):
+    root = str(tmp_path / 'repo')
+    shape = bench_scan.make_shape(files=30, seed=1)
+    count = bench_scan.ensure_synthetic_repo(root, shape)
+    marker = os.path.join(root, 'src', 'untouched.txt')
+    open(marker, 'w').close()
+    assert bench_scan.ensure_synthetic_repo(root, shape) == count
+    assert os.path.exists(marker)
+    try:
+        bench_scan.ensure_synthetic_repo(root, dict(shape, files=31))
+        assert False, 'expected a shape mismatch error'
+    except RuntimeError:
+        pass
+
+
+def test_run_benchmarks_reports_each_target(tmp_path):
+    root = str(tmp_path / 'repo')
+    count = bench_scan.generate_synthetic_repo(root, bench_scan.make_shape(files=40, node_modules=5, seed=3))
+    results = bench_scan.run_benchmarks(root, count, targets=['scan_codebase', 'scan_for_keys_canonical'], repeat=1)
+    assert set(results) == {'scan_codebase', 'scan_for_keys_canonical'}
+    for measured in results.values():
+        assert len(measured['runs']) == 1 and measured['wall_s'] > 0
+        assert measured['files_per_s'] > 0
+    assert 'Python' in results['scan_for_keys_canonical']['result']
+    assert 'python' in results['scan_codebase']['result']
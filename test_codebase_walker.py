@@ -0,0 +1,77 @@
+import os
+
+from codebase_walker import PathFilter, iter_codebase_files, walk_codebase
+
+
+def _walked(base, **options):
+    seen = set()
+    for root, _, files in walk_codebase(str(base), **options):
+        rel = os.path.relpath(root, base)
+        for fname in files:
+            seen.add(os.path.normpath(os.path.join(rel, fname)).replace(os.sep, '/'))
+    return seen
+
+
+def test_walk_prunes_skip_dirs_and_ignore_files(tmp_path):
+    for rel in ['my.github.io/index.html', 'node_modules/react/index.js', '.git/HEAD',
+                'dist/bundle.js', 'src/app.py', 'src/app.log', 'src/keep.log',
+                'src/gen/out.py', 'docs/a.min.js', 'docs/b.js']:
+        path = tmp_path / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text('x')
+    (tmp_path / '.gitignore').write_text('# build output\ndist/\n*.log\n!keep.log\n')
+    (tmp_path / 'src' / '.ignore').write_text('/gen\n')
+
+    pruned = []
+    seen = _walked(tmp_path, exclude=['*.min.js'], on_prune=pruned.append)
+
+    assert seen == {'.gitignore', 'my.github.io/index.html', 'src/app.py', 'src/keep.log',
+                    'src/.ignore', 'docs/b.js'}
+    assert sorted(pruned) == ['.git', 'dist', 'gen', 'node_modules']
+
+
+def test_walk_follows_symlink_loops_once(tmp_path):
+    (tmp_path / 'pkg').mkdir()
+    (tmp_path / 'pkg' / 'mod.py').write_text('x')
+    os.symlink(tmp_path, tmp_path / 'pkg' / 'loop')
+
+    seen = _walked(tmp_path, follow_symlinks=True)
+
+    assert seen == {'pkg/mod.py'}
+
+
+def test_path_filter_matches_walk(tmp_path):
+    (tmp_path / '.gitignore').write_text('*.log\nbuild/\n')
+    (tmp_path / 'pkg' / 'sub').mkdir(parents=True)
+    (tmp_path / 'pkg' / '.gitignore').write_text('gen_*\n!gen_keep.py\n')
+    (tmp_path / 'node_modules' / 'x').mkdir(parents=True)
+    (tmp_path / 'build').mkdir()
+    for rel in ['a.py', 'a.log', 'pkg/gen_x.py', 'pkg/gen_keep.py', 'pkg/sub/gen_y.py', 'pkg/sub/ok.py',
+                'node_modules/x/i.js', 'build/out.js', 'dist/d.js']:
+        path = tmp_path / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text('')
+    walked = {os.path.relpath(p, tmp_path) for p in iter_codebase_files(str(tmp_path), exclude=['dist/'])}
+    path_filter = PathFilter(str(tmp_path), exclude=['dist/'])
+    for root, _, files in os.walk(tmp_path):
+        for name in files:
+            rel = os.path.relpath(os.path.join(root, name), tmp_path)
+            assert path_filter.is_skipped(os.path.join(root, name), False) == (rel not in walked), rel
+    assert path_filter.is_skipped(str(tmp_path / 'node_modules'), True)
+    assert not path_filter.is_skipped(str(tmp_path / 'pkg' / 'sub'), True)
+    assert path_filter.is_skipped(str(tmp_path.parent), True)
+
+
+def test_breadth_first_walk_visits_shallow_dirs_first(tmp_path):
+    for rel in ('a/b/c/deep.py', 'a/top.py', 'z/top.py', 'root.py', 'a/b/mid.py', 'a/ignored/x.py'):
+        path = tmp_path / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text('x')
+    (tmp_path / '.gitignore').write_text('ignored/\n')
+    os.symlink(tmp_path / 'a', tmp_path / 'z' / 'link')
+
+    depths = [len(os.path.relpath(root, tmp_path).split(os.sep)) if root != str(tmp_path) else 0
+              for root, _, _ in walk_codebase(str(tmp_path), breadth_first=True)]
+    assert depths == sorted(depths)
+    assert _walked(tmp_path, breadth_first=True) == _walked(tmp_path) == {
+        '.gitignore', 'root.py', 'a/top.py', 'a/b/mid.py', 'a/b/c/deep.py', 'z/top.py'}
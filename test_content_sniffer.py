@@ -0,0 +1,87 @@
+import os
+
+import pytest
+
+from content_sniffer import HEAD_BYTES, read_snippet, sniff_paths, sniff_snippet, snippet_lines
+
+
+def _serial_lines(path):
+    # The pre-threading reader from scan_for_languages_and_tech
+    with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+        lines = [f.readline() for _ in range(5)]
+        f.seek(0, os.SEEK_END)
+        if f.tell() > 0:
+            f.seek(max(f.tell() - 200, 0))
+            tail_lines = f.readlines()[-5:]
+        else:
+            tail_lines = []
+    return lines, tail_lines
+
+
+def test_snippet_lines_match_serial_reader(tmp_path):
+    samples = {
+        'empty.txt': b'',
+        'short.py': b'#!/usr/bin/env python3\nimport flask\n',
+        'crlf.sh': b'#!/bin/bash\r\necho hi\r\n' * 40,
+        'cr.txt': b'a\rb\rc\rd\re\rf\rg\r',
+        'utf8.js': ('// éè中\n' * 60 + 'import React from "react"\n').encode('utf-8'),
+        'noeol.rs': b'fn main() {}' * 50,
+    }
+    for name, data in samples.items():
+        path = tmp_path / name
+        path.write_bytes(data)
+        assert snippet_lines(read_snippet(str(path))) == _serial_lines(str(path)), name
+
+
+def test_sniff_paths_returns_every_path(tmp_path):
+    paths = []
+    for i in range(50):
+        path = tmp_path / f'f{i}.txt'
+        path.write_text(f'line {i}\n')
+        paths.append(str(path))
+    paths.append(str(tmp_path / 'missing.txt'))
+
+    results = dict(sniff_paths(iter(paths), workers=4, queue_size=2))
+
+    assert sorted(results) == sorted(paths)
+    assert results[str(tmp_path / 'missing.txt')] is None
+    assert results[paths[7]] == (b'line 7\n', b'line 7\n')
+    assert dict(sniff_paths(paths, workers=1)) == results
+
+
+def test_sniff_paths_raises_reader_errors():
+    def reader(path):
+        raise ValueError(path)
+    with pytest.raises(ValueError):
+        list(sniff_paths(['x', 'y'], workers=2, reader=reader))
+
+
+def test_sniff_paths_raises_errors_of_the_iterable():
+    def paths():
+        yield 'a'
+        yield 'b'
+        raise RuntimeError('walk failed')
+    seen = []
+    with pytest.raises(RuntimeError, match='walk failed'):
+        for path, _ in sniff_paths(paths(), workers=2, reader=str.upper):
+            seen.append(path)
+    assert len(seen) <= 2
+
+
+def test_sniff_snippet_classifies_before_reading(tmp_path):
+    (tmp_path / 'app.py').write_bytes(b'#!/usr/bin/env python3\nimport flask\n')
+    (tmp_path / 'logo.png').write_bytes(b'#!/not/really/text\n')
+    (tmp_path / 'data.bin.txt').write_bytes(b'head\x00' + b'x' * 100)
+    (tmp_path / 'dump.sql').write_bytes(b'INSERT 1;\n' * 200)
+    assert sniff_snippet(str(tmp_path / 'app.py')) == ('text', read_snippet(str(tmp_path / 'app.py')))
+    assert sniff_snippet(str(tmp_path / 'logo.png')) == ('binary', None)
+    assert sniff_snippet(str(tmp_path / 'data.bin.txt')) == ('binary', None)
+    assert sniff_snippet(str(tmp_path / 'dump.sql'), max_bytes=1000) == ('oversized', None)
+    assert sniff_snippet(str(tmp_path / 'missing.py')) == ('unreadable', None)
+
+
+def test_read_snippet_caps_the_head(tmp_path):
+    path = tmp_path / 'bundle.min.js'
+    path.write_bytes(b'var a=1;' * (HEAD_BYTES // 4) + b'\n// end\n')
+    head, tail = read_snippet(str(path))
+    assert len(head) == HEAD_BYTES and tail.endswith(b'// end\n')
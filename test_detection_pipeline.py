@@ -0,0 +1,80 @@
+import itertools
+import json
+from collections import Counter
+
+import generate_windsurfrules
+import generate_windsurfrules_from_cursor_rules_list as catalog_gen
+from detection_pipeline import (Entry, KeySet, LanguageStats, TechSet, aggregate, classify, detect_tech, scan_all,
+                                sniff, source_entries)
+from file_classifier import BINARY, OVERSIZED
+from file_source import FilesystemSource
+
+
+def _make_tree(root):
+    (root / 'package.json').write_text(json.dumps({'dependencies': {'zod': '3', 'react': '18'}}))
+    (root / 'main.py').write_text('#!/usr/bin/env python\nimport os\n')
+    (root / 'Dockerfile').write_text('FROM python:3\n')
+    (root / 'logo.png').write_bytes(b'\x89PNG\0')
+    (root / 'blob.py').write_bytes(b'x = 1\0\0')
+    (root / 'big.rb').write_text('puts 1\n' * 300)
+    deep = root / 'app' / 'models'
+    deep.mkdir(parents=True)
+    for i in range(12):
+        (deep / f'm{i}.rb').write_text('class M; end\n')
+    (root / 'node_modules' / 'zod').mkdir(parents=True)
+    (root / 'node_modules' / 'zod' / 'index.js').write_text('module.exports = {}\n')
+    return str(root)
+
+
+def test_scan_all_matches_the_scanners(tmp_path):
+    repo = _make_tree(tmp_path)
+    max_bytes = 1000
+    progress = list(scan_all(repo, max_file_bytes=max_bytes, workers=2, every=4))
+    final = progress[-1]
+    assert final.done and not any(p.done for p in progress[:-1])
+    assert final.files == 18
+
+    skipped = Counter()
+    assert final.results['languages'] == generate_windsurfrules.scan_codebase_stats(repo, max_file_bytes=max_bytes,
+                                                                                     skipped=skipped)
+    assert skipped == {BINARY: 1, OVERSIZED: 1}
+    keys = generate_windsurfrules.KEYS
+    assert final.results['keys'] == generate_windsurfrules.scan_for_keys_canonical(repo, keys)
+    assert final.results['tech'] == set(catalog_gen.scan_for_languages_and_tech(repo, max_file_bytes=max_bytes))
+
+    # Partial results only grow, and file counts step by `every`
+    assert [p.files for p in progress] == [4, 8, 12, 16, 18]
+    for before, after in zip(progress, progress[1:]):
+        assert before.results['keys'] <= after.results['keys']
+        assert before.results['tech'] <= after.results['tech']
+
+
+def test_stages_compose_and_skip_by_kind(tmp_path):
+    repo = _make_tree(tmp_path)
+    source = FilesystemSource(repo)
+    entries = detect_tech(sniff(classify(source_entries(source), max_file_bytes=1000, source=source), workers=1))
+    stats, techs = LanguageStats(), TechSet(repo)
+    *_, last = aggregate(entries, [stats, techs], every=0)
+    assert last.done and {'python', 'ruby', 'docker', 'react'} <= last.results[1]
+    # Matched by name only: the .png by extension, the oversized .rb by its size, the .py by its NUL bytes
+    assert techs.skipped == {BINARY: 2, OVERSIZED: 1}
+    assert stats.result() == {}
+
+
+def test_pipeline_is_lazy():
+    class EndlessSource:
+        # A source far too big to list up front
+        def walk(self, exclude=None, on_prune=None, breadth_first=False):
+            on_prune('node_modules')
+            yield '/repo', [], ['package.json']
+            for i in itertools.count():
+                yield f'/repo/d{i}', [], [f'f{i}.go']
+
+    first = next(source_entries(EndlessSource()))
+    assert isinstance(first, Entry) and first.is_dir and first.pruned and first.path == '/repo/node_modules'
+
+    keys = KeySet('/nonexistent', ['Go', 'Node.js'])
+    progress = aggregate(source_entries(EndlessSource()), [keys], every=10)
+    snapshots = list(itertools.islice(progress, 3))
+    assert [p.files for p in snapshots] == [10, 20, 30] and snapshots[0].results[0] >= {'Go'}
+    assert keys.inventory.has_dir('node_modules')
@@ -0,0 +1,30 @@
+import json
+import os
+import shutil
+
+from detection_table import CACHE_FILE, CODEMAPS_DIR, SOURCE_FILES, load_detection_table
+
+
+def test_detection_table_indexes_and_cache(tmp_path):
+    for name in SOURCE_FILES:
+        shutil.copy(os.path.join(CODEMAPS_DIR, name), tmp_path / name)
+
+    table = load_detection_table(str(tmp_path))
+    assert (tmp_path / CACHE_FILE).is_file()
+    assert table.ext_to_lang['.py'] == 'python'
+    assert table.ext_to_lang['.sh'] == 'shell'
+    langs, frameworks, tools = table.lookup_filename('pom.xml')
+    assert 'java' in langs and 'spring-boot' in frameworks and 'maven' in tools
+    assert table.lookup_filename('README.md') is None
+
+    # Served from the cache while the JSON is unchanged
+    cached = load_detection_table(str(tmp_path))
+    assert cached.filename_index == table.filename_index
+    assert cached.ext_to_lang == table.ext_to_lang
+
+    # Editing a map invalidates the cache
+    path = tmp_path / 'tool_detection.json'
+    tools_map = json.loads(path.read_text())
+    tools_map['bazel'] = {'markers': [], 'build_files': ['WORKSPACE'], 'filenames': ['BUILD.bazel']}
+    path.write_text(json.dumps(tools_map))
+    assert load_detection_table(str(tmp_path)).lookup_filename('BUILD.bazel') == ((), (), ('bazel',))
@@ -0,0 +1,36 @@
+import argparse
+
+import fetch_and_convert_cursor_rules_to_windsurf as fetch_convert
+import profiler
+from sync_manifest import SyncManifest
+
+
+def test_sync_keeps_going_past_a_malformed_rule(tmp_path, monkeypatch):
+    texts = {'go.mdc': '---\ndescription: Go\nglobs: [a\n---\nGo rules\n',
+             'python.mdc': '---\ndescription: Py\nglobs: "*.py"\n---\nPython rules\n'}
+    catalog = {name: {'name': name, 'sha': f'sha-{name}'} for name in texts}
+    target = tmp_path / 'rules'
+    monkeypatch.setattr(fetch_convert, 'TARGET_DIR', target)
+    monkeypatch.setattr(fetch_convert, 'sync_catalog', lambda *a, **kw: catalog)
+    monkeypatch.setattr(fetch_convert, 'read_catalog_file', lambda info: texts[info['name']])
+    real_cache = fetch_convert.HttpCache
+    monkeypatch.setattr(fetch_convert, 'HttpCache', lambda **kw: real_cache(str(tmp_path / 'http.sqlite'), **kw))
+    args = argparse.Namespace(offline=True, bulk=True, ref='main', workers=1, retries=0, timeout=1,
+                              http_cache_max_mb=1)
+    prof = profiler.enable()
+    try:
+        fetch_convert.sync(args)
+    finally:
+        profiler.disable()
+
+    assert 'Python rules' in (target / 'python.md').read_text()
+    assert not (target / 'go.md').exists()
+    # The rules converted before and after the failure are still recorded
+    manifest = SyncManifest(target, fetch_convert.CONVERTER_VERSION)
+    assert manifest.is_current('python.md', 'sha-python.mdc')
+    assert not manifest.is_current('go.md', 'sha-go.mdc')
+
+    # Conversion and writing show up as separate spans, the failed conversion included
+    summary = prof.summary()
+    assert summary['convert']['count'] == 2 and summary['write']['count'] == 1
+    assert summary['convert']['bytes'] == sum(len(text) for text in texts.values())
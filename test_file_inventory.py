@@ -0,0 +1,45 @@
+import os
+
+from file_inventory import FileInventory, build_inventory
+
+
+def test_file_inventory_lookups(tmp_path):
+    (tmp_path / 'src' / 'components').mkdir(parents=True)
+    (tmp_path / 'tests').mkdir()
+    (tmp_path / 'package.json').write_text('{}')
+    (tmp_path / 'src' / 'App.TSX').write_text('')
+    (tmp_path / 'src' / 'components' / 'button.test.js').write_text('')
+    (tmp_path / 'tests' / 'test_app.py').write_text('')
+
+    inventory = build_inventory(os.walk(tmp_path))
+
+    assert inventory.has_file('Package.json')
+    assert not inventory.has_file('pom.xml')
+    assert inventory.has_ext('.tsx')
+    assert inventory.has_ext('.test.js')
+    assert inventory.has_ext('.js')
+    assert not inventory.has_ext('.java')
+    assert inventory.ext_count('.js') == 1
+    assert inventory.has_dir('Components')
+    assert inventory.has_pattern('test_*.py')
+    assert inventory.has_pattern('*.test.js')
+    assert not inventory.has_pattern('api*.*')
+    assert inventory.file_count == 4
+
+
+def test_file_inventory_removal():
+    inventory = FileInventory()
+    inventory.add_walk_entry(['src', 'src'], ['a.test.js', 'b.js', 'B.js'])
+    assert inventory.has_pattern('*.test.js')
+    inventory.remove_file('a.test.js')
+    assert not inventory.has_ext('.test.js') and inventory.ext_count('.js') == 2
+    assert not inventory.has_pattern('*.test.js')
+    inventory.remove_file('b.js')
+    assert inventory.has_file('b.js')
+    inventory.remove_file('b.js')
+    inventory.remove_file('b.js')
+    assert not inventory.has_file('b.js') and not inventory.has_ext('.js') and inventory.file_count == 0
+    inventory.remove_dir('SRC')
+    assert inventory.has_dir('src')
+    inventory.remove_dir('src')
+    assert not inventory.has_dir('src')
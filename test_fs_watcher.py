@@ -0,0 +1,79 @@
+import os
+import sys
+import time
+
+import pytest
+
+from codebase_walker import PathFilter
+from fs_watcher import RESCAN, InotifyWatcher, PollingWatcher, debounced_batches
+
+
+def _write(root, rel_path, text=''):
+    path = os.path.join(root, rel_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    return path
+
+
+def _rel(root, paths):
+    return sorted(os.path.relpath(p, root).replace(os.sep, '/') for p in paths)
+
+
+def test_polling_watcher_reports_changes(tmp_path):
+    root = str(tmp_path)
+    _write(root, 'src/a.py', 'a')
+    _write(root, 'src/b.py', 'b')
+    watcher = PollingWatcher(root, interval=0)
+    assert watcher.read_changes(0) == set()
+    _write(root, 'src/a.py', 'changed')
+    os.remove(os.path.join(root, 'src', 'b.py'))
+    _write(root, 'lib/c.go', 'package c')
+    os.makedirs(os.path.join(root, 'node_modules', 'x'))
+    _write(root, 'node_modules/x/index.js')
+    assert _rel(root, watcher.read_changes(0)) == ['lib', 'lib/c.go', 'node_modules', 'src/a.py', 'src/b.py']
+
+
+@pytest.mark.skipif(not sys.platform.startswith('linux'), reason='inotify is Linux only')
+def test_inotify_watcher_follows_new_dirs(tmp_path):
+    root = str(tmp_path)
+    _write(root, '.gitignore', 'build/\n')
+    _write(root, 'src/a.py')
+    watcher = InotifyWatcher(root, PathFilter(root, exclude=['*.log']))
+    try:
+        _write(root, 'src/new/deep/b.ts')
+        _write(root, 'build/out.js')
+        _write(root, 'debug.log')
+        os.makedirs(os.path.join(root, 'node_modules', 'pkg'))
+        os.remove(os.path.join(root, 'src', 'a.py'))
+        time.sleep(0.05)
+        changes = set()
+        while True:
+            more = watcher.read_changes(0.2)
+            if not more:
+                break
+            changes |= more
+        assert _rel(root, changes) == ['build', 'node_modules', 'src/a.py', 'src/new', 'src/new/deep/b.ts']
+        # The new subdirectory is watched from now on
+        _write(root, 'src/new/deep/c.ts')
+        assert _rel(root, watcher.read_changes(1)) == ['src/new/deep/c.ts']
+    finally:
+        watcher.close()
+
+
+class _ScriptedWatcher:
+    def __init__(self, script):
+        self.script = list(script)
+
+    def read_changes(self, timeout):
+        return self.script.pop(0) if self.script else set()
+
+
+def test_debounced_batches_merge_bursts():
+    watcher = _ScriptedWatcher([{'a'}, {'b'}, set(), {'c'}, RESCAN, set(), {'d'}, {'e'}, set()])
+    batches = list(debounced_batches(watcher, debounce=0, max_wait=5, should_stop=lambda: not watcher.script))
+    assert batches == [{'a', 'b'}, RESCAN, {'d', 'e'}]
+    # max_wait caps how long a continuous burst is held back
+    watcher = _ScriptedWatcher([{'a'}, {'b'}])
+    assert list(debounced_batches(watcher, debounce=0, max_wait=0, should_stop=lambda: not watcher.script)) == \
+        [{'a'}, {'b'}]
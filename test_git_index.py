@@ -0,0 +1,122 @@
+import os
+import shutil
+import subprocess
+
+import pytest
+
+import generate_windsurfrules
+import generate_windsurfrules_from_cursor_rules_list as catalog_gen
+from file_source import FilesystemSource, GitIndexSource, open_file_source
+from git_index import UnsupportedIndex, parse_index, read_git_index
+
+pytestmark = pytest.mark.skipif(shutil.which('git') is None, reason='git is needed to build test indexes')
+
+
+def _git(repo, *args):
+    subprocess.run(['git', '-C', str(repo), *args], check=True, capture_output=True)
+
+
+def _make_repo(root, *init_args):
+    root.mkdir(exist_ok=True)
+    _git(root, 'init', '-q', *init_args)
+    for rel in ['app/main.py', 'app/pkg/util.py', 'README.md', 'node_modules/left-pad/index.js',
+                'dist/bundle.js', 'untracked.rb', 'app/skipped.py']:
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text('print(1)\n')
+    (root / '.gitignore').write_text('dist/\n')
+    _git(root, 'add', '.gitignore', 'app', 'README.md', 'node_modules')
+    # Tracked although ignored, like a committed build artifact
+    _git(root, 'add', '-f', 'dist/bundle.js')
+    return root
+
+
+def _files(source, **options):
+    seen = set()
+    for root, _, files in source.walk(**options):
+        rel = os.path.relpath(root, source.base_dir)
+        seen.update(os.path.normpath(os.path.join(rel, f)).replace(os.sep, '/') for f in files)
+    return seen
+
+
+@pytest.mark.parametrize('version', ['2', '3', '4'])
+def test_index_versions_list_tracked_files(tmp_path, version):
+    repo = _make_repo(tmp_path / 'repo')
+    _git(repo, 'update-index', '--skip-worktree', 'app/skipped.py')
+    _git(repo, 'update-index', '--index-version', version)
+
+    worktree, entries = read_git_index(str(repo / 'app'))
+
+    assert worktree == str(repo)
+    assert [path for path, _, _, _ in entries] == [
+        '.gitignore', 'README.md', 'app/main.py', 'app/pkg/util.py', 'dist/bundle.js', 'node_modules/left-pad/index.js']
+    st = os.stat(repo / 'app' / 'main.py')
+    assert entries[2][1:3] == (st.st_size, st.st_mtime_ns)
+
+
+def test_sha256_repository(tmp_path):
+    try:
+        repo = _make_repo(tmp_path / 'repo', '--object-format=sha256')
+    except subprocess.CalledProcessError:
+        pytest.skip('git without SHA-256 support')
+    assert len(read_git_index(str(repo))[1]) == 7
+
+
+def test_source_walks_only_tracked_files(tmp_path):
+    repo = _make_repo(tmp_path / 'repo')
+    source = open_file_source(str(repo))
+    assert isinstance(source, GitIndexSource)
+
+    pruned = []
+    assert _files(source, on_prune=pruned.append) == {
+        '.gitignore', 'README.md', 'app/main.py', 'app/pkg/util.py', 'app/skipped.py', 'dist/bundle.js'}
+    assert pruned == ['node_modules']
+    assert _files(source, exclude=['dist/', 'pkg/']) == {'.gitignore', 'README.md', 'app/main.py', 'app/skipped.py'}
+    depths = [root.count(os.sep) for root, _, _ in source.walk(breadth_first=True)]
+    assert depths == sorted(depths)
+
+    # A subdirectory lists its part of the index; fingerprints come from the index
+    sub = open_file_source(str(repo / 'app'))
+    assert _files(sub) == {'main.py', 'pkg/util.py', 'skipped.py'}
+    st = os.stat(repo / 'app' / 'pkg' / 'util.py')
+    assert sub.fingerprint(str(repo / 'app' / 'pkg' / 'util.py'))[:2] == (st.st_size, st.st_mtime_ns)
+    assert sub.fingerprint(str(repo / 'untracked.rb'))[0] == 9
+
+
+def test_falls_back_to_the_filesystem(tmp_path, capsys):
+    (tmp_path / 'plain').mkdir()
+    assert isinstance(open_file_source(str(tmp_path / 'plain')), FilesystemSource)
+
+    repo = _make_repo(tmp_path / 'repo')
+    (repo / 'scratch').mkdir()
+    (repo / 'scratch' / 'notes.py').write_text('x')
+    # Nothing tracked below it: walked instead of treated as empty
+    assert type(open_file_source(str(repo / 'scratch'))) is FilesystemSource
+    assert type(open_file_source(str(repo), use_git_index=False)) is FilesystemSource
+
+    (repo / '.git' / 'index').write_bytes(b'DIRC\x00\x00\x00\x09\x00\x00\x00\x00')
+    assert type(open_file_source(str(repo))) is FilesystemSource
+    assert 'index version 9' in capsys.readouterr().out
+    with pytest.raises(UnsupportedIndex):
+        parse_index(b'XXXX\x00\x00\x00\x02\x00\x00\x00\x00')
+
+
+def test_scanners_count_only_tracked_sources(tmp_path):
+    repo = _make_repo(tmp_path / 'repo')
+    source = open_file_source(str(repo))
+
+    keys = generate_windsurfrules.scan_for_keys_canonical(str(repo), ['Python', 'Ruby'], source=source)
+    assert keys == {'Python'}
+    assert generate_windsurfrules.scan_for_keys_canonical(str(repo), ['Python', 'Ruby']) == {'Python', 'Ruby'}
+
+    # .env is ignored and untracked, yet still marks the project for the Security rules
+    (repo / '.env').write_text('SECRET=1\n')
+    (repo / '.gitignore').write_text('dist/\n.env\n')
+    assert 'Security' in generate_windsurfrules.scan_for_keys_canonical(str(repo), ['Security'], source=source)
+    assert 'Security' in generate_windsurfrules.scan_for_keys_canonical(str(repo), ['Security'])
+
+    stats = generate_windsurfrules.scan_codebase_stats(str(repo), source=source)
+    assert stats['python']['files'] == 3 and 'ruby' not in stats
+
+    tech = catalog_gen.scan_for_languages_and_tech(str(repo), sniff_workers=1, source=source)
+    assert 'python' in tech and 'ruby' not in tech
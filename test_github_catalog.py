@@ -0,0 +1,112 @@
+import io
+import json
+import tarfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip('requests')
+
+from github_catalog import git_blob_sha, sync_catalog
+from rule_fetcher import make_session
+
+
+class _GitHubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    files = {}
+    missing = set()
+    requests_seen = []
+
+    def _tarball(self):
+        buf = io.BytesIO()
+        with tarfile.open(fileobj=buf, mode='w:gz') as tar:
+            for path, data in self.files.items():
+                info = tarfile.TarInfo(f'o-r-abc123/{path}')
+                info.size = len(data)
+                tar.addfile(info, io.BytesIO(data))
+        return buf.getvalue()
+
+    def do_GET(self):
+        self.requests_seen.append(self.path)
+        if self.path == '/repos/o/r/git/trees/main?recursive=1':
+            tree = [{'path': path, 'type': 'blob', 'sha': git_blob_sha(data), 'size': len(data)}
+                    for path, data in self.files.items()]
+            body = json.dumps({'tree': tree + [{'path': 'rules-mdc', 'type': 'tree', 'sha': 'x'}],
+                               'truncated': False}).encode('utf-8')
+        elif self.path == '/repos/o/r/tarball/main':
+            body = self._tarball()
+        elif self.path.startswith('/raw/o/r/main/') and self.path not in self.missing:
+            body = self.files[self.path[len('/raw/o/r/main/'):]]
+        else:
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def github_server():
+    _GitHubHandler.files = {
+        'rules-mdc/python.mdc': b'---\nglobs: *.py\n---\npython rule\n',
+        'rules-mdc/go.mdc': b'go rule\n',
+        'README.md': b'readme',
+    }
+    _GitHubHandler.missing = set()
+    _GitHubHandler.requests_seen = []
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _GitHubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+    server.server_close()
+
+
+def test_sync_catalog_cold_start_then_incremental(tmp_path, github_server):
+    session = make_session(retries=0)
+    options = dict(mirror_dir=str(tmp_path), api=github_server, raw_base=f'{github_server}/raw')
+
+    catalog = sync_catalog(session, 'o', 'r', 'rules-mdc', **options)
+    assert sorted(catalog) == ['go.mdc', 'python.mdc']
+    assert (tmp_path / 'python.mdc').read_bytes() == _GitHubHandler.files['rules-mdc/python.mdc']
+    assert _GitHubHandler.requests_seen == ['/repos/o/r/git/trees/main?recursive=1', '/repos/o/r/tarball/main']
+
+    # Unchanged catalog: only the tree is requested
+    _GitHubHandler.requests_seen = []
+    sync_catalog(session, 'o', 'r', 'rules-mdc', **options)
+    assert _GitHubHandler.requests_seen == ['/repos/o/r/git/trees/main?recursive=1']
+
+    # One rule changed, one removed: only the changed blob is downloaded
+    _GitHubHandler.requests_seen = []
+    _GitHubHandler.files['rules-mdc/go.mdc'] = b'go rule v2\n'
+    del _GitHubHandler.files['rules-mdc/python.mdc']
+    catalog = sync_catalog(session, 'o', 'r', 'rules-mdc', **options)
+    assert sorted(catalog) == ['go.mdc']
+    assert (tmp_path / 'go.mdc').read_bytes() == b'go rule v2\n'
+    assert not (tmp_path / 'python.mdc').exists()
+    assert _GitHubHandler.requests_seen == ['/repos/o/r/git/trees/main?recursive=1', '/raw/o/r/main/rules-mdc/go.mdc']
+
+
+def test_sync_catalog_failed_download_keeps_the_old_sha(tmp_path, github_server):
+    session = make_session(retries=0)
+    options = dict(mirror_dir=str(tmp_path), api=github_server, raw_base=f'{github_server}/raw')
+    old_sha = sync_catalog(session, 'o', 'r', 'rules-mdc', **options)['go.mdc']['sha']
+
+    _GitHubHandler.files['rules-mdc/go.mdc'] = b'go rule v2\n'
+    _GitHubHandler.missing = {'/raw/o/r/main/rules-mdc/go.mdc'}
+    catalog = sync_catalog(session, 'o', 'r', 'rules-mdc', **options)
+    # The previous copy is served under its own SHA, not the new upstream one
+    assert catalog['go.mdc']['sha'] == old_sha and (tmp_path / 'go.mdc').read_bytes() == b'go rule\n'
+    assert sync_catalog(session, 'o', 'r', 'rules-mdc', offline=True, **options)['go.mdc']['sha'] == old_sha
+
+    _GitHubHandler.missing = set()
+    catalog = sync_catalog(session, 'o', 'r', 'rules-mdc', **options)
+    assert catalog['go.mdc']['sha'] == git_blob_sha(b'go rule v2\n')
+    assert (tmp_path / 'go.mdc').read_bytes() == b'go rule v2\n'
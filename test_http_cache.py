@@ -0,0 +1,67 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip('requests')
+
+from http_cache import HttpCache, OfflineCacheMiss, cached_fetch_text
+from rule_fetcher import make_session
+
+
+class _ETagHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    statuses = []
+
+    def do_GET(self):
+        if self.headers.get('If-None-Match') == '"v1"':
+            status, body = 304, b''
+        else:
+            status, body = 200, b'rule body'
+        self.statuses.append(status)
+        self.send_response(status)
+        self.send_header('ETag', '"v1"')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def etag_server():
+    _ETagHandler.statuses = []
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _ETagHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+    server.server_close()
+
+
+def test_cached_fetch_revalidates_and_serves_offline(tmp_path, etag_server):
+    cache = HttpCache(str(tmp_path / 'http.sqlite'))
+    session = make_session(retries=0)
+    url = f'{etag_server}/rules/python.mdc'
+
+    assert cached_fetch_text(session, url, cache=cache) == 'rule body'
+    assert cached_fetch_text(session, url, cache=cache) == 'rule body'
+    assert _ETagHandler.statuses == [200, 304]
+
+    assert cached_fetch_text(session, url, cache=cache, offline=True) == 'rule body'
+    assert _ETagHandler.statuses == [200, 304]
+    with pytest.raises(OfflineCacheMiss):
+        cached_fetch_text(session, f'{etag_server}/rules/go.mdc', cache=cache, offline=True)
+
+
+def test_http_cache_evicts_least_recently_used(tmp_path):
+    cache = HttpCache(str(tmp_path / 'http.sqlite'), max_bytes=25)
+    cache.put('a', 'x' * 10)
+    cache.put('b', 'y' * 10)
+    cache.get('a')
+    cache.put('c', 'z' * 10)
+
+    assert cache.get('b') is None
+    assert cache.get('a')[0] == 'x' * 10
+    assert cache.get('c')[0] == 'z' * 10
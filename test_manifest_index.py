@@ -0,0 +1,78 @@
+import json
+
+import generate_windsurfrules
+from file_inventory import FileInventory
+from manifest_index import ManifestIndex, dependency_frameworks
+
+POM = """<project xmlns="http://maven.apache.org/POM/4.0.0">
+  <parent><groupId>org.springframework.boot</groupId><artifactId>spring-boot-starter-parent</artifactId></parent>
+  <dependencies>
+    <dependency><groupId>org.springframework.boot</groupId><artifactId>spring-boot-starter-web</artifactId></dependency>
+    <dependency><groupId>io.quarkus</groupId><artifactId>quarkus-core</artifactId></dependency>
+  </dependencies>
+</project>
+"""
+
+GRADLE = """plugins { id 'org.springframework.boot' version '3.2.0' }
+dependencies {
+    implementation 'org.apache.struts:struts2-core:6.3.0'
+    testImplementation group: 'junit', name: 'junit', version: '4.13'
+}
+"""
+
+GO_MOD = """module example.com/chain
+
+require github.com/stretchr/testify v1.8.4
+require (
+    github.com/cosmos/ibc-go/v8 v8.0.0 // indirect
+)
+"""
+
+
+def test_parses_each_ecosystem(tmp_path):
+    (tmp_path / 'package.json').write_text(json.dumps({
+        'dependencies': {'React': '^18'}, 'devDependencies': {'@angular/core': '17'}}))
+    (tmp_path / 'pom.xml').write_text(POM)
+    (tmp_path / 'build.gradle').write_text(GRADLE)
+    (tmp_path / 'go.mod').write_text(GO_MOD)
+    (tmp_path / 'pubspec.yaml').write_text("dependencies:\n  flutter_bloc: ^8.0.0\n")
+    (tmp_path / 'requirements.txt').write_text("# web\nDjango>=4.2\n-r dev.txt\nFlask_Login==0.6\n")
+    (tmp_path / 'pyproject.toml').write_text('[project]\ndependencies = ["fastapi[all]>=0.100"]\n')
+    index = ManifestIndex.load(tmp_path)
+
+    assert index.dependencies['package.json'] == {'react', '@angular/core'}
+    assert 'org.springframework.boot:spring-boot-starter-parent' in index.dependencies['pom.xml']
+    assert {'org.apache.struts:struts2-core', 'junit:junit', 'org.springframework.boot'} <= index.dependencies['build.gradle']
+    assert index.dependencies['go.mod'] == {'example.com/chain', 'github.com/stretchr/testify', 'github.com/cosmos/ibc-go/v8'}
+    assert index.dependencies['requirements.txt'] == {'django', 'flask-login'}
+    assert index.dependencies['pyproject.toml'] == {'fastapi'}
+    assert index.document('package.json')['dependencies'] == {'React': '^18'}
+
+    assert index.has_dependency('spring-boot-starter') and index.has_dependency('quarkus')
+    assert index.has_dependency('struts') and index.has_dependency('django')
+    assert not index.has_dependency('next') and not index.has_dependency('flask')
+    assert index.mentions('bloc', ('pubspec.yaml',)) and not index.mentions('bloc', ('package.json',))
+    assert dependency_frameworks({'nextjs': {'dependencies': ['next']}, 'angular': {'dependencies': ['@angular/core']},
+                                  'spring-boot': {'dependencies': ['spring-boot-starter']}}, index) == {'angular', 'spring-boot'}
+
+
+def test_broken_manifest_declares_nothing(tmp_path, capsys):
+    (tmp_path / 'package.json').write_text('{not json')
+    index = ManifestIndex.load(tmp_path)
+    assert index.has_manifest('package.json') and not index.names()
+    assert 'package.json' in index.errors
+    assert 'Could not parse package.json' in capsys.readouterr().out
+
+
+def test_detect_keys_reads_manifests_from_the_index(tmp_path):
+    (tmp_path / 'package.json').write_text(json.dumps({'dependencies': {'next': '14', 'zod': '3'}}))
+    (tmp_path / 'app.json').write_text(json.dumps({'expo': {'name': 'app'}}))
+    (tmp_path / 'go.mod').write_text(GO_MOD)
+    (tmp_path / 'pubspec.yaml').write_text("dependencies:\n  bloc: ^8.0.0\n")
+    inventory = generate_windsurfrules.build_key_inventory(str(tmp_path))
+    keys = generate_windsurfrules.detect_keys(str(tmp_path), generate_windsurfrules.KEYS, inventory)
+    assert {'Next.js', 'Zod', 'Expo', 'IBC', 'Bloc', 'Go', 'AL'} <= keys
+
+    # A prebuilt index is used as is: no manifest on disk is read again
+    empty = generate_windsurfrules.detect_keys(str(tmp_path), ['Zod', 'Expo', 'IBC'], FileInventory(), ManifestIndex())
+    assert empty == set()
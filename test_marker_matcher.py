@@ -0,0 +1,58 @@
+import json
+import os
+import random
+
+from marker_matcher import MarkerMatcher
+
+CODEMAPS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'codeMaps')
+
+
+def _load(name):
+    with open(os.path.join(CODEMAPS_DIR, name)) as f:
+        return json.load(f)
+
+
+def _naive(langs_map, fw_map, tool_map, lines, tail_lines):
+    # The per-entry loops that MarkerMatcher replaces
+    langs, frameworks, tools = set(), set(), set()
+    for line in lines:
+        if line.startswith('#!'):
+            for lang, data in langs_map.items():
+                if any(s in line for s in data.get("shebangs", [])):
+                    langs.add(lang)
+    for line in lines + tail_lines:
+        for lang, data in langs_map.items():
+            if any(m in line for m in data.get("modelines", [])):
+                langs.add(lang)
+    for fw, data in fw_map.items():
+        if any(m in l for l in lines for m in data.get("markers", [])):
+            frameworks.add(fw)
+    for tool, data in tool_map.items():
+        if any(m in l for l in lines for m in data.get("markers", [])):
+            tools.add(tool)
+    return langs, frameworks, tools
+
+
+def test_marker_matcher_matches_naive_loops():
+    maps = (_load('language_detection.json'), _load('framework_detection.json'), _load('tool_detection.json'))
+    matcher = MarkerMatcher(*maps)
+    words = ['#!/usr/bin/env python3', '#!/bin/bash', 'react', 'import', '@angular/core', 'vim: ft=ruby',
+             'org.springframework.boot', 'lambda_function.py', 'io.quarkus', 'x', ' ', 'python', 'java']
+    rng = random.Random(7)
+    for _ in range(500):
+        lines = [' '.join(rng.choice(words) for _ in range(rng.randint(0, 4))) + '\n' for _ in range(5)]
+        tail = [' '.join(rng.choice(words) for _ in range(rng.randint(0, 3))) + '\n' for _ in range(rng.randint(0, 5))]
+        assert matcher.match_snippet(lines, tail) == _naive(*maps, lines, tail)
+
+
+def test_marker_matcher_reports_overlapping_patterns():
+    matcher = MarkerMatcher(
+        {'python': {'shebangs': ['python', 'python3']}, 'py3': {'shebangs': ['thon3']}},
+        {'next': {'markers': ['next.config.js']}, 'js': {'markers': ['config']}},
+        {},
+    )
+    langs, frameworks, _ = matcher.match_snippet(['#!/usr/bin/python3\n', 'next.config.js\n'], [])
+    assert langs == {'python', 'py3'}
+    assert frameworks == {'next', 'js'}
+    # Shebang strings only count on '#!' lines
+    assert matcher.match_snippet(['python3\n'], []) == (set(), set(), set())
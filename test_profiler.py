@@ -0,0 +1,63 @@
+import argparse
+import json
+import threading
+
+import profiler
+from profiler import profiled_iter, span
+
+
+def test_disabled_spans_are_shared_noops():
+    profiler.disable()
+    assert span('a') is span('b', bytes=1)
+    items = [1, 2]
+    assert profiled_iter('walk', items) is items
+    with span('a') as sp:
+        sp.add(bytes=5)
+
+
+def test_spans_summary_and_chrome_trace(tmp_path):
+    prof = profiler.enable()
+    try:
+        with span('scan'):
+            for size in (10, 20):
+                with span('sniff', files=1) as sp:
+                    sp.add(bytes=size)
+        worker = threading.Thread(target=lambda: span('fetch rule', bytes=7).__enter__().__exit__(None, None, None))
+        worker.start()
+        worker.join()
+        assert list(profiled_iter('walk', iter('abc'))) == ['a', 'b', 'c']
+        try:
+            with span('convert'):
+                raise ValueError('bad rule')
+        except ValueError:
+            pass
+    finally:
+        profiler.disable()
+
+    summary = prof.summary()
+    assert summary['sniff']['count'] == 2 and summary['sniff']['bytes'] == 30 and summary['sniff']['files'] == 2
+    assert summary['scan']['total_s'] >= summary['sniff']['total_s']
+    assert summary['walk']['items'] == 3 and summary['fetch rule']['bytes'] == 7
+    assert summary['convert']['count'] == 1
+
+    trace = prof.chrome_trace()['traceEvents']
+    assert {e['name'] for e in trace} == {'scan', 'sniff', 'fetch rule', 'walk', 'convert'}
+    assert all(e['ph'] == 'X' and e['dur'] >= 0 for e in trace)
+    assert len({e['tid'] for e in trace}) == 2
+    assert [e['args'] for e in trace if e['name'] == 'convert'] == [{'error': 'ValueError'}]
+
+
+def test_finish_from_args_writes_exports(tmp_path, capsys):
+    parser = argparse.ArgumentParser()
+    profiler.add_profile_arguments(parser)
+    assert profiler.start_from_args(parser.parse_args([])) is None
+    summary_path, trace_path = tmp_path / 'p.json', tmp_path / 't.json'
+    args = parser.parse_args(['--profile', str(summary_path), '--profile-trace', str(trace_path)])
+    assert profiler.start_from_args(args) is not None
+    with span('write', bytes=3):
+        pass
+    profiler.finish_from_args(args)
+    assert profiler.get_profiler() is None
+    assert json.loads(summary_path.read_text())['spans']['write']['bytes'] == 3
+    assert json.loads(trace_path.read_text())['traceEvents'][0]['name'] == 'write'
+    assert 'write' in capsys.readouterr().out
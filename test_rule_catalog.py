@@ -0,0 +1,107 @@
+import generate_windsurfrules_from_cursor_rules_list as catalog_gen
+from rule_catalog import RuleCatalog, RulesMap, lookup_alias, normalize_key, rule_aliases
+
+NAMES = ['springboot', 'nextjs', 'vuejs', 'preact', 'typescript', 'tailwindcss', 'python', 'c++', 'go']
+
+
+def _listing(shas=None):
+    shas = shas or {}
+    return {name: {'name': f'{name}.mdc', 'sha': shas.get(name, f'sha-{name}'),
+                   'download_url': f'https://raw.example/{name}.mdc'} for name in NAMES}
+
+
+def test_alias_lookup():
+    assert normalize_key('Spring-Boot') == 'springboot' and normalize_key('C#') == 'csharp'
+    aliases = rule_aliases(NAMES)
+    assert lookup_alias(aliases, 'spring-boot') == 'springboot'
+    assert lookup_alias(aliases, 'Next.js') == 'nextjs'
+    assert lookup_alias(aliases, 'vue') == 'vuejs'
+    assert lookup_alias(aliases, 'tailwind') == 'tailwindcss'
+    assert lookup_alias(aliases, 'cpp') == 'c++'
+    assert lookup_alias(aliases, 'typescipt') == 'typescript'
+    # Close, but a different framework
+    assert lookup_alias(aliases, 'react') is None
+    assert lookup_alias(aliases, 'golang') == 'go'
+
+    rules = RulesMap(_listing())
+    assert catalog_gen.find_rule_for_tech(rules, 'spring-boot')['name'] == 'springboot.mdc'
+    assert catalog_gen.find_rule_for_tech(dict(rules), 'spring-boot') is None
+
+
+def test_sync_is_incremental_and_searchable(tmp_path):
+    with RuleCatalog(str(tmp_path / 'catalog.sqlite')) as store:
+        assert store.sync('src', _listing()) == {'added': 9, 'updated': 0, 'unchanged': 0, 'removed': 0}
+        store.set_body('src', 'springboot', '---\ndescription: Spring Boot services\nglobs: "*.java"\n---\nUse DI.\n')
+        store.set_body('src', 'python', '---\ndescription: Python style\n---\nPrefer dataclasses.\n')
+        assert [name for name, _ in store.search('src', 'spring')] == ['springboot']
+        assert store.search('src', 'dataclass') == [('python', 'Python style')]
+        assert store.lookup('src', 'Spring-Boot') == 'springboot'
+
+        listing = _listing({'python': 'sha-new'})
+        del listing['preact']
+        assert store.sync('src', listing) == {'added': 0, 'updated': 1, 'unchanged': 7, 'removed': 1}
+        assert store.body('src', 'springboot').endswith('Use DI.\n')
+        # Changed upstream: the stored text is dropped until fetched again
+        assert store.body('src', 'python') is None and store.search('src', 'dataclass') == []
+        rules = store.rules_map('src')
+        assert 'preact' not in rules and rules.find('spring-boot')['sha'] == 'sha-springboot'
+        assert store.rules_map('other') == {}
+
+
+def test_fetch_rules_catalog_reuses_a_fresh_listing(tmp_path, monkeypatch):
+    calls = []
+    down = []
+
+    def fake_list(token, **kwargs):
+        calls.append(kwargs)
+        return None if down else _listing()
+    monkeypatch.setattr(catalog_gen, 'list_rules_catalog', fake_list)
+    store = RuleCatalog(str(tmp_path / 'catalog.sqlite'))
+
+    first = catalog_gen.fetch_rules_catalog('t', store=store, max_age=3600)
+    again = catalog_gen.fetch_rules_catalog('t', store=store, max_age=3600)
+    assert len(calls) == 1 and first == again and isinstance(again, RulesMap)
+
+    catalog_gen.fetch_rules_catalog('t', store=store, max_age=0)
+    assert len(calls) == 2
+    # Upstream unreachable: the stored listing is used
+    down.append(True)
+    assert catalog_gen.fetch_rules_catalog('t', store=store, max_age=0) == first and len(calls) == 3
+    down.clear()
+    # Without a store every call lists, and the map still resolves aliases
+    assert catalog_gen.fetch_rules_catalog('t').find('next.js')['name'] == 'nextjs.mdc'
+    store.close()
+
+
+def test_generate_stores_accepted_rule_bodies(tmp_path, monkeypatch):
+    repo = tmp_path / 'repo'
+    (repo / 'pkg').mkdir(parents=True)
+    (repo / 'pyproject.toml').write_text('[project]\nname = "demo"\n')
+    (repo / 'pkg' / 'main.py').write_text('import os\n')
+    listing = _listing()
+    fetched = []
+
+    def fake_fetch(token, file_info, **kwargs):
+        fetched.append(file_info['name'])
+        return '---\ndescription: Python style\nglobs: "*.py"\n---\nPrefer dataclasses.\n'
+    monkeypatch.setenv('GITHUB_TOKEN', 't')
+    monkeypatch.setattr(catalog_gen, 'PROJECT_ROOT', repo)
+    monkeypatch.setattr(catalog_gen, 'TARGET_DIR', repo / '.windsurf' / 'rules')
+    monkeypatch.setattr(catalog_gen, 'fetch_rules_catalog', lambda token, **kwargs: RulesMap(listing))
+    monkeypatch.setattr(catalog_gen, 'fetch_github_file_content', fake_fetch)
+    real_cache = catalog_gen.HttpCache
+    monkeypatch.setattr(catalog_gen, 'HttpCache', lambda **kw: real_cache(str(tmp_path / 'http.sqlite'), **kw))
+    monkeypatch.setattr('builtins.input', lambda prompt: 'y')
+    db = str(tmp_path / 'catalog.sqlite')
+    with RuleCatalog(db) as store:
+        store.sync(catalog_gen.catalog_source(), listing)
+    monkeypatch.setattr('sys.argv', ['generate', '--catalog-db', db, '--no-git-index'])
+    catalog_gen.main()
+    assert fetched == ['python.mdc']
+    assert 'Prefer dataclasses.' in (repo / '.windsurf' / 'rules' / 'python.md').read_text()
+    with RuleCatalog(db) as store:
+        assert store.search(catalog_gen.catalog_source(), 'dataclass') == [('python', 'Python style')]
+
+    # The second run reads the stored text instead of downloading it again
+    catalog_gen.main()
+    assert fetched == ['python.mdc']
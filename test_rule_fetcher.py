@@ -0,0 +1,61 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip('requests')
+
+from rule_fetcher import fetch_many, make_session
+
+
+class _RulesHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    failures = {}
+    auth_headers = []
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with self.lock:
+            self.auth_headers.append(self.headers.get('Authorization'))
+            remaining = self.failures.get(self.path, 0)
+            self.failures[self.path] = remaining - 1
+        if self.path == '/missing.mdc':
+            status, body = 404, b'not found'
+        elif remaining > 0:
+            status, body = 503, b'busy'
+        else:
+            status, body = 200, f'rule {self.path}'.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def rules_server():
+    _RulesHandler.failures = {'/flaky.mdc': 2}
+    _RulesHandler.auth_headers = []
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _RulesHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+    server.server_close()
+
+
+def test_fetch_many_pools_retries_and_reports_errors(rules_server):
+    session = make_session('secret', pool_size=4, retries=3, backoff_factor=0)
+    names = [f'r{i}.mdc' for i in range(20)] + ['flaky.mdc', 'missing.mdc']
+
+    results = {name: (text, error) for name, text, error in
+               fetch_many(session, names, lambda name: f'{rules_server}/{name}', workers=4, timeout=5)}
+
+    assert sorted(results) == sorted(names)
+    assert results['r7.mdc'] == ('rule /r7.mdc', None)
+    assert results['flaky.mdc'] == ('rule /flaky.mdc', None)
+    assert results['missing.mdc'][0] is None
+    assert results['missing.mdc'][1].response.status_code == 404
+    assert set(_RulesHandler.auth_headers) == {'token secret'}
@@ -0,0 +1,90 @@
+import random
+
+import yaml
+
+import rule_frontmatter
+from rule_frontmatter import convert_rule, dump_frontmatter, parse_frontmatter_and_content
+
+SAMPLES = [
+    "---\ndescription: Best practices for Rust\nglobs: *.rs\nalwaysApply: false\n---\n# Rust\nUse Cursor.\n",
+    "---\ndescription: 'Quoted: with colon'\nglobs: \"**/*.{ts,tsx}\"\nalwaysApply: true\n---\nbody",
+    "---\nglobs: ['*.py', \"*.pyi\", src/**]\n---\n",
+    "---\nglobs: []\nalwaysApply: False\n---\nx",
+    "---\nglobs:\n---\nx",
+    "---\nglobs: \n---\nx",
+    "---\n# comment\n\ndescription:   spaced value   \n---\nx",
+    "---\ndescription: 2024-01-01\n---\nx",
+    "---\ndescription: 1.5\nalwaysApply: yes\n---\nx",
+    "---\ndescription: >\n  folded\n  text\nglobs: *.md\n---\nx",
+    "---\ndescription: \"He said \\\"hi\\\"\"\n---\nx",
+    "---\nglobs:\n  - '*.go'\n  - go.mod\n---\nx",
+    "---\ndescription: ~\n---\n",
+    "---\ndescription: it's fine\n---\n",
+    "---\r\ndescription: crlf\r\nglobs: *.c\r\n---\r\nbody\r\n",
+    "--- \ndescription: x\n--- trailing\nbody",
+    "---\ndescription: x\n---\nbody\rwith\x0cbreaks\u2028\n",
+    "---\rdescription: cr only\r---\rbody",
+    "---\ndescription: x\x85---\nglobs: *.py\n---\n",
+    "no frontmatter\n---\n",
+    "---\ndescription: never closed\n",
+    "---",
+    "",
+]
+
+
+def test_fast_path_matches_yaml_fallback():
+    for text in SAMPLES:
+        assert parse_frontmatter_and_content(text) == rule_frontmatter._parse_frontmatter_yaml(text), text
+
+
+def test_quoted_and_list_globs_parse():
+    # The old preprocess regex backtracked into the space and broke these
+    assert parse_frontmatter_and_content('---\nglobs: "*.py"\nalwaysApply: false\n---\n')[0] == \
+        {'globs': '*.py', 'alwaysApply': False}
+    assert parse_frontmatter_and_content('---\nglobs: ["*.ts"]\n---\n')[0] == {'globs': ['*.ts']}
+    assert parse_frontmatter_and_content('---\nglobs: \n---\n')[0] == {'globs': None}
+
+
+def test_random_frontmatter_matches_yaml():
+    rng = random.Random(1234)
+    values = ['*.py', '**/*.{js,jsx}', 'src/**/*.ts, tests/**', 'true', 'False', 'yes', '', '"a b"', "'c'",
+              '["x", y]', '[]', 'a: b', 'a #b', '#x', '12', '0x1F', 'null', 'Best practices', '-x', '&a',
+              'é unicode', 'tab\there', '"unterminated', "'it''s'"]
+    keys = ['description', 'globs', 'alwaysApply', 'name']
+    for _ in range(2000):
+        lines = [f"{rng.choice(keys)}:{rng.choice([' ', '  ', ''])}{rng.choice(values)}{rng.choice(['', ' '])}"
+                 for _ in range(rng.randint(0, 4))]
+        text = '---\n' + '\n'.join(lines) + '\n---\nbody\n'
+        try:
+            expected = rule_frontmatter._parse_frontmatter_yaml(text)
+        except yaml.YAMLError:
+            try:
+                parse_frontmatter_and_content(text)
+            except yaml.YAMLError:
+                continue
+            raise AssertionError(f"fast path accepted invalid YAML: {text!r}")
+        assert parse_frontmatter_and_content(text) == expected, text
+
+
+def test_dump_round_trips():
+    rng = random.Random(99)
+    alphabet = 'ab *:#-\'"\\{}[],&!|>%@`?\t\n\r\x00\x85\u2028é😀 0123456789.'
+    for _ in range(3000):
+        value = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 12)))
+        fm = {'trigger': 'glob', 'globs': [value, '*.py'], 'description': value}
+        assert yaml.safe_load(dump_frontmatter(fm)) == fm, repr(value)
+    for value in ['true', 'null', '1.0', '2024-01-01', '~', '', True, None]:
+        assert yaml.safe_load(dump_frontmatter({'description': value})) == {'description': value}
+
+
+def test_dump_matches_safe_dump_for_short_values():
+    fm = {'trigger': 'glob', 'globs': '*.rs', 'description': "Rust's best practices"}
+    assert dump_frontmatter(fm) == yaml.safe_dump(fm, sort_keys=False).strip()
+    fm = {'trigger': 'always_on', 'globs': ['*.py', 'src/**'], 'description': 'Python'}
+    assert dump_frontmatter(fm) == yaml.safe_dump(fm, sort_keys=False).strip()
+    assert dump_frontmatter({}) == yaml.safe_dump({}).strip()
+
+
+def test_convert_rule():
+    text = "---\ndescription: Rules\nglobs: *.rs\nalwaysApply: false\n---\nCursor rules\n"
+    assert convert_rule(text) == "---\ntrigger: glob\nglobs: '*.rs'\ndescription: Rules\n---\nWindsurf rules\n"
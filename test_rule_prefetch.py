@@ -0,0 +1,79 @@
+import threading
+import time
+
+import generate_windsurfrules
+from rule_prefetch import RulePrefetcher
+
+
+class FakeSite:
+    """Three .txt rules per key; every download takes `delay` seconds, or waits for `gate` when set."""
+
+    def __init__(self, delay=0.0, gate=None):
+        self.delay = delay
+        self.gate = gate
+        self.pages = []
+        self.rules = []
+        self.lock = threading.Lock()
+
+    def list_sources(self, key, session, fetch):
+        if self.gate is not None:
+            self.gate.wait(5)
+        time.sleep(self.delay)
+        with self.lock:
+            self.pages.append(key)
+        return [f'https://rules/{key}/{i}.txt' for i in range(3)], [f'{key} inline']
+
+    def fetch(self, session, url, timeout=None):
+        time.sleep(self.delay)
+        with self.lock:
+            self.rules.append(url)
+        return f' rule at {url} \n'
+
+
+def test_prefetched_rules_hide_download_time():
+    site = FakeSite(delay=0.05)
+    with RulePrefetcher(['Go', 'Python'], None, site.fetch, site.list_sources, workers=4, read_ahead=2) as prefetcher:
+        # The user is reading prompts meanwhile
+        time.sleep(0.4)
+        links, blocks = prefetcher.sources('Python')
+        assert blocks == ['Python inline']
+        assert prefetcher.rule('Python', links, 0) == 'rule at https://rules/Python/0.txt'
+        report = prefetcher.report()
+    assert sorted(site.pages) == ['Go', 'Python']
+    # Only the first two candidates per key are read ahead
+    assert sorted(site.rules) == ['https://rules/Go/0.txt', 'https://rules/Go/1.txt',
+                                  'https://rules/Python/0.txt', 'https://rules/Python/1.txt']
+    assert report['used'] == 2 and report['downloads'] == 6
+    assert report['exposed_s'] < 0.05 < report['hidden_s']
+
+
+def test_cancel_stops_queued_work_for_rejected_keys():
+    gate = threading.Event()
+    site = FakeSite(gate=gate)
+    prefetcher = RulePrefetcher(['A', 'B', 'C'], None, site.fetch, site.list_sources, workers=1)
+    prefetcher.cancel('B')
+    prefetcher.cancel('C')
+    prefetcher.cancel('C')
+    assert prefetcher.report()['cancelled'] == 2
+    gate.set()
+    links, _ = prefetcher.sources('A')
+    prefetcher.rule('A', links, 0)
+    prefetcher.close()
+    assert site.pages == ['A'] and all('/A/' in url for url in site.rules)
+
+    # A cancelled key can still be asked for; it is fetched on demand
+    site = FakeSite()
+    with RulePrefetcher(['A'], None, site.fetch, site.list_sources, workers=1) as prefetcher:
+        prefetcher.cancel('A')
+        assert prefetcher.sources('A')[1] == ['A inline']
+
+
+def test_interactive_fetch_uses_the_prefetcher(monkeypatch):
+    site = FakeSite()
+    answers = iter(['n', 'y'])
+    monkeypatch.setattr('builtins.input', lambda prompt: next(answers))
+    with RulePrefetcher(['Go'], None, site.fetch, site.list_sources, workers=2, read_ahead=1) as prefetcher:
+        accepted, rejected = generate_windsurfrules.fetch_rules_for_key_interactive('Go', prefetcher=prefetcher)
+    assert accepted == ['rule at https://rules/Go/1.txt'] and len(rejected) == 1
+    # Declining the first rule read ahead to the second, and no further
+    assert 'https://rules/Go/2.txt' not in site.rules
@@ -0,0 +1,43 @@
+import os
+
+import pytest
+
+from rules_writer import StreamingRulesWriter
+
+
+def _write(target, rules):
+    with StreamingRulesWriter(str(target)) as writer:
+        for rule in rules:
+            writer.add(rule)
+        return writer.commit()
+
+
+def test_streaming_writer_is_atomic_and_skips_unchanged(tmp_path):
+    target = tmp_path / '.windsurfrules'
+
+    assert _write(target, ['# Python\nuse types', '# Go\ngofmt']) is True
+    assert target.read_text() == '# Python\nuse types\n\n# Go\ngofmt'
+    assert not (tmp_path / '.windsurfrules_OLD').exists()
+
+    mtime = target.stat().st_mtime_ns
+    assert _write(target, ['# Python\nuse types', '# Go\ngofmt']) is False
+    assert target.stat().st_mtime_ns == mtime
+    assert not (tmp_path / '.windsurfrules_OLD').exists()
+
+    assert _write(target, ['# Rust\nclippy']) is True
+    assert target.read_text() == '# Rust\nclippy'
+    assert (tmp_path / '.windsurfrules_OLD').read_text() == '# Python\nuse types\n\n# Go\ngofmt'
+    assert sorted(os.listdir(tmp_path)) == ['.windsurfrules', '.windsurfrules_OLD']
+
+
+def test_streaming_writer_discards_on_error(tmp_path):
+    target = tmp_path / '.cursorrules'
+    target.write_text('old rules')
+
+    with pytest.raises(KeyboardInterrupt):
+        with StreamingRulesWriter(str(target)) as writer:
+            writer.add('# partial')
+            raise KeyboardInterrupt
+
+    assert target.read_text() == 'old rules'
+    assert os.listdir(tmp_path) == ['.cursorrules']
@@ -0,0 +1,69 @@
+import argparse
+import json
+
+import generate_windsurfrules
+import generate_windsurfrules_from_cursor_rules_list as catalog_gen
+import scan_budget
+from scan_budget import SETTLED, CheckSchedule, ScanBudget
+
+
+def _make_tree(root, deep_files=40):
+    (root / 'package.json').write_text(json.dumps({'dependencies': {'zod': '3'}}))
+    (root / 'main.py').write_text('import os\n')
+    deep = root / 'a' / 'b' / 'c'
+    deep.mkdir(parents=True)
+    for i in range(deep_files):
+        (deep / f'm{i}.rb').write_text('puts 1\n')
+    return str(root)
+
+
+def test_key_scan_stops_once_settled(tmp_path, monkeypatch):
+    monkeypatch.setattr(generate_windsurfrules, 'CheckSchedule', lambda: CheckSchedule(min_files=1))
+    repo = _make_tree(tmp_path)
+    budget = ScanBudget()
+    found = generate_windsurfrules.scan_for_keys_canonical(repo, ['Python', 'Zod', 'Bloc', 'IBC'], budget=budget)
+    assert found == {'Python', 'Zod'}
+    # Bloc and IBC can only come from root manifests, so they are decided without walking
+    assert budget.stop_reason == SETTLED and budget.files < 10
+    assert budget.decided == {'Python', 'Zod', 'Bloc', 'IBC'} and budget.uncertain == set()
+
+
+def test_key_scan_reports_uncertain_keys_when_the_budget_is_spent(tmp_path):
+    repo = _make_tree(tmp_path)
+    budget = ScanBudget(max_files=2)
+    found = generate_windsurfrules.scan_for_keys_canonical(repo, ['Python', 'Ruby', 'Zod', 'Bloc'], budget=budget)
+    assert found == {'Python', 'Zod'}
+    assert budget.stop_reason == 'files'
+    assert budget.uncertain == {'Ruby'} and budget.decided == {'Python', 'Zod', 'Bloc'}
+
+    # Without a stop the result equals the unbudgeted scan and every key is decided
+    budget = ScanBudget()
+    keys = generate_windsurfrules.KEYS
+    assert generate_windsurfrules.scan_for_keys_canonical(repo, keys, budget=budget) == \
+        generate_windsurfrules.scan_for_keys_canonical(repo, keys)
+    assert budget.stop_reason is None and budget.decided == set(keys) and budget.files == 42
+
+
+def test_tech_scan_stops_on_targets_and_byte_budget(tmp_path):
+    repo = _make_tree(tmp_path)
+    budget = ScanBudget()
+    found = catalog_gen.scan_for_languages_and_tech(repo, sniff_workers=2, budget=budget, targets={'Python'})
+    assert 'python' in found and budget.stop_reason == SETTLED and budget.files < 42
+
+    budget = ScanBudget(max_bytes=1)
+    catalog_gen.scan_for_languages_and_tech(repo, sniff_workers=1, budget=budget, targets={'python', 'ruby'})
+    assert budget.stop_reason == 'bytes' and budget.files == 0 and budget.uncertain == {'python', 'ruby'}
+
+    budget = ScanBudget()
+    found = catalog_gen.scan_for_languages_and_tech(repo, sniff_workers=1, budget=budget, targets={'go'})
+    assert {'python', 'ruby'} <= set(found) and budget.stop_reason is None and budget.uncertain == set()
+
+
+def test_budget_from_args():
+    parser = argparse.ArgumentParser()
+    scan_budget.add_budget_arguments(parser)
+    assert scan_budget.budget_from_args(parser.parse_args([])) is None
+    assert scan_budget.budget_from_args(parser.parse_args(['--budgeted'])).max_files is None
+    budget = scan_budget.budget_from_args(parser.parse_args(['--max-scan-mb', '0.5', '--max-scan-files', '10']))
+    assert budget.max_bytes == 512 * 1024 and budget.max_files == 10
+    assert budget.charge(files=9) is None and budget.charge(files=1) == 'files'
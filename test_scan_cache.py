@@ -0,0 +1,34 @@
+from scan_cache import ScanCache, file_fingerprint
+
+
+def test_scan_cache_reuses_unchanged_files(tmp_path):
+    src = tmp_path / 'a.py'
+    src.write_text('print(1)\n')
+    old = tmp_path / 'old.py'
+    old.write_text('x\n')
+    db_path = str(tmp_path / '.windsurf' / 'scan_cache.sqlite')
+
+    with ScanCache(db_path) as cache:
+        scope = cache.open_scope('lines:repo', 'v1')
+        scope.put(str(src), file_fingerprint(str(src)), 1)
+        scope.put(str(old), file_fingerprint(str(old)), 1)
+        scope.flush()
+
+    with ScanCache(db_path) as cache:
+        scope = cache.open_scope('lines:repo', 'v1')
+        assert scope.get(str(src), file_fingerprint(str(src))) == 1
+        src.write_text('print(1)\nprint(2)\n')
+        assert scope.get(str(src), file_fingerprint(str(src))) is None
+        scope.put(str(src), file_fingerprint(str(src)), 2)
+        # A scan that stopped early keeps rows it did not get to
+        scope.flush(prune=False)
+        assert str(old) in cache.open_scope('lines:repo', 'v1').entries
+        # old.py is not seen on this run, so flush() forgets it
+        scope.flush()
+
+    with ScanCache(db_path) as cache:
+        scope = cache.open_scope('lines:repo', 'v1')
+        assert scope.get(str(src), file_fingerprint(str(src))) == 2
+        assert str(old) not in scope.entries
+        # A new version (e.g. edited codeMaps) drops the scope
+        assert cache.open_scope('lines:repo', 'v2').entries == {}
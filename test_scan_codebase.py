@@ -0,0 +1,67 @@
+from collections import Counter
+
+import pytest
+
+import generate_windsurfrules
+from generate_windsurfrules import count_lines, get_dominant_language, scan_codebase, scan_codebase_stats
+from scan_cache import ScanCache
+
+
+@pytest.mark.parametrize('data', [b'', b'a', b'a\n', b'a\nb', b'a\r\nb\r\n', b'\n\n\n', b'x' * 10 + b'\n' * 7 + b'y'])
+def test_count_lines_matches_readlines(tmp_path, data):
+    path = tmp_path / 'f.py'
+    path.write_bytes(data)
+    with open(path, 'r', encoding='utf-8', errors='ignore', newline='') as f:
+        expected = len(f.readlines())
+    assert count_lines(str(path)) == ('text', expected, len(data))
+    assert count_lines(str(path), chunk_size=3) == ('text', expected, len(data))
+
+
+def test_scan_codebase_skips_binary_and_oversized(tmp_path):
+    (tmp_path / 'ok.py').write_bytes(b'a = 1\n')
+    (tmp_path / 'huge.js').write_bytes(b'x\n' * 600)
+    (tmp_path / 'blob.rs').write_bytes(b'\x7fELF\x00\x01' + b'\n' * 50)
+    skipped = Counter()
+    assert scan_codebase_stats(str(tmp_path), max_file_bytes=1000, skipped=skipped) == \
+        {'python': {'lines': 1, 'bytes': 6, 'files': 1}}
+    assert skipped == {'oversized': 1, 'binary': 1}
+    assert count_lines(str(tmp_path / 'huge.js'), max_bytes=1000) == ('oversized', 0, 1200)
+
+
+def test_scan_codebase_stats(tmp_path):
+    (tmp_path / 'src').mkdir()
+    (tmp_path / 'src' / 'a.py').write_bytes(b'import os\nprint(1)\n')
+    (tmp_path / 'src' / 'b.py').write_bytes(b'x = 1')
+    (tmp_path / 'src' / 'bundle.js').write_bytes(b'var a=1;' * 1000)
+    (tmp_path / 'README.md').write_text('# not counted\n')
+    stats = scan_codebase_stats(str(tmp_path))
+    assert stats == {'python': {'lines': 3, 'bytes': 24, 'files': 2},
+                     'javascript': {'lines': 1, 'bytes': 8000, 'files': 1}}
+    assert scan_codebase(str(tmp_path)) == {'python': 3, 'javascript': 1}
+    assert get_dominant_language(stats) == 'python'
+    assert get_dominant_language(stats, weight='bytes') == 'javascript'
+    assert get_dominant_language(stats, weight='files') == 'python'
+    assert get_dominant_language({'go': 5, 'rust': 9}) == 'rust'
+    assert get_dominant_language({}) is None
+    with pytest.raises(ValueError):
+        get_dominant_language(stats, weight='tokens')
+
+
+def test_scan_codebase_stats_uses_cache(tmp_path, monkeypatch):
+    repo = tmp_path / 'repo'
+    repo.mkdir()
+    (repo / 'a.go').write_bytes(b'package a\n\nfunc A() {}\n')
+    (repo / 'b.go').write_bytes(b'\x00' * 10)
+    db = str(tmp_path / 'cache.sqlite')
+    with ScanCache(db) as cache:
+        first_skipped = Counter()
+        first = scan_codebase_stats(str(repo), cache=cache, skipped=first_skipped)
+
+    def fail(path, chunk_size=None, max_bytes=None):
+        raise AssertionError(f"{path} should have come from the cache")
+    monkeypatch.setattr(generate_windsurfrules, 'count_lines', fail)
+    with ScanCache(db) as cache:
+        skipped = Counter()
+        assert scan_codebase_stats(str(repo), cache=cache, skipped=skipped) == first == \
+            {'go': {'lines': 3, 'bytes': 23, 'files': 1}}
+    assert skipped == first_skipped == {'binary': 1}
@@ -0,0 +1,31 @@
+import os
+
+from sync_manifest import SyncManifest
+
+
+def test_sync_manifest_skips_unchanged_and_deletes_only_tracked(tmp_path):
+    (tmp_path / 'my-own-rule.md').write_text('hand written')
+
+    manifest = SyncManifest(tmp_path, converter_version=1)
+    manifest.write('python.md', 'python.mdc', 'sha-py-1', 'python rule')
+    manifest.write('go.md', 'go.mdc', 'sha-go-1', 'go rule')
+    manifest.save()
+    assert manifest.summary() == '2 added, 0 updated, 0 unchanged, 0 deleted'
+    assert oct(os.stat(tmp_path / 'python.md').st_mode & 0o777) != oct(0o600)
+
+    manifest = SyncManifest(tmp_path, converter_version=1)
+    assert manifest.is_current('python.md', 'sha-py-1')
+    assert not manifest.is_current('python.md', 'sha-py-2')
+    assert not manifest.is_current('rust.md', 'sha-rs-1')
+    manifest.mark_unchanged()
+    manifest.write('python.md', 'python.mdc', 'sha-py-2', 'python rule v2')
+    deleted = manifest.delete_missing({'python.md'})
+    manifest.save()
+
+    assert deleted == [str(tmp_path / 'go.md')]
+    assert manifest.summary() == '0 added, 1 updated, 1 unchanged, 1 deleted'
+    assert (tmp_path / 'python.md').read_text() == 'python rule v2'
+    assert (tmp_path / 'my-own-rule.md').read_text() == 'hand written'
+
+    # A converter version bump makes every entry stale
+    assert not SyncManifest(tmp_path, converter_version=2).is_current('python.md', 'sha-py-2')
@@ -0,0 +1,82 @@
+import os
+import shutil
+
+import generate_windsurfrules
+import generate_windsurfrules_from_cursor_rules_list as catalog_gen
+import watch_rules
+from watch_rules import KeyWatchState, TechWatchState
+
+
+def _write(root, rel_path, text=''):
+    path = os.path.join(root, rel_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    return path
+
+
+def test_incremental_state_matches_full_scan(tmp_path):
+    root = str(tmp_path)
+    _write(root, 'package.json', '{"dependencies": {"react": "18"}}')
+    _write(root, '.gitignore', 'gen/\n')
+    _write(root, 'src/app.py', 'import os\n')
+    _write(root, 'src/old/main.rb', 'puts 1\n')
+    keys_state = KeyWatchState(root)
+    tech_state = TechWatchState(root)
+
+    changed = {_write(root, 'src/new/deep/main.go', 'package main\n'), _write(root, 'gen/skip.rs', 'fn main() {}\n'),
+               _write(root, 'src/app.py', '#!/usr/bin/env ruby\n'), os.path.join(root, 'src', 'new'),
+               os.path.join(root, 'gen'), os.path.join(root, 'node_modules'), os.path.join(root, 'src', 'old')}
+    os.makedirs(os.path.join(root, 'node_modules', 'x'))
+    shutil.rmtree(os.path.join(root, 'src', 'old'))
+    keys_state.apply(changed)
+    tech_state.apply(changed)
+    assert keys_state.keys() == set(generate_windsurfrules.scan_for_keys_canonical(root, generate_windsurfrules.KEYS))
+    assert tech_state.keys() == set(catalog_gen.scan_for_languages_and_tech(root))
+    assert 'go' in tech_state.keys() and 'rust' not in tech_state.keys()
+    assert keys_state.inventory.has_dir('node_modules') and not keys_state.inventory.has_file('main.rb')
+
+    # Changing the ignore rules rescans
+    gitignore = _write(root, '.gitignore', '')
+    tech_state.apply({gitignore})
+    assert 'rust' in tech_state.keys()
+
+
+class _ScriptedWatcher:
+    def __init__(self, script):
+        self.script = list(script)
+
+    def read_changes(self, timeout):
+        return self.script.pop(0) if self.script else set()
+
+
+def test_watch_regenerates_only_when_keys_change(tmp_path):
+    root = str(tmp_path)
+    _write(root, 'src/app.py', 'import os\n')
+    state = TechWatchState(root)
+    go_file = os.path.join(root, 'src', 'main.go')
+    script = [{_write(root, 'src/app.py', 'import sys\n')}, set(),
+              {go_file}, set(),
+              {_write(root, 'src/util.py', '')}, set()]
+    watcher = _ScriptedWatcher(script)
+    calls = []
+
+    def on_keys_changed(new_keys, old_keys):
+        calls.append((sorted(new_keys), sorted(old_keys)))
+    _write(root, 'src/main.go', 'package main\n')
+    watch_rules.watch(state, watcher, on_keys_changed, debounce=0, should_stop=lambda: not watcher.script)
+    assert len(calls) == 2 and calls[0] == (['python'], [])
+    assert 'go' in calls[1][0] and calls[1][1] == ['python']
+
+
+def test_remove_stale_catalog_rules_keeps_edited_files(tmp_path):
+    class Rules:
+        def rule_for(self, key):
+            return f'{key} rule\n'
+    rules_dir = tmp_path / '.windsurf' / 'rules'
+    rules_dir.mkdir(parents=True)
+    (rules_dir / 'go.md').write_text('go rule\n')
+    (rules_dir / 'rust.md').write_text('my own notes\n')
+    removed = watch_rules.remove_stale_catalog_rules(str(tmp_path), ['go', 'rust', 'zig'], Rules())
+    assert removed == [str(rules_dir / 'go.md')]
+    assert (rules_dir / 'rust.md').exists()
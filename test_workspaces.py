@@ -0,0 +1,97 @@
+import json
+
+import workspaces
+from rule_frontmatter import parse_frontmatter_and_content
+from workspaces import ROOT
+
+
+def _write(root, rel, text=''):
+    path = root / rel
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+
+
+def test_declared_workspaces_from_each_ecosystem(tmp_path):
+    _write(tmp_path, 'package.json', json.dumps({'workspaces': {'packages': ['packages/*', '!packages/skip']}}))
+    for name in ('web', 'api', 'skip'):
+        _write(tmp_path, f'packages/{name}/package.json', '{}')
+    _write(tmp_path, 'pom.xml', '<project xmlns="http://maven.apache.org/POM/4.0.0"><modules>'
+                                '<module>services</module></modules></project>')
+    _write(tmp_path, 'services/pom.xml', '<project><modules><module>billing</module></modules></project>')
+    _write(tmp_path, 'services/billing/pom.xml', '<project/>')
+    _write(tmp_path, 'settings.gradle', "rootProject.name = 'x'\ninclude ':android:app', 'lib'\n")
+    (tmp_path / 'android' / 'app').mkdir(parents=True)
+    (tmp_path / 'lib').mkdir()
+    _write(tmp_path, 'Cargo.toml', '[workspace]\nmembers = ["crates/*"]\nexclude = ["crates/old"]\n')
+    (tmp_path / 'crates' / 'core').mkdir(parents=True)
+    (tmp_path / 'crates' / 'old').mkdir()
+    _write(tmp_path, 'go.work', 'go 1.22\n\nuse (\n    ./cmd/tool\n    ./missing\n)\n')
+    (tmp_path / 'cmd' / 'tool').mkdir(parents=True)
+
+    assert workspaces.declared_workspaces(str(tmp_path)) == {
+        'packages/api': 'npm', 'packages/web': 'npm',
+        'services': 'maven', 'services/billing': 'maven',
+        'android/app': 'gradle', 'lib': 'gradle',
+        'crates/core': 'cargo',
+        'cmd/tool': 'go',
+    }
+
+
+def test_scan_workspace_keys_assigns_files_to_innermost_workspace(tmp_path):
+    _write(tmp_path, 'package.json', json.dumps({'workspaces': ['apps/*'], 'devDependencies': {'typescript': '5'}}))
+    _write(tmp_path, 'apps/web/package.json', json.dumps({'dependencies': {'next': '14'}}))
+    _write(tmp_path, 'apps/web/src/page.tsx')
+    _write(tmp_path, 'apps/api/requirements.txt', 'flask\n')
+    _write(tmp_path, 'apps/api/app.py')
+    _write(tmp_path, 'apps/api/node_modules/x/index.js')
+
+    found = workspaces.scan_workspace_keys(str(tmp_path), ['Next.js', 'Python', 'TypeScript', 'Node'])
+    assert found == {ROOT: {'TypeScript', 'Node'}, 'apps/web': {'Next.js', 'TypeScript', 'Node'},
+                     'apps/api': {'Python', 'Node'}}
+    assert workspaces.workspace_rule_targets(found) == {
+        'TypeScript': [ROOT], 'Node': [ROOT], 'Next.js': ['apps/web'], 'Python': ['apps/api']}
+
+
+def test_nested_workspace_dirs_do_not_count_for_the_parent(tmp_path):
+    _write(tmp_path, 'package.json', json.dumps({'workspaces': ['packages/*']}))
+    _write(tmp_path, 'packages/api/package.json', '{}')
+    _write(tmp_path, 'packages/api/index.js')
+    _write(tmp_path, 'packages/web/package.json', '{}')
+    _write(tmp_path, 'packages/web/index.js')
+
+    found = workspaces.scan_workspace_keys(str(tmp_path), ['API'])
+    assert found == {ROOT: set(), 'packages/api': {'API'}, 'packages/web': set()}
+    assert workspaces.workspace_rule_targets(found) == {'API': ['packages/api']}
+
+
+def test_build_files_are_workspaces_when_none_are_declared(tmp_path):
+    _write(tmp_path, 'README.md')
+    _write(tmp_path, 'backend/go.mod', 'module example.com/backend\n')
+    _write(tmp_path, 'backend/internal/db.go')
+    _write(tmp_path, 'frontend/package.json', '{}')
+    owners = {rel: owner for owner, rel in (
+        (owner, dirpath[len(str(tmp_path)):].strip('/') or ROOT)
+        for owner, dirpath, _, _, _ in workspaces.walk_workspaces(str(tmp_path)))}
+    assert owners == {ROOT: ROOT, 'backend': 'backend', 'backend/internal': 'backend', 'frontend': 'frontend'}
+
+
+def test_scan_workspace_tech_adds_declared_frameworks(tmp_path):
+    _write(tmp_path, 'settings.gradle.kts', 'include("svc")\n')
+    _write(tmp_path, 'svc/build.gradle.kts',
+           'dependencies { implementation("org.springframework.boot:spring-boot-starter-web:3.2.0") }\n')
+    _write(tmp_path, 'tools/main.go', 'package main\n')
+    found = workspaces.scan_workspace_tech(str(tmp_path), sniff_workers=2)
+    assert {'kotlin', 'spring-boot'} <= found['svc']
+    # tools/ is not declared, so its files belong to the root workspace
+    assert 'go' in found[ROOT] and 'spring-boot' not in found[ROOT]
+
+
+def test_scoped_rule_limits_globs_to_the_workspace():
+    rule = '---\ntrigger: glob\nglobs: "*.tsx, src/**/*.ts"\ndescription: React\n---\nUse hooks.\n'
+    fm, content = parse_frontmatter_and_content(workspaces.scoped_rule(rule, 'apps/web'))
+    assert fm == {'trigger': 'glob', 'globs': 'apps/web/**/*.tsx, apps/web/src/**/*.ts', 'description': 'React'}
+    assert content == 'Use hooks.\n'
+    always = workspaces.scoped_rule('---\ntrigger: always_on\n---\nBody\n', 'svc')
+    assert parse_frontmatter_and_content(always)[0] == {'trigger': 'glob', 'globs': 'svc/**'}
+    assert workspaces.scoped_rule(rule, ROOT) == rule
+    assert workspaces.scoped_rule_name('react', 'apps/web') == 'apps-web--react.md'
@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+Watch a codebase and regenerate its rules when the detected keys change.
+
+The initial scan builds the same state a one-shot run would; afterwards only
+the paths reported by the file watcher (inotify, or polling elsewhere) are
+re-examined:
+
+  --mode catalog           (default) per-file extension/filename/marker facts
+                           as in scan_for_languages_and_tech; writes
+                           .windsurf/rules/<key>.md per accepted key
+  --mode cursor-directory  a FileInventory fed to the scan_for_keys_canonical
+                           detectors; writes .windsurfrules (.cursorrules with
+                           --iscursor)
+
+Bursts of changes are debounced into one batch, and rules are regenerated only
+when the key set changes. Which keys are added, and which rule is used for
+each, follows the batch_generate_rules.py policy file (every key by default).
+"""
+import argparse
+import os
+import stat
+import sys
+import time
+from collections import Counter
+
+import yaml
+
+import generate_windsurfrules
+import generate_windsurfrules_from_cursor_rules_list as catalog_gen
+from batch_generate_rules import (CatalogRules, CursorDirectoryRules, RulePolicy, write_catalog_rules,
+                                  write_cursor_directory_rules)
+from codebase_walker import IGNORE_FILES, PathFilter, iter_codebase_files, walk_codebase
+from content_sniffer import sniff_paths, sniff_snippet
+from detection_table import get_detection_table
+from file_inventory import FileInventory
+from fs_watcher import (DEFAULT_DEBOUNCE, DEFAULT_MAX_WAIT, DEFAULT_POLL_INTERVAL, RESCAN, debounced_batches,
+                        open_watcher)
+from github_catalog import DEFAULT_REF
+from http_cache import HttpCache, make_cached_fetch
+from manifest_index import MANIFEST_PARSERS, ManifestIndex, dependency_frameworks
+from rule_catalog import add_catalog_arguments, catalog_from_args
+from rule_fetcher import make_session
+
+MODES = ('catalog', 'cursor-directory')
+# The rules this script writes must not trigger another round of regeneration
+OUTPUT_EXCLUDES = ['/.windsurf/', '/.windsurfrules', '/.cursorrules', '*_OLD', '.*.tmp']
+
+
+def _iter_new_tree(path_filter, root):
+    """Yield (path, is_dir, pruned) below a directory that just appeared, filtered like walk_codebase()."""
+    for dirpath, dirs, files in os.walk(root):
+        kept = []
+        for d in dirs:
+            path = os.path.join(dirpath, d)
+            pruned = path_filter.is_skipped(path, True)
+            yield path, True, pruned
+            if not pruned:
+                kept.append(d)
+        dirs[:] = kept
+        for fname in files:
+            path = os.path.join(dirpath, fname)
+            if not path_filter.is_skipped(path, False):
+                yield path, False, False
+
+
+def _lstat_kind(path):
+    # None if the path is gone, else whether it is a directory
+    try:
+        return stat.S_ISDIR(os.lstat(path).st_mode)
+    except OSError:
+        return None
+
+
+def _under(path, prefix):
+    return path == prefix or path.startswith(prefix + os.sep)
+
+
+def _touches_manifest(codebase_dir, paths):
+    # Only the root build files feed the manifest index
+    return any(os.path.dirname(p) == codebase_dir and os.path.basename(p) in MANIFEST_PARSERS for p in paths)
+
+
+class KeyWatchState:
+    """cursor-directory mode: a FileInventory kept in step with the tree; keys come from detect_keys()."""
+
+    def __init__(self, codebase_dir, exclude=None, keys=None):
+        self.codebase_dir = os.path.abspath(codebase_dir)
+        self.exclude = exclude
+        self.key_list = keys if keys is not None else generate_windsurfrules.KEYS
+        self.rescan()
+
+    def rescan(self):
+        self.path_filter = PathFilter(self.codebase_dir, exclude=self.exclude)
+        self.manifests = ManifestIndex.load(self.codebase_dir)
+        self.inventory = FileInventory()
+        self.files = set()
+        self.dirs = set()
+        pruned = []
+        for root, dirs, files in walk_codebase(self.codebase_dir, exclude=self.exclude, on_prune=pruned.append):
+            # Like build_key_inventory(): pruned dirs are still known by name
+            for d in pruned + dirs:
+                self._add(os.path.join(root, d), True)
+            pruned.clear()
+            for fname in files:
+                self._add(os.path.join(root, fname), False)
+
+    def _add(self, path, is_dir):
+        known = self.dirs if is_dir else self.files
+        if path in known:
+            return
+        known.add(path)
+        if is_dir:
+            self.inventory.add_dir(os.path.basename(path))
+        else:
+            self.inventory.add_file(os.path.basename(path))
+
+    def _remove(self, path):
+        if path in self.files:
+            self.files.discard(path)
+            self.inventory.remove_file(os.path.basename(path))
+        if path in self.dirs:
+            # Everything known below a removed directory goes with it
+            prefix = path + os.sep
+            for p in [p for p in self.files if p.startswith(prefix)]:
+                self.files.discard(p)
+                self.inventory.remove_file(os.path.basename(p))
+            for p in [p for p in self.dirs if _under(p, path)]:
+                self.dirs.discard(p)
+                self.inventory.remove_dir(os.path.basename(p))
+
+    def apply(self, paths):
+        """Update the inventory from changed paths (created, modified or deleted)."""
+        if any(os.path.basename(p) in IGNORE_FILES for p in paths):
+            self.rescan()
+            return
+        if _touches_manifest(self.codebase_dir, paths):
+            self.manifests = ManifestIndex.load(self.codebase_dir)
+        for path in sorted(paths):
+            is_dir = _lstat_kind(path)
+            if is_dir is None or is_dir != (path in self.dirs):
+                self._remove(path)
+            if is_dir is None:
+                continue
+            parent = os.path.dirname(path)
+            if parent != self.codebase_dir and (parent not in self.dirs or self.path_filter.is_skipped(parent, True)):
+                continue
+            if not is_dir:
+                if not self.path_filter.is_skipped(path, False):
+                    self._add(path, False)
+                continue
+            self._add(path, True)
+            if not self.path_filter.is_skipped(path, True):
+                for sub_path, sub_is_dir, _ in _iter_new_tree(self.path_filter, path):
+                    self._add(sub_path, sub_is_dir)
+
+    def keys(self):
+        return set(generate_windsurfrules.detect_keys(self.codebase_dir, self.key_list, self.inventory,
+                                                       manifests=self.manifests))
+
+
+class TechWatchState:
+    """catalog mode: (langs | frameworks | tools) per file, counted so that deletions can be undone."""
+
+    def __init__(self, codebase_dir, exclude=None, sniff_workers=None):
+        self.codebase_dir = os.path.abspath(codebase_dir)
+        self.exclude = exclude
+        self.sniff_workers = sniff_workers
+        self.rescan()
+
+    def rescan(self):
+        self.table = get_detection_table()
+        self.path_filter = PathFilter(self.codebase_dir, exclude=self.exclude)
+        self.facts = {}
+        self.counts = Counter()
+        self._load_manifests()
+        self._sniff(iter_codebase_files(self.codebase_dir, exclude=self.exclude))
+
+    def _load_manifests(self):
+        # Frameworks declared in the root build files, as in scan_for_languages_and_tech()
+        self.dependency_frameworks = dependency_frameworks(self.table.framework_detection,
+                                                           ManifestIndex.load(self.codebase_dir))
+
+    def _sniff(self, paths):
+        # Binaries and oversized files come back without a snippet and are matched by name only
+        for file_path, (_, snippet) in sniff_paths(paths, workers=self.sniff_workers, reader=sniff_snippet):
+            self._set(file_path, catalog_gen.file_tech(self.table, file_path, snippet))
+
+    def _set(self, path, tech):
+        self._drop(path)
+        langs, frameworks, tools = tech
+        facts = frozenset(langs | frameworks | tools)
+        self.facts[path] = facts
+        self.counts.update(facts)
+
+    def _drop(self, path):
+        facts = self.facts.pop(path, None)
+        if facts:
+            self.counts.subtract(facts)
+            for key in facts:
+                if self.counts[key] <= 0:
+                    del self.counts[key]
+
+    def apply(self, paths):
+        """Re-sniff created/modified files and forget deleted ones."""
+        if any(os.path.basename(p) in IGNORE_FILES for p in paths):
+            self.rescan()
+            return
+        if _touches_manifest(self.codebase_dir, paths):
+            self._load_manifests()
+        to_sniff = []
+        for path in sorted(paths):
+            is_dir = _lstat_kind(path)
+            if is_dir is None or is_dir:
+                # A deleted (or replaced) directory takes its files with it
+                for known in [p for p in self.facts if _under(p, path)]:
+                    self._drop(known)
+            if is_dir is None:
+                continue
+            if is_dir:
+                if not self.path_filter.is_skipped(path, True):
+                    to_sniff.extend(p for p, sub_is_dir, _ in _iter_new_tree(self.path_filter, path) if not sub_is_dir)
+            elif self.path_filter.is_skipped(path, False):
+                self._drop(path)
+            else:
+                to_sniff.append(path)
+        self._sniff(iter(to_sniff))
+
+    def keys(self):
+        return set(self.counts) | self.dependency_frameworks
+
+
+def remove_stale_catalog_rules(repo, keys, rules):
+    """Delete .windsurf/rules/<key>.md for keys no longer detected, unless the file was edited by hand."""
+    removed = []
+    for key in keys:
+        text = rules.rule_for(key)
+        path = os.path.join(repo, '.windsurf', 'rules', f"{key}.md")
+        if text is None:
+            continue
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                if f.read() != text:
+                    continue
+            os.remove(path)
+        except OSError:
+            continue
+        removed.append(path)
+    return removed
+
+
+def watch(state, watcher, on_keys_changed, debounce=DEFAULT_DEBOUNCE, max_wait=DEFAULT_MAX_WAIT, should_stop=None):
+    """Apply debounced change batches to state; call on_keys_changed(new, old) when its keys differ."""
+    keys = state.keys()
+    on_keys_changed(keys, set())
+    for batch in debounced_batches(watcher, debounce=debounce, max_wait=max_wait, should_stop=should_stop):
+        start = time.perf_counter()
+        if batch is RESCAN:
+            print("Change events were lost; rescanning.")
+            state.rescan()
+        else:
+            state.apply(batch)
+        new_keys = state.keys()
+        elapsed = time.perf_counter() - start
+        if new_keys == keys:
+            count = 'all' if batch is RESCAN else len(batch)
+            print(f"{count} change(s) applied in {elapsed:.3f}s; keys unchanged.")
+            continue
+        print(f"Keys changed in {elapsed:.3f}s: +{sorted(new_keys - keys)} -{sorted(keys - new_keys)}")
+        on_keys_changed(new_keys, keys)
+        keys = new_keys
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Regenerate rules whenever the detected keys of a codebase change.")
+    parser.add_argument('project_root', nargs='?', default=os.getcwd(),
+                        help='Project to watch; rules are written here (default: current directory)')
+    parser.add_argument('--mode', choices=MODES, default='catalog',
+                        help='catalog: .windsurf/rules from awesome-cursor-rules-mdc; '
+                             'cursor-directory: .windsurfrules from cursor.directory (default: catalog)')
+    parser.add_argument('--policy', help='YAML/JSON policy of accepted keys and rule choices (default: accept all)')
+    parser.add_argument('--debounce', type=float, default=DEFAULT_DEBOUNCE,
+                        help=f'Quiet seconds before a burst of changes is applied (default: {DEFAULT_DEBOUNCE:g})')
+    parser.add_argument('--max-wait', type=float, default=DEFAULT_MAX_WAIT,
+                        help=f'Apply a continuous burst after this many seconds (default: {DEFAULT_MAX_WAIT:g})')
+    parser.add_argument('--poll', action='store_true', help='Poll the tree instead of using inotify')
+    parser.add_argument('--poll-interval', type=float, default=DEFAULT_POLL_INTERVAL,
+                        help=f'Seconds between polls (default: {DEFAULT_POLL_INTERVAL:g})')
+    parser.add_argument('--exclude', action='append', default=[], metavar='GLOB',
+                        help='Gitignore-style pattern to skip while scanning (repeatable)')
+    parser.add_argument('--sniff-workers', type=int, default=None, help='Threads reading file snippets')
+    parser.add_argument('--iscursor', action='store_true', help='cursor-directory mode: write .cursorrules instead')
+    parser.add_argument('--offline', action='store_true', help='Serve rules only from the local HTTP cache')
+    parser.add_argument('--bulk', action='store_true', help='catalog mode: sync the catalog via git tree + tarball')
+    parser.add_argument('--ref', default=DEFAULT_REF, help=f'Catalog branch or tag for --bulk (default: {DEFAULT_REF})')
+    add_catalog_arguments(parser)
+    args = parser.parse_args(argv)
+
+    try:
+        policy = RulePolicy.load(args.policy) if args.policy else RulePolicy(accept=['*'])
+    except (OSError, ValueError, yaml.YAMLError) as e:
+        print(f"Error loading policy: {e}")
+        return 2
+    project_root = os.path.abspath(args.project_root)
+    if not os.path.isdir(project_root):
+        print(f"Error: not a directory: {project_root}")
+        return 2
+
+    token = os.environ.get('GITHUB_TOKEN')
+    if args.mode == 'catalog' and not token and not args.offline:
+        print("Error: GITHUB_TOKEN environment variable not set.")
+        return 2
+    session = make_session(token if args.mode == 'catalog' else None)
+    fetch = make_cached_fetch(HttpCache(), offline=args.offline)
+    exclude = args.exclude + OUTPUT_EXCLUDES
+
+    if args.mode == 'catalog':
+        print("Fetching list of available rules from GitHub...")
+        catalog_store, catalog_max_age = catalog_from_args(args)
+        available_rules_map = catalog_gen.fetch_rules_catalog(token, session=session, fetch=fetch, bulk=args.bulk,
+                                                              ref=args.ref, offline=args.offline, store=catalog_store,
+                                                              max_age=catalog_max_age)
+        if available_rules_map is None:
+            return 1
+        rules = CatalogRules(available_rules_map, policy, session, fetch, bulk=args.bulk)
+        codebase_dir = catalog_gen.find_codebase_dir(project_root)
+        state = TechWatchState(codebase_dir, exclude=exclude, sniff_workers=args.sniff_workers)
+    else:
+        rules = CursorDirectoryRules(policy, session, fetch)
+        codebase_dir = generate_windsurfrules.find_codebase_dir(project_root)
+        state = KeyWatchState(codebase_dir, exclude=exclude)
+
+    def on_keys_changed(new_keys, old_keys):
+        accepted = sorted(key for key in new_keys if policy.accepts(key))
+        try:
+            if args.mode == 'catalog':
+                rules.prefetch(accepted)
+                written, unchanged = write_catalog_rules(project_root, accepted, rules)
+                stale = sorted(key for key in old_keys - new_keys if policy.accepts(key))
+                removed = remove_stale_catalog_rules(project_root, stale, rules)
+            else:
+                written, unchanged = write_cursor_directory_rules(project_root, accepted, rules,
+                                                                  iscursor=args.iscursor)
+                removed = []
+        except Exception as e:
+            print(f"Error writing rules: {e}")
+            return
+        print(f"Rules for {len(accepted)} key(s): {len(written)} written, {len(unchanged)} unchanged, "
+              f"{len(removed)} removed.")
+
+    watcher = open_watcher(codebase_dir, exclude=exclude, force_polling=args.poll, poll_interval=args.poll_interval)
+    print(f"Watching {codebase_dir} (Ctrl+C to stop)...")
+    try:
+        watch(state, watcher, on_keys_changed, debounce=args.debounce, max_wait=args.max_wait)
+    except KeyboardInterrupt:
+        print("\nStopped.")
+    finally:
+        watcher.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,318 @@
+"""
+Monorepo workspace discovery and per-workspace scans over one shared walk.
+
+Workspaces are the sub-project roots a repository declares:
+
+- package.json "workspaces" (list or {"packages": [...]}) and pnpm-workspace.yaml
+- Maven <modules> (followed into nested aggregator poms)
+- Gradle settings.gradle(.kts) include(...)
+- Cargo.toml [workspace] members / exclude
+- go.work use directives
+
+When none are declared, every directory holding a build file (BUILD_FILES)
+is a workspace. The repository root is always a workspace too: it owns the
+files no deeper workspace claims. Workspaces are relative paths with '/'
+separators; the root is ROOT ('.').
+
+scan_workspace_keys() and scan_workspace_tech() walk the repository once,
+hand each file to its innermost workspace, then run detection per workspace
+in parallel. scoped_rule() turns a converted rule into a glob-triggered rule
+limited to one workspace.
+"""
+import glob
+import json
+import os
+import re
+import xml.etree.ElementTree as ET
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import yaml
+
+from codebase_walker import DEFAULT_SKIP_DIRS, walk_codebase
+from detection_table import get_detection_table
+from file_classifier import DEFAULT_MAX_FILE_BYTES
+from file_inventory import FileInventory
+from manifest_index import ManifestIndex, dependency_frameworks, tomllib
+from profiler import span
+from rule_frontmatter import dump_frontmatter, parse_frontmatter_and_content
+
+ROOT = '.'
+BUILD_FILES = frozenset([
+    'package.json', 'pom.xml', 'build.gradle', 'build.gradle.kts', 'Cargo.toml', 'go.mod', 'pyproject.toml',
+    'setup.py', 'requirements.txt', 'Pipfile', 'composer.json', 'Gemfile', 'pubspec.yaml', 'CMakeLists.txt',
+])
+DEFAULT_DETECT_WORKERS = min(8, os.cpu_count() or 1)
+_GRADLE_INCLUDE = re.compile(r'''\binclude\b\s*\(?([^\n)]*)''')
+_QUOTED = re.compile(r'''["']([^"']+)["']''')
+
+
+def _read_text(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _to_rel(root, path):
+    rel = os.path.relpath(os.path.normpath(os.path.join(root, path)), root).replace(os.sep, '/')
+    return None if rel == '.' or rel.startswith('../') else rel
+
+
+def _expand(root, patterns):
+    """Relative directories matching workspace globs; '!pattern' removes matches (npm/pnpm syntax)."""
+    included, excluded = set(), set()
+    for pattern in patterns:
+        if not isinstance(pattern, str):
+            continue
+        target = excluded if pattern.startswith('!') else included
+        pattern = pattern.lstrip('!').rstrip('/')
+        for match in glob.glob(os.path.join(root, pattern), recursive=True):
+            rel = _to_rel(root, match) if os.path.isdir(match) else None
+            if rel and not any(part in DEFAULT_SKIP_DIRS for part in rel.split('/')):
+                target.add(rel)
+    return included - excluded
+
+
+def npm_workspaces(root):
+    patterns = []
+    text = _read_text(os.path.join(root, 'package.json'))
+    if text:
+        try:
+            declared = json.loads(text).get('workspaces') or []
+        except Exception as e:
+            print(f"Warning: Could not parse package.json workspaces: {e}")
+            declared = []
+        patterns.extend(declared.get('packages') or [] if isinstance(declared, dict) else declared)
+    text = _read_text(os.path.join(root, 'pnpm-workspace.yaml'))
+    if text:
+        try:
+            patterns.extend((yaml.safe_load(text) or {}).get('packages') or [])
+        except Exception as e:
+            print(f"Warning: Could not parse pnpm-workspace.yaml: {e}")
+    return _expand(root, patterns)
+
+
+def maven_modules(root, rel=''):
+    text = _read_text(os.path.join(root, rel, 'pom.xml'))
+    if not text:
+        return set()
+    try:
+        project = ET.fromstring(text)
+    except ET.ParseError as e:
+        print(f"Warning: Could not parse {os.path.join(rel, 'pom.xml')} modules: {e}")
+        return set()
+    modules = set()
+    for element in project.iter():
+        if element.tag.rsplit('}', 1)[-1] == 'module' and element.text:
+            module = _to_rel(root, os.path.join(rel, element.text.strip()))
+            if module and module not in modules and os.path.isdir(os.path.join(root, module)):
+                modules.add(module)
+                # A module can itself aggregate modules
+                modules |= maven_modules(root, module)
+    return modules
+
+
+def gradle_projects(root):
+    for name in ('settings.gradle', 'settings.gradle.kts'):
+        text = _read_text(os.path.join(root, name))
+        if text:
+            break
+    else:
+        return set()
+    projects = set()
+    for args in _GRADLE_INCLUDE.findall(text):
+        for project in _QUOTED.findall(args):
+            rel = _to_rel(root, project.strip(':').replace(':', '/'))
+            if rel and os.path.isdir(os.path.join(root, rel)):
+                projects.add(rel)
+    return projects
+
+
+def cargo_members(root):
+    text = _read_text(os.path.join(root, 'Cargo.toml'))
+    if not text or tomllib is None:
+        return set()
+    try:
+        workspace = tomllib.loads(text).get('workspace') or {}
+    except Exception as e:
+        print(f"Warning: Could not parse Cargo.toml workspace: {e}")
+        return set()
+    return _expand(root, workspace.get('members') or []) - _expand(root, workspace.get('exclude') or [])
+
+
+def go_work_modules(root):
+    text = _read_text(os.path.join(root, 'go.work'))
+    if not text:
+        return set()
+    modules, in_block = set(), False
+    for line in text.splitlines():
+        line = line.split('//', 1)[0].strip()
+        if in_block:
+            if line == ')':
+                in_block = False
+            elif line:
+                modules.add(line.split()[0])
+        elif line.startswith('use ('):
+            in_block = True
+        elif line.startswith('use '):
+            modules.add(line.split()[1])
+    return {rel for rel in (_to_rel(root, m) for m in modules) if rel and os.path.isdir(os.path.join(root, rel))}
+
+
+WORKSPACE_SOURCES = (
+    ('npm', npm_workspaces),
+    ('maven', maven_modules),
+    ('gradle', gradle_projects),
+    ('cargo', cargo_members),
+    ('go', go_work_modules),
+)
+
+
+def declared_workspaces(root):
+    """{relative workspace dir: source} declared by the root's workspace manifests."""
+    declared = {}
+    with span('workspaces'):
+        for source, find in WORKSPACE_SOURCES:
+            for rel in sorted(find(root)):
+                declared.setdefault(rel, source)
+    return declared
+
+
+def walk_workspaces(root, workspaces=None, exclude=None):
+    """
+    walk_codebase(root), yielding (workspace, dirpath, dirs, files, pruned dir names).
+
+    A directory belongs to the innermost workspace containing it. Without
+    declared workspaces, directories holding a build file become workspaces
+    as the walk reaches them, so discovery costs no extra walk.
+    """
+    declared = None if workspaces is None else set(workspaces)
+    owners = {}
+    pruned = []
+    for dirpath, dirs, files in walk_codebase(root, exclude=exclude, on_prune=pruned.append):
+        rel = _to_rel(root, dirpath) or ROOT
+        if rel == ROOT:
+            owner = ROOT
+        elif (rel in declared) if declared is not None else not BUILD_FILES.isdisjoint(files):
+            owner = rel
+        else:
+            owner = owners[os.path.dirname(dirpath)]
+        owners[dirpath] = owner
+        yield owner, dirpath, dirs, files, list(pruned)
+        pruned.clear()
+
+
+def _resolve(root, workspaces):
+    if workspaces is None:
+        declared = declared_workspaces(root)
+        return sorted(declared) if declared else None
+    return workspaces
+
+
+def _map_workspaces(func, names, workers):
+    # Per-workspace detection only reads a few manifests, so threads overlap the I/O
+    names = sorted(names)
+    with ThreadPoolExecutor(max_workers=max(1, min(workers or DEFAULT_DETECT_WORKERS, len(names) or 1))) as pool:
+        return dict(zip(names, pool.map(func, names)))
+
+
+def scan_workspace_keys(root, keys, workspaces=None, exclude=None, workers=None):
+    """{workspace: detected cursor.directory keys}, from one walk and parallel detect_keys() runs."""
+    import generate_windsurfrules
+    root = os.path.abspath(root)
+    workspaces = _resolve(root, workspaces)
+    inventories = defaultdict(FileInventory)
+    with span('walk') as sp:
+        for owner, dirpath, _, files, pruned in walk_workspaces(root, workspaces, exclude=exclude):
+            inventory = inventories[owner]
+            for d in pruned:
+                inventory.add_dir(d)
+            # A dir's name counts for the workspace it belongs to, so a nested workspace is not its parent's dir
+            if dirpath != root:
+                inventory.add_dir(os.path.basename(dirpath))
+            inventory.add_walk_entry((), files)
+            sp.add(files=len(files))
+
+    def detect(name):
+        with span('detect workspace', workspace=name):
+            ws_dir = root if name == ROOT else os.path.join(root, name)
+            return set(generate_windsurfrules.detect_keys(ws_dir, keys, inventories[name]))
+    return _map_workspaces(detect, inventories, workers)
+
+
+def scan_workspace_tech(root, workspaces=None, exclude=None, sniff_workers=None, cache=None,
+                        max_file_bytes=DEFAULT_MAX_FILE_BYTES, skipped=None, workers=None):
+    """{workspace: detected catalog techs}; files are sniffed in parallel off one shared walk."""
+    import generate_windsurfrules_from_cursor_rules_list as catalog_gen
+    root = os.path.abspath(root)
+    workspaces = _resolve(root, workspaces)
+    owners = {}
+
+    def paths():
+        # Runs on the sniffing pool's feeder thread; owners is filled before a dir's files are handed out
+        for owner, dirpath, _, files, _ in walk_workspaces(root, workspaces, exclude=exclude):
+            owners[dirpath] = owner
+            for fname in files:
+                yield os.path.join(dirpath, fname)
+    detected = defaultdict(set)
+    for file_path, tech in catalog_gen.iter_file_tech(
+            root, paths=paths(), sniff_workers=sniff_workers, cache=cache,
+            max_file_bytes=max_file_bytes, skipped=skipped):
+        detected[owners[os.path.dirname(file_path)]].update(tech)
+    # Workspaces are also known when all their files are skipped or ignored
+    for owner in set(owners.values()):
+        detected[owner]
+    framework_detection = get_detection_table().framework_detection
+
+    def declared_frameworks(name):
+        with span('detect workspace', workspace=name):
+            ws_dir = root if name == ROOT else os.path.join(root, name)
+            return detected[name] | dependency_frameworks(framework_detection, ManifestIndex.load(ws_dir))
+    return _map_workspaces(declared_frameworks, list(detected), workers)
+
+
+def workspace_rule_targets(workspace_keys):
+    """
+    {key: workspaces whose rule file to write}. A key found in the root
+    workspace gets one unscoped rule (ROOT), otherwise one scoped rule per
+    workspace it was found in.
+    """
+    targets = defaultdict(list)
+    for name in sorted(workspace_keys):
+        for key in workspace_keys[name]:
+            targets[key].append(name)
+    return {key: [ROOT] if ROOT in names else names for key, names in targets.items()}
+
+
+def scoped_rule_name(key, workspace):
+    """File name in .windsurf/rules/ of the rule for key in workspace."""
+    if workspace == ROOT:
+        return f"{key}.md"
+    return f"{workspace.replace('/', '-')}--{key}.md"
+
+
+def scope_globs(globs, workspace):
+    """Prefix rule globs with a workspace dir: '*.tsx' -> 'packages/web/**/*.tsx'; none -> 'packages/web/**'."""
+    if isinstance(globs, str):
+        globs = [g.strip() for g in globs.split(',')]
+    scoped = []
+    for pattern in globs or []:
+        pattern = pattern.strip().lstrip('/')
+        if not pattern:
+            continue
+        # Cursor-style basename globs match at any depth
+        scoped.append(f"{workspace}/{pattern}" if '/' in pattern else f"{workspace}/**/{pattern}")
+    return scoped or [f"{workspace}/**"]
+
+
+def scoped_rule(text, workspace):
+    """A converted Windsurf rule limited to one workspace with a glob trigger."""
+    if workspace == ROOT:
+        return text
+    fm, content = parse_frontmatter_and_content(text)
+    new_fm = {'trigger': 'glob', 'globs': ', '.join(scope_globs(fm.get('globs'), workspace))}
+    if 'description' in fm:
+        new_fm['description'] = fm['description']
+    return '---\n' + dump_frontmatter(new_fm) + '\n---\n' + content